@@ -1,17 +1,26 @@
-"""Microphone capture and temporary WAV artefact lifecycle for Section 3."""
+"""Microphone capture, in-memory handoff and optional WAV artefacts for Section 3."""
 
 from __future__ import annotations
 
 import importlib
+import sys
+import time
+from datetime import UTC, datetime
+from functools import cache
 from pathlib import Path
 from tempfile import NamedTemporaryFile
 from threading import Event  # noqa: TC003 - used at runtime in function signatures
-from typing import TYPE_CHECKING, Protocol, cast
+from typing import TYPE_CHECKING, Any, Protocol, cast
 
+from koe.stages import timed_stage
 from koe.types import AudioArtifactPath, AudioCaptureResult, AudioError
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+    from types import ModuleType
+
     from koe.config import KoeConfig
+    from koe.types import AudioSamples
 
 
 class _SoundDeviceLike(Protocol):
@@ -39,6 +48,30 @@ class _SoundFileFallback:
         raise RuntimeError("soundfile is unavailable")
 
 
+class _LazySoundDevice:
+    """Resolve sounddevice on first use so importing koe.audio stays cheap.
+
+    sounddevice pulls in numpy and dlopens PortAudio at import time; the
+    hotkey stop path imports this module but never records.
+    """
+
+    def rec(self, frames: int, *, samplerate: int, channels: int, dtype: str) -> object:
+        return _load_sounddevice().rec(
+            frames, samplerate=samplerate, channels=channels, dtype=dtype
+        )
+
+    def wait(self) -> None:
+        _load_sounddevice().wait()
+
+
+class _LazySoundFile:
+    """Resolve soundfile on first use so importing koe.audio stays cheap."""
+
+    def write(self, file: Path, data: object, samplerate: int, /) -> None:
+        _load_soundfile().write(file, data, samplerate)
+
+
+@cache
 def _load_sounddevice() -> _SoundDeviceLike:
     try:
         module = importlib.import_module("sounddevice")
@@ -48,6 +81,7 @@ def _load_sounddevice() -> _SoundDeviceLike:
     return cast("_SoundDeviceLike", module)
 
 
+@cache
 def _load_soundfile() -> _SoundFileLike:
     try:
         module = importlib.import_module("soundfile")
@@ -57,77 +91,269 @@ def _load_soundfile() -> _SoundFileLike:
     return cast("_SoundFileLike", module)
 
 
-sounddevice = _load_sounddevice()
-soundfile = _load_soundfile()
+sounddevice: _SoundDeviceLike = _LazySoundDevice()
+soundfile: _SoundFileLike = _LazySoundFile()
 
-_MAX_RECORDING_SECONDS = 300
+_WHISPER_SAMPLE_RATE = 16_000
+_WINDOW_POLL_SECONDS = 0.25
+# Spill mode ring: how far the disk writer may lag the audio thread before frames drop.
+_SPILL_RING_SECONDS = 30
 
 
-def capture_audio(config: KoeConfig, /, stop_event: Event | None = None) -> AudioCaptureResult:
-    """Capture microphone audio until stop_event is set, then persist a WAV artefact.
+def capture_audio(
+    config: KoeConfig,
+    /,
+    stop_event: Event | None = None,
+    on_window: Callable[[AudioSamples], None] | None = None,
+    on_first_frame: Callable[[], object] | None = None,
+) -> AudioCaptureResult:
+    """Capture microphone audio until stop_event is set.
 
-    If stop_event is None, falls back to a fixed max-duration recording.
-    The stop_event is set by the SIGUSR1 handler when the user presses the
-    hotkey a second time. Recording stops immediately and captured audio
-    is written to a temporary WAV file for transcription.
-    """
-    if stop_event is not None:
-        return _capture_until_stopped(config, stop_event)
-    return _capture_fixed(config)
+    If stop_event is None, falls back to a fixed max-duration recording that
+    persists a WAV artefact. The stop_event is set by the SIGUSR1 handler when
+    the user presses the hotkey a second time. Recording stops immediately and
+    the captured samples are handed over in memory for transcription.
 
+    When on_window is given, speech-bounded windows are emitted while the
+    stream is still running; the returned buffer still holds the full capture.
+    With spill_recording set, blocks are streamed to a WAV artefact instead so
+    memory stays flat however long the session runs; on_window is not used.
 
-def _capture_until_stopped(config: KoeConfig, stop_event: Event, /) -> AudioCaptureResult:  # noqa: PLR0911
+    on_first_frame is called once, on the audio thread, when the first block of
+    a stopped-by-event recording arrives.
+    """
+    if stop_event is None:
+        return _capture_fixed(config)
+    if config["spill_recording"]:
+        return _capture_spilled(config, stop_event, on_first_frame)
+    return _capture_until_stopped(config, stop_event, on_window, on_first_frame)
+
+
+def _capture_until_stopped(
+    config: KoeConfig,
+    stop_event: Event,
+    on_window: Callable[[AudioSamples], None] | None,
+    on_first_frame: Callable[[], object] | None,
+    /,
+) -> AudioCaptureResult:
     """Stream-record from microphone until stop_event is set."""
     try:
         sd = importlib.import_module("sounddevice")
         np = importlib.import_module("numpy")
+        vad = importlib.import_module("koe.vad")
     except ModuleNotFoundError as exc:
         return {"kind": "error", "error": _audio_error(f"missing package: {exc.name}", exc, None)}
 
-    chunks: list[object] = []
-
-    def _callback(indata: object, _frames: int, _time: object, _status: object) -> None:
-        copy_method = getattr(indata, "copy", None)
-        if callable(copy_method):
-            chunks.append(copy_method())
-
+    # Preallocated for the longest allowed recording; np.empty leaves the pages
+    # untouched until written, so short captures only commit what they use.
+    buffer = np.empty(
+        (config["sample_rate"] * config["max_recording_seconds"], config["audio_channels"]),
+        dtype=np.float32,
+    )
+    capacity = len(buffer)
+    filled = 0
+
+    def _callback(indata: object, frames: int, _time: object, _status: object) -> None:
+        # Runs on the PortAudio thread: copy into the buffer, allocate nothing.
+        nonlocal filled
+        if filled == 0 and on_first_frame is not None:
+            on_first_frame()
+        count = min(frames, capacity - filled)
+        buffer[filled : filled + count] = cast("Any", indata)[:count]
+        filled += count
+
+    # Windows are fed to Whisper as arrays, which it assumes are 16 kHz.
+    windowing = on_window is not None and config["sample_rate"] == _WHISPER_SAMPLE_RATE
+    poll_seconds = _WINDOW_POLL_SECONDS if windowing else config["max_recording_seconds"]
+    cursor = 0
     try:
-        stream = sd.InputStream(
-            samplerate=config["sample_rate"],
-            channels=config["audio_channels"],
-            dtype=config["audio_format"],
-            callback=_callback,
-        )
+        with timed_stage("stream_open"):
+            stream = sd.InputStream(
+                samplerate=config["sample_rate"],
+                channels=config["audio_channels"],
+                dtype=config["audio_format"],
+                callback=_callback,
+            )
         with stream:
-            stop_event.wait(timeout=_MAX_RECORDING_SECONDS)
+            deadline = time.monotonic() + config["max_recording_seconds"]
+            while not stop_event.wait(timeout=min(poll_seconds, deadline - time.monotonic())):
+                if time.monotonic() >= deadline:
+                    break
+                if windowing and on_window is not None:
+                    cursor = _emit_speech_window(
+                        vad, buffer[cursor:filled], cursor, config, on_window
+                    )
     except Exception as error:
         return {"kind": "error", "error": _audio_error("microphone unavailable", error, None)}
 
-    if len(chunks) == 0:
+    if filled == 0:
         return {"kind": "empty"}
 
-    try:
-        samples = np.concatenate(chunks, axis=0)
-    except Exception as error:
-        return {"kind": "error", "error": _audio_error("audio concatenation failed", error, None)}
+    frames = buffer[:filled]
+    archive_dir = config["audio_archive_dir"]
+    if archive_dir is not None:
+        _archive_capture(archive_dir, frames, config["sample_rate"])
 
-    if _is_empty_capture(samples):
+    samples = vad.to_mono(frames)
+    bounds = _speech_bounds(vad, samples, config)
+    if bounds is None:
         return {"kind": "empty"}
 
+    # Emitted windows fix frame offsets the stream relies on; keep their lead-in.
+    start = bounds[0] if cursor == 0 else 0
+    end = bounds[1]
+    trimmed_seconds = round((len(samples) - (end - start)) / config["sample_rate"], 3)
+    audio_seconds = round((end - start) / config["sample_rate"], 3)
+
+    if config["sample_rate"] != _WHISPER_SAMPLE_RATE:
+        # faster-whisper treats arrays as 16 kHz; let its file decoder resample.
+        persisted = _persist_artifact(config, frames[start:end])
+        if persisted["kind"] == "captured":
+            persisted["trimmed_seconds"] = trimmed_seconds
+            persisted["audio_seconds"] = audio_seconds
+        return persisted
+
+    return {
+        "kind": "buffered",
+        "samples": samples[start:end],
+        "trimmed_seconds": trimmed_seconds,
+        "audio_seconds": audio_seconds,
+    }
+
+
+def _capture_spilled(
+    config: KoeConfig, stop_event: Event, on_first_frame: Callable[[], object] | None, /
+) -> AudioCaptureResult:
+    """Stream-record into a WAV artefact through a bounded ring buffer.
+
+    The PortAudio callback only copies into the ring; the recording thread
+    drains it to disk every poll, so memory is bounded by the ring size.
+    """
+    try:
+        sd = importlib.import_module("sounddevice")
+        np = importlib.import_module("numpy")
+        sf = importlib.import_module("soundfile")
+    except ModuleNotFoundError as exc:
+        return {"kind": "error", "error": _audio_error(f"missing package: {exc.name}", exc, None)}
+
+    ring = np.empty(
+        (config["sample_rate"] * _SPILL_RING_SECONDS, config["audio_channels"]), dtype=np.float32
+    )
+    capacity = len(ring)
+    written = 0
+    drained = 0
+
+    def _callback(indata: object, frames: int, _time: object, _status: object) -> None:
+        # Runs on the PortAudio thread: copy into the ring, allocate nothing.
+        nonlocal written
+        if written == 0 and on_first_frame is not None:
+            on_first_frame()
+        count = min(frames, capacity - (written - drained))
+        start = written % capacity
+        head = min(count, capacity - start)
+        block = cast("Any", indata)
+        ring[start : start + head] = block[:head]
+        ring[: count - head] = block[head:count]
+        written += count
+
+    def _drain(sink: Any) -> None:  # noqa: ANN401 - soundfile.SoundFile resolved via importlib
+        nonlocal drained
+        end = written
+        start = drained % capacity
+        head = min(end - drained, capacity - start)
+        sink.write(ring[start : start + head])
+        sink.write(ring[: end - drained - head])
+        drained = end
+
     artifact_path = _allocate_artifact_path(config)
     try:
-        soundfile.write(artifact_path, samples, config["sample_rate"])
+        with sf.SoundFile(
+            artifact_path,
+            mode="w",
+            samplerate=config["sample_rate"],
+            channels=config["audio_channels"],
+            format="WAV",
+            subtype="FLOAT",
+        ) as sink:
+            with timed_stage("stream_open"):
+                stream = sd.InputStream(
+                    samplerate=config["sample_rate"],
+                    channels=config["audio_channels"],
+                    dtype=config["audio_format"],
+                    callback=_callback,
+                )
+            with stream:
+                deadline = time.monotonic() + config["max_recording_seconds"]
+                while not stop_event.wait(
+                    timeout=min(_WINDOW_POLL_SECONDS, deadline - time.monotonic())
+                ):
+                    _drain(sink)
+                    if time.monotonic() >= deadline:
+                        break
+            _drain(sink)
     except Exception as error:
         remove_audio_artifact(AudioArtifactPath(artifact_path))
-        return {"kind": "error", "error": _audio_error("wav write failed", error, None)}
+        return {"kind": "error", "error": _audio_error("microphone unavailable", error, None)}
 
-    return {"kind": "captured", "artifact_path": AudioArtifactPath(artifact_path)}
+    if written == 0:
+        remove_audio_artifact(AudioArtifactPath(artifact_path))
+        return {"kind": "empty"}
+
+    return {
+        "kind": "spilled",
+        "artifact_path": AudioArtifactPath(artifact_path),
+        "audio_seconds": round(written / config["sample_rate"], 3),
+    }
+
+
+def _speech_bounds(
+    vad: ModuleType, samples: AudioSamples, config: KoeConfig, /
+) -> tuple[int, int] | None:
+    """Voiced [start, end) bounds of samples under the configured energy gate."""
+    return vad.speech_bounds(
+        samples,
+        sample_rate=config["sample_rate"],
+        threshold=config["vad_energy_threshold"],
+        padding_seconds=config["vad_padding_seconds"],
+    )
+
+
+def _emit_speech_window(
+    vad: ModuleType,
+    pending_frames: Any,  # noqa: ANN401 - numpy view resolved at runtime via importlib
+    cursor: int,
+    config: KoeConfig,
+    on_window: Callable[[AudioSamples], None],
+    /,
+) -> int:
+    """Emit pending audio up to its last long-enough silence gap, if any.
+
+    pending_frames is the buffer view starting at cursor, the index of the
+    first frame not yet emitted. Returns the advanced cursor.
+    """
+    min_frames = int(config["stream_window_seconds"] * config["sample_rate"])
+    if len(pending_frames) < min_frames:
+        return cursor
+
+    pending = vad.to_mono(pending_frames)
+    cut = vad.find_silence_cut(
+        pending,
+        sample_rate=config["sample_rate"],
+        min_frames=min_frames,
+        silence_seconds=config["stream_silence_seconds"],
+        threshold=config["vad_energy_threshold"],
+    )
+    if cut is None or _speech_bounds(vad, pending[:cut], config) is None:
+        return cursor
+
+    on_window(pending[:cut])
+    return cursor + cut
 
 
 def _capture_fixed(config: KoeConfig, /) -> AudioCaptureResult:
     """Fixed-duration recording fallback (max duration)."""
     try:
-        capture_frames = config["sample_rate"] * _MAX_RECORDING_SECONDS
+        capture_frames = config["sample_rate"] * config["max_recording_seconds"]
         samples = sounddevice.rec(
             frames=capture_frames,
             samplerate=config["sample_rate"],
@@ -141,6 +367,11 @@ def _capture_fixed(config: KoeConfig, /) -> AudioCaptureResult:
     if _is_empty_capture(samples):
         return {"kind": "empty"}
 
+    return _persist_artifact(config, samples)
+
+
+def _persist_artifact(config: KoeConfig, samples: object, /) -> AudioCaptureResult:
+    """Write samples to a temporary WAV artefact for file-based transcription."""
     artifact_path = _allocate_artifact_path(config)
     try:
         soundfile.write(artifact_path, samples, config["sample_rate"])
@@ -151,6 +382,16 @@ def _capture_fixed(config: KoeConfig, /) -> AudioCaptureResult:
     return {"kind": "captured", "artifact_path": AudioArtifactPath(artifact_path)}
 
 
+def _archive_capture(archive_dir: Path, samples: object, sample_rate: int, /) -> None:
+    """Best-effort WAV copy of a capture for debugging; never fails the dictation."""
+    try:
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%S%fZ")
+        soundfile.write(archive_dir / f"koe-{stamp}.wav", samples, sample_rate)
+    except Exception as error:
+        print(f"audio archive write failed: {error}", file=sys.stderr)
+
+
 def remove_audio_artifact(artifact_path: AudioArtifactPath, /) -> None:
     """Best-effort removal of a temporary WAV artefact without raising."""
     try:
@@ -0,0 +1,118 @@
+"""Session backend: display server, helper tool paths and focus/insertion strategies.
+
+Which display server is running, where xdotool or wl-copy live and whether
+Hyprland's IPC socket is reachable do not change while a session lasts, yet
+preflight, focus lookups and insertion all need them. session_backend resolves
+them once and hands every later caller the same answer. The answer is keyed
+by PATH and the session variables it was derived from, so a resident process
+whose environment changes resolves again instead of using stale paths.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+from threading import Lock
+from typing import TYPE_CHECKING, Literal, TypedDict
+
+from koe.hyprland import hyprland_socket_dir
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+type SessionKind = Literal["x11", "wayland"]
+type ToolName = Literal[
+    "notify-send", "xdotool", "xclip", "wl-copy", "wl-paste", "hyprctl", "wtype"
+]
+# hyprland_ipc falls back to hyprctl when a request fails; xlib and xtest fall
+# back to xdotool, and the xlib clipboard owner to xclip, whenever the
+# in-process X connection is unavailable.
+type FocusStrategy = Literal["hyprland_ipc", "hyprctl", "xlib"]
+type PasteStrategy = Literal["hyprland_ipc", "hyprctl", "xtest"]
+type ClipboardStrategy = Literal["xlib", "wl-copy", "xclip"]
+
+_SESSION_TOOLS: dict[SessionKind, tuple[ToolName, ...]] = {
+    "x11": ("notify-send", "xdotool", "xclip"),
+    "wayland": ("notify-send", "wl-copy", "wl-paste", "hyprctl", "wtype"),
+}
+# Everything a resolved backend depends on; a change to any of them resolves again.
+_KEY_VARIABLES = (
+    "PATH",
+    "KOE_BACKEND",
+    "XDG_SESSION_TYPE",
+    "DISPLAY",
+    "HYPRLAND_INSTANCE_SIGNATURE",
+    "XDG_RUNTIME_DIR",
+)
+
+
+class Backend(TypedDict):
+    session: SessionKind
+    tools: dict[ToolName, str | None]
+    hyprland_socket_dir: Path | None
+    focus: FocusStrategy
+    paste: PasteStrategy
+    clipboard: ClipboardStrategy
+
+
+_resolved_lock = Lock()
+# At most one entry: the backend of the environment seen last.
+_resolved: dict[tuple[str | None, ...], Backend] = {}
+
+
+def session_backend() -> Backend:
+    """The backend for the current environment, resolved on first use and after changes."""
+    key = tuple(os.environ.get(variable) for variable in _KEY_VARIABLES)
+    with _resolved_lock:
+        backend = _resolved.get(key)
+        if backend is None:
+            backend = resolve_backend()
+            _resolved.clear()
+            _resolved[key] = backend
+    return backend
+
+
+def resolve_backend() -> Backend:
+    """Probe the environment and PATH afresh."""
+    session = _session_kind()
+    tools: dict[ToolName, str | None] = {
+        tool: shutil.which(tool) for tool in _SESSION_TOOLS[session]
+    }
+    if session == "x11":
+        return {
+            "session": session,
+            "tools": tools,
+            "hyprland_socket_dir": None,
+            "focus": "xlib",
+            "paste": "xtest",
+            "clipboard": "xlib",
+        }
+
+    socket_dir = hyprland_socket_dir()
+    ipc_or_hyprctl = "hyprctl" if socket_dir is None else "hyprland_ipc"
+    return {
+        "session": session,
+        "tools": tools,
+        "hyprland_socket_dir": socket_dir,
+        "focus": ipc_or_hyprctl,
+        "paste": ipc_or_hyprctl,
+        # Without wl-copy, xclip still reaches XWayland clients.
+        "clipboard": "xclip" if tools["wl-copy"] is None else "wl-copy",
+    }
+
+
+def tool_command(backend: Backend, tool: ToolName, /) -> str:
+    """Absolute path to run tool by, or its bare name so a missing tool fails at exec."""
+    return backend["tools"].get(tool) or tool
+
+
+def _session_kind() -> SessionKind:
+    backend_override = os.environ.get("KOE_BACKEND")
+    if backend_override == "wayland":
+        return "wayland"
+    if backend_override == "x11":
+        return "x11"
+
+    if os.environ.get("XDG_SESSION_TYPE") == "wayland" and not os.environ.get("DISPLAY"):
+        return "wayland"
+    return "x11"
@@ -0,0 +1,255 @@
+"""`koe bench`: model load, warm-up and request latency on synthetic audio.
+
+`koe bench startup` times a hotkey press up to an open input stream, once from
+a fresh process and once through a zygote parked by this benchmark.
+"""
+
+from __future__ import annotations
+
+import importlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, TypedDict
+
+from koe.transcribe import load_whisper_model, transcribe_with_model, warm_up_model
+from koe.zygote import is_zygote_running
+
+if TYPE_CHECKING:
+    from koe.config import KoeConfig
+    from koe.types import AudioSamples, ExitCode, Result
+
+_SAMPLE_RATE = 16_000
+_SAMPLE_SECONDS = 3.0
+_STARTUP_RUNS = 5
+_ZYGOTE_READY_TIMEOUT_SECONDS = 60.0
+
+# Each probe imports koe.main first, as the `koe` entry point does on a press.
+_COLD_PROBE = """
+import koe.main
+from koe.bench import stream_open_probe
+from koe.config import DEFAULT_CONFIG
+raise SystemExit(stream_open_probe(DEFAULT_CONFIG))
+"""
+_ZYGOTE_PROBE = """
+import sys
+from pathlib import Path
+import koe.main
+from koe.bench import stream_open_probe
+from koe.config import DEFAULT_CONFIG
+from koe.zygote import run_zygote
+config = {**DEFAULT_CONFIG, "zygote_socket_path": Path(sys.argv[1])}
+raise SystemExit(run_zygote(config, lambda: stream_open_probe(config)))
+"""
+_ZYGOTE_CLIENT_PROBE = """
+import sys
+from pathlib import Path
+import koe.main
+from koe.config import DEFAULT_CONFIG
+from koe.zygote import request_zygote_session
+exit_code = request_zygote_session({**DEFAULT_CONFIG, "zygote_socket_path": Path(sys.argv[1])})
+raise SystemExit(1 if exit_code is None else exit_code)
+"""
+
+
+class BenchmarkPass(TypedDict):
+    warm_up: bool
+    load_ms: int
+    warm_up_ms: int | None
+    first_request_ms: int
+    second_request_ms: int
+
+
+class StartupPass(TypedDict):
+    zygote: bool
+    runs: int
+    median_ms: int
+    max_ms: int
+
+
+def run_benchmark(config: KoeConfig, /) -> ExitCode:
+    """Print load, warm-up and first/second request latency with warm-up off, then on.
+
+    Each pass constructs a fresh model. The cold pass runs first so its first
+    request also carries the process-wide one-time costs, as a hotkey run would.
+    """
+    sample = _synthetic_sample()
+    for warm_up in (False, True):
+        bench_result = run_benchmark_pass(config, sample, warm_up=warm_up)
+        if bench_result["ok"] is False:
+            print(f"koe bench: {bench_result['error']}", file=sys.stderr)
+            return 1
+        print(format_benchmark_pass(bench_result["value"]))
+    return 0
+
+
+def run_benchmark_pass(
+    config: KoeConfig, sample: AudioSamples, /, *, warm_up: bool
+) -> Result[BenchmarkPass, str]:
+    """Load a model, optionally warm it, then time two requests on sample."""
+    started_at = time.monotonic()
+    model_result = load_whisper_model(config)
+    if model_result["ok"] is False:
+        return {"ok": False, "error": model_result["error"]["message"]}
+    model = model_result["value"]
+    load_ms = _elapsed_ms(started_at)
+
+    warm_up_ms: int | None = None
+    if warm_up:
+        warm_up_result = warm_up_model(model)
+        if warm_up_result["ok"] is False:
+            return {"ok": False, "error": warm_up_result["error"]["message"]}
+        warm_up_ms = warm_up_result["value"]
+
+    request_ms: list[int] = []
+    for _request in range(2):
+        started_at = time.monotonic()
+        transcription_result = transcribe_with_model(model, sample)
+        if transcription_result["kind"] == "error":
+            return {"ok": False, "error": transcription_result["error"]["message"]}
+        request_ms.append(_elapsed_ms(started_at))
+
+    return {
+        "ok": True,
+        "value": {
+            "warm_up": warm_up,
+            "load_ms": load_ms,
+            "warm_up_ms": warm_up_ms,
+            "first_request_ms": request_ms[0],
+            "second_request_ms": request_ms[1],
+        },
+    }
+
+
+def format_benchmark_pass(bench_pass: BenchmarkPass, /) -> str:
+    warm_up_ms = "-" if bench_pass["warm_up_ms"] is None else str(bench_pass["warm_up_ms"])
+    return (
+        f"warm_up={'on' if bench_pass['warm_up'] else 'off'} "
+        f"load_ms={bench_pass['load_ms']} "
+        f"warm_up_ms={warm_up_ms} "
+        f"first_request_ms={bench_pass['first_request_ms']} "
+        f"second_request_ms={bench_pass['second_request_ms']}"
+    )
+
+
+def run_startup_benchmark(config: KoeConfig, /) -> ExitCode:
+    """Print key-press-to-stream-open latency without a zygote, then with one."""
+    for zygote in (False, True):
+        startup_result = measure_stream_open(config, zygote=zygote)
+        if startup_result["ok"] is False:
+            print(f"koe bench: {startup_result['error']}", file=sys.stderr)
+            return 1
+        print(format_startup_pass(startup_result["value"]))
+    return 0
+
+
+def measure_stream_open(config: KoeConfig, /, *, zygote: bool) -> Result[StartupPass, str]:
+    """Time from spawning a hotkey process until its input stream is open.
+
+    Every run spawns a fresh interpreter, as the hotkey binding does. Without a
+    zygote that interpreter opens the stream itself; with one it only pokes the
+    zygote, whose forked child opens the stream and reports when it did.
+    """
+    if not zygote:
+        samples: list[int] = []
+        for _run in range(_STARTUP_RUNS):
+            pressed_at = time.monotonic()
+            probe = subprocess.run(
+                [sys.executable, "-c", _COLD_PROBE], check=False, capture_output=True, text=True
+            )
+            if probe.returncode != 0:
+                return {"ok": False, "error": probe.stderr.strip() or "stream probe failed"}
+            samples.append(_elapsed_ms(pressed_at, float(probe.stdout)))
+        return {"ok": True, "value": _startup_pass(samples, zygote=False)}
+
+    with tempfile.TemporaryDirectory(prefix="koe-bench-") as socket_dir:
+        socket_path = Path(socket_dir) / "zygote.sock"
+        parked = subprocess.Popen(
+            [sys.executable, "-c", _ZYGOTE_PROBE, str(socket_path)],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            return _measure_through_zygote(config, parked, socket_path)
+        finally:
+            parked.terminate()
+            parked.wait()
+
+
+def stream_open_probe(config: KoeConfig, /) -> ExitCode:
+    """Open and close the input stream a recording would use; print when it opened."""
+    try:
+        sd = importlib.import_module("sounddevice")
+        stream = sd.InputStream(
+            samplerate=config["sample_rate"],
+            channels=config["audio_channels"],
+            dtype=config["audio_format"],
+        )
+        stream.start()
+        opened_at = time.monotonic()
+        stream.stop()
+        stream.close()
+    except Exception as error:
+        print(f"unable to open the input stream: {error}", file=sys.stderr, flush=True)
+        return 1
+    print(opened_at, flush=True)
+    return 0
+
+
+def format_startup_pass(startup_pass: StartupPass, /) -> str:
+    return (
+        f"zygote={'on' if startup_pass['zygote'] else 'off'} "
+        f"runs={startup_pass['runs']} "
+        f"median_ms={startup_pass['median_ms']} "
+        f"max_ms={startup_pass['max_ms']}"
+    )
+
+
+def _measure_through_zygote(
+    config: KoeConfig, parked: subprocess.Popen[str], socket_path: Path, /
+) -> Result[StartupPass, str]:
+    zygote_config: KoeConfig = {**config, "zygote_socket_path": socket_path}
+    deadline = time.monotonic() + _ZYGOTE_READY_TIMEOUT_SECONDS
+    while not is_zygote_running(zygote_config):
+        if parked.poll() is not None or time.monotonic() > deadline:
+            return {"ok": False, "error": "zygote did not start"}
+        time.sleep(0.05)
+
+    samples: list[int] = []
+    for _run in range(_STARTUP_RUNS):
+        pressed_at = time.monotonic()
+        client = subprocess.run(
+            [sys.executable, "-c", _ZYGOTE_CLIENT_PROBE, str(socket_path)],
+            check=False,
+            capture_output=True,
+            text=True,
+        )
+        # The child prints to the zygote's stdout only once its stream opened.
+        if client.returncode != 0 or parked.stdout is None:
+            return {"ok": False, "error": "unable to open the input stream through the zygote"}
+        samples.append(_elapsed_ms(pressed_at, float(parked.stdout.readline())))
+    return {"ok": True, "value": _startup_pass(samples, zygote=True)}
+
+
+def _startup_pass(samples: list[int], /, *, zygote: bool) -> StartupPass:
+    return {
+        "zygote": zygote,
+        "runs": len(samples),
+        "median_ms": int(statistics.median(samples)),
+        "max_ms": max(samples),
+    }
+
+
+def _synthetic_sample() -> AudioSamples:
+    """A 220 Hz tone: enough signal that the decoder runs past its first token."""
+    np = importlib.import_module("numpy")
+    timeline = np.arange(int(_SAMPLE_SECONDS * _SAMPLE_RATE), dtype=np.float32) / _SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * timeline)).astype(np.float32)
+
+
+def _elapsed_ms(started_at: float, ended_at: float | None = None, /) -> int:
+    """Milliseconds on the monotonic clock, which child processes share on Linux."""
+    return int(((time.monotonic() if ended_at is None else ended_at) - started_at) * 1000)
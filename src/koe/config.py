@@ -10,22 +10,47 @@ from typing import Final, Literal, TypedDict
 _XDG_DATA_HOME = Path(os.environ.get("XDG_DATA_HOME", Path.home() / ".local" / "share"))
 _DATA_DIR = _XDG_DATA_HOME / "koe"
 
+# XDG Base Directory: $XDG_RUNTIME_DIR for per-session sockets; /tmp when unset.
+_RUNTIME_DIR = Path(os.environ.get("XDG_RUNTIME_DIR", "/tmp"))
+
 
 class KoeConfig(TypedDict, total=True):
     hotkey_combo: str
     sample_rate: int
     audio_channels: int
     audio_format: Literal["float32"]
+    max_recording_seconds: int
+    spill_recording: bool
     whisper_model: str
-    whisper_device: Literal["cuda"]
+    whisper_device: Literal["auto", "cuda", "cpu"]
     whisper_compute_type: str
+    whisper_cpu_compute_type: str
+    whisper_cpu_workers: int
+    whisper_warm_up: bool
+    stream_transcription: bool
+    stream_window_seconds: float
+    stream_silence_seconds: float
+    vad_energy_threshold: float
+    vad_padding_seconds: float
+    stage_timing: bool
     paste_key_modifier: str
     paste_key: str
     lock_file_path: Path
     temp_dir: Path
+    audio_archive_dir: Path | None
     data_dir: Path
     usage_log_path: Path
     transcription_log_path: Path
+    log_rotate_bytes: int
+    log_rotate_days: int
+    transcription_history: bool
+    history_db_path: Path
+    stats_checkpoint_path: Path
+    stats_window_days: tuple[int, ...]
+    cuda_library_manifest_path: Path
+    daemon_socket_path: Path
+    control_socket_path: Path
+    zygote_socket_path: Path
 
 
 DEFAULT_CONFIG: Final[KoeConfig] = {
@@ -33,14 +58,36 @@ DEFAULT_CONFIG: Final[KoeConfig] = {
     "sample_rate": 16_000,
     "audio_channels": 1,
     "audio_format": "float32",
+    "max_recording_seconds": 300,
+    "spill_recording": False,
     "whisper_model": "base.en",
-    "whisper_device": "cuda",
+    "whisper_device": "auto",
     "whisper_compute_type": "float16",
+    "whisper_cpu_compute_type": "int8",
+    "whisper_cpu_workers": 1,
+    "whisper_warm_up": True,
+    "stream_transcription": True,
+    "stream_window_seconds": 8.0,
+    "stream_silence_seconds": 0.6,
+    "vad_energy_threshold": 0.01,
+    "vad_padding_seconds": 0.2,
+    "stage_timing": True,
     "paste_key_modifier": "ctrl",
     "paste_key": "v",
     "lock_file_path": Path("/tmp/koe.lock"),
     "temp_dir": Path("/tmp"),
+    "audio_archive_dir": None,
     "data_dir": _DATA_DIR,
     "usage_log_path": _DATA_DIR / "usage.jsonl",
     "transcription_log_path": _DATA_DIR / "transcriptions.jsonl",
+    "log_rotate_bytes": 8 * 1024 * 1024,
+    "log_rotate_days": 0,
+    "transcription_history": False,
+    "history_db_path": _DATA_DIR / "history.sqlite3",
+    "stats_checkpoint_path": _DATA_DIR / "stats-checkpoint.json",
+    "stats_window_days": (1, 7, 30),
+    "cuda_library_manifest_path": _DATA_DIR / "cuda-libraries.json",
+    "daemon_socket_path": _RUNTIME_DIR / "koe-daemon.sock",
+    "control_socket_path": _RUNTIME_DIR / "koe-control.sock",
+    "zygote_socket_path": _RUNTIME_DIR / "koe-zygote.sock",
 }
@@ -0,0 +1,195 @@
+"""Control channel between a recording koe instance and later invocations.
+
+The instance holding the lock listens on a Unix socket under
+$XDG_RUNTIME_DIR. Another invocation connects, sends one JSON command line
+(toggle, stop, cancel or status) and reads back one JSON acknowledgement line.
+What a command does is up to the handler the instance serves with. The
+exchange finds the instance by its socket rather than by PID, so it cannot
+signal a recycled PID, and the caller learns whether the command landed.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sys
+from contextlib import suppress
+from threading import Event, Thread
+from typing import TYPE_CHECKING, TypedDict, cast
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+    from koe.config import KoeConfig
+    from koe.types import ControlCommand, ControlReply, ExitCode, Result
+
+_CONNECT_TIMEOUT_SECONDS = 0.5
+_ACCEPT_POLL_SECONDS = 0.25
+_MAX_MESSAGE_BYTES = 4096
+_CONTROL_COMMANDS: frozenset[str] = frozenset({"toggle", "stop", "cancel", "status"})
+_CONTROL_STATES: frozenset[str] = frozenset({"idle", "recording", "processing"})
+
+# Answers one parsed command; None stands for a request that did not parse.
+type ControlHandler = Callable[[ControlCommand | None], ControlReply]
+
+
+class ControlServer(TypedDict):
+    listener: socket.socket
+    thread: Thread
+    shutdown: Event
+    socket_path: Path
+
+
+def run_control_command(config: KoeConfig, command: ControlCommand, /) -> ExitCode:
+    """Send command to the recording instance and print what it reported."""
+    reply = send_control_command(config["control_socket_path"], command)
+    if reply is None:
+        print("koe: no recording instance", file=sys.stderr)
+        return 1
+    print(f"{reply['state']} pid={reply['pid']}")
+    return 0 if reply["ok"] else 1
+
+
+def send_control_command(socket_path: Path, command: ControlCommand, /) -> ControlReply | None:
+    """Deliver command to the recording instance; None when no instance is listening."""
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with client:
+        try:
+            client.settimeout(_CONNECT_TIMEOUT_SECONDS)
+            client.connect(str(socket_path))
+            client.sendall(f"{json.dumps({'command': command})}\n".encode())
+            reply = _receive_line(client)
+        except OSError:
+            return None
+    return _parse_reply(reply)
+
+
+def start_control_server(
+    socket_path: Path, /, *, handler: ControlHandler
+) -> Result[ControlServer, str]:
+    """Bind the control socket and answer commands on a background thread.
+
+    The caller must hold the instance lock: any socket file already at
+    socket_path was left by a dead instance and is replaced.
+    """
+    with suppress(FileNotFoundError):
+        socket_path.unlink()
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        listener.bind(str(socket_path))
+        os.chmod(socket_path, 0o600)
+        listener.listen()
+    except OSError as error:
+        listener.close()
+        return {"ok": False, "error": f"unable to bind {socket_path}: {error}"}
+    listener.settimeout(_ACCEPT_POLL_SECONDS)
+
+    shutdown = Event()
+    thread = Thread(
+        target=_serve_control_commands,
+        args=(listener, shutdown, handler),
+        name="koe-control",
+        daemon=True,
+    )
+    thread.start()
+    return {
+        "ok": True,
+        "value": {
+            "listener": listener,
+            "thread": thread,
+            "shutdown": shutdown,
+            "socket_path": socket_path,
+        },
+    }
+
+
+def stop_control_server(server: ControlServer, /) -> None:
+    """Stop answering commands and remove the socket; never raises."""
+    server["shutdown"].set()
+    server["thread"].join(timeout=_ACCEPT_POLL_SECONDS * 4)
+    server["listener"].close()
+    with suppress(OSError):
+        server["socket_path"].unlink()
+
+
+def recording_command_handler(stop_event: Event, cancel_event: Event, /) -> ControlHandler:
+    """Handler for a single recording: toggle and stop end it, cancel also discards it."""
+    return lambda command: _apply_command(command, stop_event, cancel_event)
+
+
+def _serve_control_commands(
+    listener: socket.socket, shutdown: Event, handler: ControlHandler, /
+) -> None:
+    while not shutdown.is_set():
+        try:
+            connection, _address = listener.accept()
+        except TimeoutError:
+            continue
+        except OSError:
+            return
+
+        with connection:
+            connection.settimeout(_CONNECT_TIMEOUT_SECONDS)
+            with suppress(OSError):
+                request = _parse_request(_receive_line(connection))
+                reply = handler(request)
+                connection.sendall(f"{json.dumps(reply)}\n".encode())
+
+
+def _apply_command(
+    command: ControlCommand | None, stop_event: Event, cancel_event: Event, /
+) -> ControlReply:
+    # The state reported is the one the command found, before it took effect.
+    state = "processing" if stop_event.is_set() else "recording"
+    match command:
+        case "toggle" | "stop":
+            stop_event.set()
+        case "cancel":
+            cancel_event.set()
+            stop_event.set()
+        case "status":
+            pass
+        case None:
+            return {"ok": False, "state": state, "pid": os.getpid()}
+    return {"ok": True, "state": state, "pid": os.getpid()}
+
+
+def _receive_line(connection: socket.socket, /) -> bytes:
+    buffer = bytearray()
+    while b"\n" not in buffer and len(buffer) <= _MAX_MESSAGE_BYTES:
+        chunk = connection.recv(_MAX_MESSAGE_BYTES)
+        if not chunk:
+            break
+        buffer.extend(chunk)
+    return bytes(buffer).split(b"\n", 1)[0]
+
+
+def _parse_request(line: bytes, /) -> ControlCommand | None:
+    try:
+        request = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(request, dict):
+        return None
+    command = cast("dict[str, object]", request).get("command")
+    if command not in _CONTROL_COMMANDS:
+        return None
+    return cast("ControlCommand", command)
+
+
+def _parse_reply(line: bytes, /) -> ControlReply | None:
+    try:
+        reply = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(reply, dict):
+        return None
+    fields = cast("dict[str, object]", reply)
+    ok, state, pid = fields.get("ok"), fields.get("state"), fields.get("pid")
+    if not isinstance(ok, bool) or state not in _CONTROL_STATES:
+        return None
+    if not isinstance(pid, int):
+        return None
+    return cast("ControlReply", fields)
@@ -0,0 +1,287 @@
+"""Resident transcription daemon and its hotkey-client counterpart.
+
+The daemon loads and warms the WhisperModel once and serves transcription jobs
+over a Unix domain socket, so short-lived hotkey invocations skip model load.
+Each connection carries one JSON request line, optionally followed by raw
+float32 sample bytes, and one JSON response line. A {"status": true} request
+answers readiness without running inference.
+"""
+
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import signal
+import socket
+import sys
+from contextlib import suppress
+from pathlib import Path
+from threading import Event
+from typing import TYPE_CHECKING, cast
+
+from koe.transcribe import (
+    load_whisper_model,
+    transcribe_file_in_windows,
+    transcribe_with_model,
+    warm_up_model,
+)
+from koe.types import AudioArtifactPath
+
+if TYPE_CHECKING:
+    from types import FrameType
+
+    from koe.config import KoeConfig
+    from koe.transcribe import TranscriptionModel
+    from koe.types import AudioSamples, ExitCode, Result, TranscriptionResult
+
+_CONNECT_TIMEOUT_SECONDS = 0.5
+_ACCEPT_POLL_SECONDS = 0.5
+_MAX_MESSAGE_BYTES = 1 << 20
+
+
+def run_daemon(config: KoeConfig, /) -> ExitCode:
+    """Load the model once, then serve transcription requests until signalled."""
+    listener_result = bind_daemon_socket(config["daemon_socket_path"])
+    if listener_result["ok"] is False:
+        print(f"koe daemon: {listener_result['error']}", file=sys.stderr)
+        return 1
+
+    listener = listener_result["value"]
+    shutdown_event = Event()
+
+    def _handle_shutdown(_signum: int, _frame: FrameType | None) -> None:
+        shutdown_event.set()
+
+    signal.signal(signal.SIGTERM, _handle_shutdown)
+    signal.signal(signal.SIGINT, _handle_shutdown)
+
+    try:
+        model_result = load_whisper_model(config)
+        if model_result["ok"] is False:
+            print(f"koe daemon: {model_result['error']['message']}", file=sys.stderr)
+            return 1
+
+        model = model_result["value"]
+        if config["whisper_warm_up"]:
+            warm_up = warm_up_model(model)
+            if warm_up["ok"] is False:
+                print(f"koe daemon: {warm_up['error']['message']}", file=sys.stderr)
+                return 1
+
+        # Connections queued during load and warm-up are served from here on.
+        serve_transcription_requests(listener, model, shutdown_event)
+    finally:
+        listener.close()
+        with suppress(OSError):
+            config["daemon_socket_path"].unlink()
+    return 0
+
+
+def bind_daemon_socket(socket_path: Path, /) -> Result[socket.socket, str]:
+    """Bind the daemon listener, replacing a stale socket left by a dead daemon."""
+    if socket_path.exists():
+        if _is_daemon_listening(socket_path):
+            return {"ok": False, "error": f"another daemon is listening on {socket_path}"}
+        with suppress(OSError):
+            socket_path.unlink()
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        listener.bind(str(socket_path))
+        os.chmod(socket_path, 0o600)
+        listener.listen()
+    except OSError as error:
+        listener.close()
+        return {"ok": False, "error": f"unable to bind {socket_path}: {error}"}
+
+    listener.settimeout(_ACCEPT_POLL_SECONDS)
+    return {"ok": True, "value": listener}
+
+
+def serve_transcription_requests(
+    listener: socket.socket, model: TranscriptionModel, shutdown_event: Event, /
+) -> None:
+    """Serve one request per connection, sequentially, until shutdown is requested."""
+    while not shutdown_event.is_set():
+        try:
+            connection, _address = listener.accept()
+        except TimeoutError:
+            continue
+        except OSError:
+            if shutdown_event.is_set():
+                return
+            continue
+
+        with connection:
+            connection.settimeout(None)
+            _handle_connection(connection, model)
+
+
+def is_daemon_running(config: KoeConfig, /) -> bool:
+    """Return True when a daemon is accepting connections on the configured socket."""
+    return _is_daemon_listening(config["daemon_socket_path"])
+
+
+def is_daemon_ready(config: KoeConfig, /) -> bool:
+    """Return True when a daemon has finished loading and warming its model.
+
+    A daemon still loading accepts connections but answers nothing until it
+    starts serving, so the status reply times out and this returns False.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with client:
+        try:
+            client.settimeout(_CONNECT_TIMEOUT_SECONDS)
+            client.connect(str(config["daemon_socket_path"]))
+            _send_message(client, {"status": True})
+            payload, _body = _receive_message(client)
+        except OSError:
+            return False
+    return payload is not None and payload.get("ready") is True
+
+
+def request_daemon_transcription(
+    audio: AudioArtifactPath | AudioSamples, config: KoeConfig, /, *, windowed: bool = False
+) -> TranscriptionResult | None:
+    """Ask a running daemon to transcribe a WAV artifact or in-memory samples.
+
+    windowed asks the daemon to read a WAV artifact in bounded windows. Returns
+    None when no daemon is reachable or the exchange fails, so the caller can
+    fall back to in-process transcription.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with client:
+        try:
+            client.settimeout(_CONNECT_TIMEOUT_SECONDS)
+            client.connect(str(config["daemon_socket_path"]))
+            client.settimeout(None)
+            if isinstance(audio, Path):
+                _send_message(client, {"artifact_path": str(audio), "windowed": windowed})
+            else:
+                sample_bytes = audio.tobytes()
+                _send_message(client, {"sample_bytes": len(sample_bytes)})
+                client.sendall(sample_bytes)
+            payload, _body = _receive_message(client)
+        except OSError:
+            return None
+
+    if payload is None:
+        return None
+    return _parse_transcription_result(payload)
+
+
+def _handle_connection(connection: socket.socket, model: TranscriptionModel, /) -> None:
+    try:
+        request, body = _receive_message(connection)
+        if request is None:
+            return
+        if request.get("status") is True:
+            _send_message(connection, {"ready": True})
+            return
+        audio = _request_audio(connection, request, body)
+    except OSError:
+        return
+
+    if audio is None:
+        response: TranscriptionResult = {
+            "kind": "error",
+            "error": {
+                "category": "transcription",
+                "message": "daemon rejected malformed request",
+                "cuda_available": True,
+            },
+        }
+    elif isinstance(audio, Path) and request.get("windowed") is True:
+        response = transcribe_file_in_windows(model, audio)
+    else:
+        response = transcribe_with_model(model, audio)
+
+    with suppress(OSError):
+        _send_message(connection, response)
+
+
+def _request_audio(
+    connection: socket.socket, request: dict[str, object], body: bytes, /
+) -> AudioArtifactPath | AudioSamples | None:
+    artifact_path = request.get("artifact_path")
+    if isinstance(artifact_path, str):
+        return AudioArtifactPath(Path(artifact_path))
+
+    sample_bytes = request.get("sample_bytes")
+    if not isinstance(sample_bytes, int) or sample_bytes <= 0 or sample_bytes % 4 != 0:
+        return None
+
+    payload = bytearray(body)
+    while len(payload) < sample_bytes:
+        chunk = connection.recv(min(sample_bytes - len(payload), 1 << 16))
+        if not chunk:
+            return None
+        payload.extend(chunk)
+
+    np = importlib.import_module("numpy")
+    return cast("AudioSamples", np.frombuffer(bytes(payload[:sample_bytes]), dtype=np.float32))
+
+
+def _send_message(connection: socket.socket, message: object, /) -> None:
+    connection.sendall(f"{json.dumps(message)}\n".encode())
+
+
+def _receive_message(connection: socket.socket, /) -> tuple[dict[str, object] | None, bytes]:
+    """Read one JSON header line; also return any bytes already read past it."""
+    buffer = bytearray()
+    while b"\n" not in buffer:
+        chunk = connection.recv(4096)
+        if not chunk:
+            return (None, b"")
+        buffer.extend(chunk)
+        if len(buffer) > _MAX_MESSAGE_BYTES:
+            return (None, b"")
+
+    line, body = bytes(buffer).split(b"\n", 1)
+    try:
+        payload = json.loads(line)
+    except json.JSONDecodeError:
+        return (None, b"")
+    if not isinstance(payload, dict):
+        return (None, b"")
+    return (cast("dict[str, object]", payload), body)
+
+
+def _parse_transcription_result(payload: dict[str, object], /) -> TranscriptionResult | None:
+    match payload.get("kind"):
+        case "text":
+            text = payload.get("text")
+            if isinstance(text, str):
+                return {"kind": "text", "text": text}
+        case "empty":
+            return {"kind": "empty"}
+        case "error":
+            error = payload.get("error")
+            if isinstance(error, dict):
+                error_fields = cast("dict[str, object]", error)
+                message = error_fields.get("message")
+                cuda_available = error_fields.get("cuda_available")
+                if isinstance(message, str) and isinstance(cuda_available, bool):
+                    return {
+                        "kind": "error",
+                        "error": {
+                            "category": "transcription",
+                            "message": message,
+                            "cuda_available": cuda_available,
+                        },
+                    }
+        case _:
+            return None
+    return None
+
+
+def _is_daemon_listening(socket_path: Path, /) -> bool:
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with probe:
+        probe.settimeout(_CONNECT_TIMEOUT_SECONDS)
+        try:
+            probe.connect(str(socket_path))
+        except OSError:
+            return False
+    return True
@@ -0,0 +1,355 @@
+"""Minimal D-Bus client speaking to the session bus's Unix socket directly.
+
+Koe only calls methods and reads their replies, so this implements just that
+part of the wire protocol: EXTERNAL authentication, the Hello handshake, and
+marshalling of the basic, array, struct, dict-entry and variant types. No
+D-Bus binding has to be installed, and one connection serves every call.
+
+Values map onto Python as follows: integers and floats as themselves, strings,
+object paths and signatures as str, arrays as list (dict for arrays of dict
+entries), structs as tuple, and variants as a (signature, value) pair.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import socket
+import struct
+from contextlib import suppress
+from pathlib import Path
+from typing import TYPE_CHECKING, TypedDict, cast
+from urllib.parse import unquote
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
+    from koe.types import Result
+
+METHOD_CALL, METHOD_RETURN, ERROR, SIGNAL = 1, 2, 3, 4
+FIELD_PATH, FIELD_INTERFACE, FIELD_MEMBER, FIELD_ERROR_NAME = 1, 2, 3, 4
+FIELD_REPLY_SERIAL, FIELD_DESTINATION, FIELD_SENDER, FIELD_SIGNATURE = 5, 6, 7, 8
+
+_PROTOCOL_VERSION = 1
+_FIXED_FORMATS: dict[str, str] = {
+    "y": "B",
+    "b": "I",
+    "n": "h",
+    "q": "H",
+    "i": "i",
+    "u": "I",
+    "x": "q",
+    "t": "Q",
+    "d": "d",
+}
+_ALIGNMENT: dict[str, int] = {
+    **{code: struct.calcsize(fmt) for code, fmt in _FIXED_FORMATS.items()},
+    "s": 4,
+    "o": 4,
+    "g": 1,
+    "v": 1,
+    "a": 4,
+    "(": 8,
+    "{": 8,
+}
+_ENDIANNESS: dict[bytes, str] = {b"l": "<", b"B": ">"}
+_MAX_MESSAGE_BYTES = 1 << 27
+# What malformed or truncated wire data raises while being decoded.
+_DECODE_ERRORS = (ValueError, IndexError, KeyError, TypeError, struct.error)
+
+
+class BusConnection(TypedDict):
+    socket: socket.socket
+    serials: Iterator[int]
+    unique_name: str
+
+
+class Message(TypedDict):
+    kind: int
+    serial: int
+    fields: dict[int, object]
+    body: list[object]
+
+
+def session_bus_address() -> str | None:
+    """Socket address of the session bus, abstract ones with a leading NUL; None if unset.
+
+    Reads DBUS_SESSION_BUS_ADDRESS, else the $XDG_RUNTIME_DIR/bus socket that
+    systemd sessions provide.
+    """
+    address = os.environ.get("DBUS_SESSION_BUS_ADDRESS")
+    if address is None:
+        runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+        bus = Path(runtime_dir) / "bus" if runtime_dir else None
+        return str(bus) if bus is not None and bus.exists() else None
+
+    for entry in address.split(";"):
+        transport, _separator, parameters = entry.partition(":")
+        if transport != "unix":
+            continue
+        options: dict[str, str] = {}
+        for option in parameters.split(","):
+            key, _separator, value = option.partition("=")
+            options[key] = unquote(value)
+        if "path" in options:
+            return options["path"]
+        if "abstract" in options:
+            return "\0" + options["abstract"]
+    return None
+
+
+def connect_session_bus(*, timeout: float) -> Result[BusConnection, str]:
+    """Open, authenticate and register a session bus connection."""
+    address = session_bus_address()
+    if address is None:
+        return {"ok": False, "error": "no session bus address"}
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.settimeout(timeout)
+        client.connect(address)
+        _authenticate(client)
+    except OSError as error:
+        client.close()
+        return {"ok": False, "error": f"unable to reach the session bus: {error}"}
+
+    connection: BusConnection = {"socket": client, "serials": itertools.count(1), "unique_name": ""}
+    hello = call_method(
+        connection,
+        destination="org.freedesktop.DBus",
+        path="/org/freedesktop/DBus",
+        interface="org.freedesktop.DBus",
+        member="Hello",
+    )
+    if hello["ok"] is False:
+        client.close()
+        return hello
+    name = hello["value"][0] if hello["value"] else None
+    connection["unique_name"] = name if isinstance(name, str) else ""
+    return {"ok": True, "value": connection}
+
+
+def close_connection(connection: BusConnection, /) -> None:
+    """Close the connection's socket; swallow cleanup failures."""
+    with suppress(OSError):
+        connection["socket"].close()
+
+
+def call_method(  # noqa: PLR0913 - mirrors the header fields of a method call
+    connection: BusConnection,
+    /,
+    *,
+    destination: str,
+    path: str,
+    interface: str,
+    member: str,
+    signature: str = "",
+    body: Sequence[object] = (),
+) -> Result[list[object], str]:
+    """Call a method and wait for its reply body, skipping unrelated messages."""
+    serial = next(connection["serials"])
+    fields: dict[int, tuple[str, object]] = {
+        FIELD_PATH: ("o", path),
+        FIELD_INTERFACE: ("s", interface),
+        FIELD_MEMBER: ("s", member),
+        FIELD_DESTINATION: ("s", destination),
+    }
+    try:
+        connection["socket"].sendall(
+            encode_message(METHOD_CALL, serial, fields, signature=signature, body=body)
+        )
+        while True:
+            reply = receive_message(connection["socket"])
+            if reply["fields"].get(FIELD_REPLY_SERIAL) == serial:
+                break
+    except OSError as error:
+        return {"ok": False, "error": f"{interface}.{member} failed: {error}"}
+    except _DECODE_ERRORS as error:
+        return {"ok": False, "error": f"{interface}.{member} got a malformed reply: {error}"}
+
+    if reply["kind"] == ERROR:
+        name = reply["fields"].get(FIELD_ERROR_NAME, "unknown error")
+        detail = reply["body"][0] if reply["body"] else ""
+        return {"ok": False, "error": f"{interface}.{member} failed: {name}: {detail}".rstrip()}
+    return {"ok": True, "value": reply["body"]}
+
+
+def encode_message(
+    kind: int,
+    serial: int,
+    fields: dict[int, tuple[str, object]],
+    /,
+    *,
+    signature: str = "",
+    body: Sequence[object] = (),
+) -> bytes:
+    """Marshal one little-endian message; fields maps header codes to variants."""
+    encoded_body = bytearray()
+    for type_code, value in zip(_complete_types(signature), body, strict=True):
+        _marshal(encoded_body, type_code, value)
+    if signature:
+        fields = {**fields, FIELD_SIGNATURE: ("g", signature)}
+
+    header = bytearray(
+        struct.pack("<cBBBII", b"l", kind, 0, _PROTOCOL_VERSION, len(encoded_body), serial)
+    )
+    _marshal(header, "a(yv)", sorted(fields.items()))
+    _pad(header, 8)
+    return bytes(header + encoded_body)
+
+
+def receive_message(client: socket.socket, /) -> Message:
+    """Read and decode the next message; raises OSError or a decoding error."""
+    fixed = _receive_exactly(client, 16)
+    endian = _ENDIANNESS[fixed[:1]]
+    kind, _flags, _version, body_length, serial, fields_length = struct.unpack_from(
+        endian + "BBBIII", fixed, 1
+    )
+    header_length = _aligned(16 + fields_length, 8)
+    if header_length + body_length > _MAX_MESSAGE_BYTES:
+        raise ValueError("message exceeds the protocol size limit")
+    data = fixed + _receive_exactly(client, header_length - 16 + body_length)
+
+    raw_fields, _offset = _unmarshal(data, 12, "a(yv)", endian)
+    fields = {
+        code: value
+        for code, (_signature, value) in cast("list[tuple[int, tuple[str, object]]]", raw_fields)
+    }
+    body: list[object] = []
+    offset = header_length
+    for type_code in _complete_types(cast("str", fields.get(FIELD_SIGNATURE, ""))):
+        value, offset = _unmarshal(data, offset, type_code, endian)
+        body.append(value)
+    return {"kind": kind, "serial": serial, "fields": fields, "body": body}
+
+
+def _authenticate(client: socket.socket, /) -> None:
+    uid = str(os.getuid()).encode().hex()
+    client.sendall(f"\0AUTH EXTERNAL {uid}\r\n".encode())
+    reply = bytearray()
+    while not reply.endswith(b"\r\n"):
+        chunk = client.recv(256)
+        if not chunk:
+            raise ConnectionError("session bus closed during authentication")
+        reply.extend(chunk)
+    if not reply.startswith(b"OK "):
+        raise ConnectionError(f"session bus rejected authentication: {reply.decode().strip()}")
+    client.sendall(b"BEGIN\r\n")
+
+
+def _receive_exactly(client: socket.socket, size: int, /) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = client.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("session bus closed the connection")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def _complete_types(signature: str, /) -> list[str]:
+    """Split a signature into its complete types, such as "sa{sv}i" into s, a{sv}, i."""
+    types: list[str] = []
+    index = 0
+    while index < len(signature):
+        end = _type_end(signature, index)
+        types.append(signature[index:end])
+        index = end
+    return types
+
+
+def _type_end(signature: str, index: int, /) -> int:
+    code = signature[index]
+    if code == "a":
+        return _type_end(signature, index + 1)
+    if code in "({":
+        closing = ")" if code == "(" else "}"
+        index += 1
+        while signature[index] != closing:
+            index = _type_end(signature, index)
+        return index + 1
+    if code not in _ALIGNMENT:
+        raise ValueError(f"unsupported type code {code!r} in signature {signature!r}")
+    return index + 1
+
+
+def _aligned(offset: int, alignment: int, /) -> int:
+    return -(-offset // alignment) * alignment
+
+
+def _pad(buffer: bytearray, alignment: int, /) -> None:
+    buffer.extend(bytes(_aligned(len(buffer), alignment) - len(buffer)))
+
+
+def _marshal(buffer: bytearray, type_code: str, value: object, /) -> None:
+    code = type_code[0]
+    _pad(buffer, _ALIGNMENT[code])
+    if code in _FIXED_FORMATS:
+        buffer.extend(struct.pack("<" + _FIXED_FORMATS[code], value))
+    elif code in "so":
+        encoded = cast("str", value).encode()
+        buffer.extend(struct.pack("<I", len(encoded)) + encoded + b"\0")
+    elif code == "g":
+        encoded = cast("str", value).encode()
+        buffer.extend(bytes([len(encoded)]) + encoded + b"\0")
+    elif code == "v":
+        signature, inner = cast("tuple[str, object]", value)
+        _marshal(buffer, "g", signature)
+        _marshal(buffer, signature, inner)
+    elif code == "a":
+        element = type_code[1:]
+        length_offset = len(buffer)
+        buffer.extend(bytes(4))
+        # The length excludes the padding before the first element.
+        _pad(buffer, _ALIGNMENT[element[0]])
+        start = len(buffer)
+        items = (
+            cast("dict[object, object]", value).items()
+            if element[0] == "{"
+            else cast("Sequence[object]", value)
+        )
+        for item in items:
+            _marshal(buffer, element, item)
+        struct.pack_into("<I", buffer, length_offset, len(buffer) - start)
+    else:
+        members = _complete_types(type_code[1:-1])
+        for member, field in zip(members, cast("Sequence[object]", value), strict=True):
+            _marshal(buffer, member, field)
+
+
+def _unmarshal(  # noqa: PLR0911
+    data: bytes, offset: int, type_code: str, endian: str, /
+) -> tuple[object, int]:
+    code = type_code[0]
+    offset = _aligned(offset, _ALIGNMENT[code])
+    if code in _FIXED_FORMATS:
+        layout = endian + _FIXED_FORMATS[code]
+        return struct.unpack_from(layout, data, offset)[0], offset + struct.calcsize(layout)
+    if code in "so":
+        (length,) = struct.unpack_from(endian + "I", data, offset)
+        start = offset + 4
+        return data[start : start + length].decode(), start + length + 1
+    if code == "g":
+        length = data[offset]
+        return data[offset + 1 : offset + 1 + length].decode(), offset + length + 2
+    if code == "v":
+        signature, offset = _unmarshal(data, offset, "g", endian)
+        value, offset = _unmarshal(data, offset, cast("str", signature), endian)
+        return (signature, value), offset
+    if code == "a":
+        (length,) = struct.unpack_from(endian + "I", data, offset)
+        element = type_code[1:]
+        offset = _aligned(offset + 4, _ALIGNMENT[element[0]])
+        end = offset + length
+        items: list[object] = []
+        while offset < end:
+            item, offset = _unmarshal(data, offset, element, endian)
+            items.append(item)
+        if element[0] == "{":
+            return dict(cast("list[tuple[object, object]]", items)), offset
+        return items, offset
+
+    fields: list[object] = []
+    for member in _complete_types(type_code[1:-1]):
+        value, offset = _unmarshal(data, offset, member, endian)
+        fields.append(value)
+    return tuple(fields), offset
@@ -0,0 +1,223 @@
+"""Optional SQLite transcription history with an FTS5 full-text index.
+
+The database runs in WAL mode so `koe history search` never blocks a hotkey
+run writing its transcript. An external-content FTS5 table indexes the text,
+kept in sync by triggers, so ranked search stays fast at hundreds of
+thousands of rows without storing the text twice.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import sys
+from contextlib import closing, suppress
+from datetime import UTC, datetime
+from itertools import batched
+from typing import TYPE_CHECKING, TypedDict
+
+from koe.usage_log import ensure_data_dir, iter_log_lines, shared_log_lock
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+    from koe.config import KoeConfig
+    from koe.types import ExitCode, Result
+
+_IMPORT_BATCH_SIZE = 1_000
+_SEARCH_LIMIT = 20
+_SNIPPET_TOKENS = 12
+
+_SCHEMA_VERSION = 1
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcriptions (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL UNIQUE,
+    text TEXT NOT NULL,
+    word_count INTEGER NOT NULL,
+    window_title TEXT,
+    audio_seconds REAL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS transcriptions_fts USING fts5(
+    text, content='transcriptions', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS transcriptions_ai AFTER INSERT ON transcriptions BEGIN
+    INSERT INTO transcriptions_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS transcriptions_ad AFTER DELETE ON transcriptions BEGIN
+    INSERT INTO transcriptions_fts(transcriptions_fts, rowid, text)
+    VALUES ('delete', old.id, old.text);
+END;
+"""
+
+_INSERT = """
+INSERT OR IGNORE INTO transcriptions (timestamp, text, word_count, window_title, audio_seconds)
+VALUES (?, ?, ?, ?, ?)
+"""
+
+_SEARCH = """
+SELECT t.timestamp, t.window_title, snippet(transcriptions_fts, 0, '[', ']', '...', ?)
+FROM transcriptions_fts
+JOIN transcriptions AS t ON t.id = transcriptions_fts.rowid
+WHERE transcriptions_fts MATCH ?
+ORDER BY rank
+LIMIT ?
+"""
+
+type _HistoryRow = tuple[str, str, int, str | None, float | None]
+
+
+class HistoryMatch(TypedDict):
+    timestamp: str
+    window_title: str | None
+    snippet: str
+
+
+def run_history_search(config: KoeConfig, query: str, /) -> ExitCode:
+    """Print the best-ranked transcripts matching every word of query."""
+    search_result = search_history(config["history_db_path"], query)
+    if search_result["ok"] is False:
+        print(f"koe history: {search_result['error']}", file=sys.stderr)
+        return 1
+    for match in search_result["value"]:
+        print(f"{match['timestamp']}  [{match['window_title'] or '-'}]  {match['snippet']}")
+    return 0
+
+
+def run_history_import(config: KoeConfig, /) -> ExitCode:
+    """Load every record of the JSONL transcription log, rotated segments included."""
+    ensure_data_dir(config)
+    import_result = import_transcription_log(
+        config["history_db_path"], config["transcription_log_path"]
+    )
+    if import_result["ok"] is False:
+        print(f"koe history: {import_result['error']}", file=sys.stderr)
+        return 1
+    print(f"imported {import_result['value']} transcriptions")
+    return 0
+
+
+def record_transcription_history(
+    config: KoeConfig,
+    text: str,
+    /,
+    *,
+    timestamp: str | None,
+    window_title: str | None,
+    audio_seconds: float | None,
+) -> None:
+    """Insert one transcript into the history database and never raise.
+
+    Pass the JSONL record's timestamp so a later import recognises the row.
+    """
+    row: _HistoryRow = (
+        timestamp or datetime.now(UTC).isoformat(),
+        text,
+        len(text.split()),
+        window_title,
+        audio_seconds,
+    )
+    try:
+        with closing(open_history(config["history_db_path"])) as connection, connection:
+            connection.execute(_INSERT, row)
+    except (OSError, sqlite3.Error) as error:
+        print(f"transcription history write failed: {error}", file=sys.stderr)
+
+
+def open_history(db_path: Path, /) -> sqlite3.Connection:
+    """Connect, creating the schema and switching to WAL mode only on first use.
+
+    Both persist in the database file, tagged by user_version, so a later
+    connection only sets its own synchronous level before inserting.
+    """
+    # Transcripts are as private as the JSONL logs; SQLite gives the -wal and
+    # -shm files the database file's mode, so creating it 0600 covers all three.
+    os.close(os.open(db_path, os.O_CREAT | os.O_RDWR, 0o600))
+    connection = sqlite3.connect(db_path, timeout=5)
+    connection.execute("PRAGMA synchronous=NORMAL")
+    (schema_version,) = connection.execute("PRAGMA user_version").fetchone()
+    if schema_version != _SCHEMA_VERSION:
+        _restrict_to_owner(db_path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(f"{_SCHEMA}PRAGMA user_version={_SCHEMA_VERSION};")
+    return connection
+
+
+def search_history(
+    db_path: Path, query: str, /, *, limit: int = _SEARCH_LIMIT
+) -> Result[list[HistoryMatch], str]:
+    """Rank transcripts by BM25 against every word of query, best first."""
+    match_expression = _match_expression(query)
+    if match_expression == "":
+        return {"ok": False, "error": "search query is empty"}
+    if not db_path.exists():
+        return {"ok": False, "error": f"no history database at {db_path}"}
+    try:
+        with closing(open_history(db_path)) as connection:
+            rows = connection.execute(
+                _SEARCH, (_SNIPPET_TOKENS, match_expression, limit)
+            ).fetchall()
+    except (OSError, sqlite3.Error) as error:
+        return {"ok": False, "error": f"history search failed: {error}"}
+    return {
+        "ok": True,
+        "value": [
+            {"timestamp": timestamp, "window_title": window_title, "snippet": snippet}
+            for timestamp, window_title, snippet in rows
+        ],
+    }
+
+
+def import_transcription_log(db_path: Path, log_path: Path, /) -> Result[int, str]:
+    """Insert JSONL transcription records in batched transactions; reruns skip known rows.
+
+    Rotation waits until the import is done, so no record is skipped or read twice.
+    """
+    try:
+        with shared_log_lock(log_path), closing(open_history(db_path)) as connection:
+            before = _row_count(connection)
+            for batch in batched(_history_rows(log_path), _IMPORT_BATCH_SIZE):
+                with connection:
+                    connection.executemany(_INSERT, batch)
+            imported = _row_count(connection) - before
+    except (OSError, sqlite3.Error) as error:
+        return {"ok": False, "error": f"history import failed: {error}"}
+    return {"ok": True, "value": imported}
+
+
+def _restrict_to_owner(db_path: Path, /) -> None:
+    """Tighten a database, and any WAL files, created before history was private.
+
+    Such databases predate user_version, so this runs along with the schema.
+    """
+    for path in (
+        db_path,
+        db_path.with_name(f"{db_path.name}-wal"),
+        db_path.with_name(f"{db_path.name}-shm"),
+    ):
+        with suppress(FileNotFoundError):
+            if path.stat().st_mode & 0o077:
+                path.chmod(0o600)
+
+
+def _row_count(connection: sqlite3.Connection, /) -> int:
+    (count,) = connection.execute("SELECT count(*) FROM transcriptions").fetchone()
+    return count
+
+
+def _history_rows(log_path: Path, /) -> Iterator[_HistoryRow]:
+    for line in iter_log_lines(log_path):
+        try:
+            record = json.loads(line)
+            timestamp, text = record["timestamp"], record["text"]
+        except (ValueError, TypeError, KeyError):
+            continue
+        if isinstance(timestamp, str) and isinstance(text, str):
+            yield (timestamp, text, len(text.split()), None, None)
+
+
+def _match_expression(query: str, /) -> str:
+    """Quote each word so user input is matched literally rather than as FTS5 syntax."""
+    return " ".join(f'"{word.replace('"', '""')}"' for word in query.split())
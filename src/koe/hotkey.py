@@ -1,45 +1,39 @@
-"""Single-instance invocation guard and toggle signalling for the pipeline."""
+"""Single-instance invocation guard and the resident process's global hotkey.
+
+The guard is an exclusive flock on the lock file, held on a descriptor that
+stays open for the whole recording. The kernel drops it when the process
+exits, crash included, so a lock never outlives its owner and contention is
+one non-blocking syscall. The PID written into the file is only diagnostic.
+
+Toggling a running instance goes through koe.control instead. A resident
+`koe listen` process on X11 grabs hotkey_combo itself through pynput, which is
+imported only when that listener starts because it needs a reachable display.
+"""
 
 from __future__ import annotations
 
+import fcntl
+import importlib
 import os
-import signal
+from contextlib import suppress
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Protocol, cast
 
-from koe.types import AlreadyRunningError, HotkeyAction, InstanceLockHandle, Result
+from koe.types import AlreadyRunningError, InstanceLockHandle, Result
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     from koe.config import KoeConfig
 
+# Descriptors carrying held locks, keyed by lock file; closing one releases its lock.
+_held_locks: dict[Path, int] = {}
 
-def determine_hotkey_action(config: KoeConfig, /) -> tuple[HotkeyAction, int | None]:
-    """Determine whether this invocation should start or stop recording.
 
-    If no lock exists, this is a "start" (the caller should acquire the lock
-    and begin recording). If a lock exists with a live PID, this is a "stop"
-    (the caller should signal that PID and exit). Returns the action and the
-    PID to signal (only set for "stop").
-    """
-    lock_file = config["lock_file_path"]
-    pid = _read_lock_pid(lock_file)
-    if pid is not None and _is_process_alive(pid):
-        return ("stop", pid)
-    return ("start", None)
+class HotkeyListener(Protocol):
+    """Running pynput listener; stop() ungrabs the combo and ends its thread."""
 
-
-def signal_running_instance(pid: int, /) -> bool:
-    """Send SIGUSR1 to a running koe instance to stop recording.
-
-    Returns True if the signal was delivered, False if the process no longer exists.
-    """
-    try:
-        os.kill(pid, signal.SIGUSR1)
-    except ProcessLookupError:
-        return False
-    except PermissionError:
-        return False
-    return True
+    def stop(self) -> None: ...
 
 
 def _already_running_error(lock_file: Path, message: str) -> AlreadyRunningError:
@@ -66,62 +60,64 @@ def _read_lock_pid(lock_file: Path) -> int | None:
         return None
 
 
-def _is_process_alive(pid: int, /) -> bool:
-    try:
-        os.kill(pid, 0)
-    except ProcessLookupError:
-        return False
-    except PermissionError:
-        return True
-    return True
-
-
-def _try_break_stale_lock(lock_file: Path, /) -> bool:
-    pid = _read_lock_pid(lock_file)
-    if pid is None:
-        return False
-    if _is_process_alive(pid):
-        return False
-
-    try:
-        lock_file.unlink()
-    except OSError:
-        return False
-    return True
-
-
 def acquire_instance_lock(config: KoeConfig, /) -> Result[InstanceLockHandle, AlreadyRunningError]:
     """Acquire lockfile ownership token or return typed contention error."""
     lock_file = config["lock_file_path"]
     try:
-        with lock_file.open("x", encoding="utf-8") as handle:
-            handle.write(str(os.getpid()))
-    except FileExistsError:
-        if _try_break_stale_lock(lock_file):
-            return acquire_instance_lock(config)
+        file_descriptor = os.open(lock_file, os.O_CREAT | os.O_RDWR, 0o600)
+    except OSError:
         return {
             "ok": False,
-            "error": _already_running_error(
-                lock_file,
-                f"another koe instance is active; remove stale lock at {lock_file}"
-                " if this is unexpected",
-            ),
+            "error": _already_running_error(lock_file, "unable to acquire instance lock"),
         }
+
+    try:
+        fcntl.flock(file_descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
     except OSError:
+        os.close(file_descriptor)
         return {
             "ok": False,
-            "error": _already_running_error(lock_file, "unable to acquire instance lock"),
+            "error": _already_running_error(lock_file, "another koe instance is active"),
         }
 
+    os.ftruncate(file_descriptor, 0)
+    os.write(file_descriptor, str(os.getpid()).encode())
+    _held_locks[lock_file] = file_descriptor
     return {"ok": True, "value": InstanceLockHandle(lock_file)}
 
 
 def release_instance_lock(handle: InstanceLockHandle, /) -> None:
-    """Release a previously acquired lockfile token; swallow cleanup failures."""
-    lock_file = Path(handle)
-    try:
-        lock_file.unlink()
-    except FileNotFoundError:
-        return
-    except OSError:
+    """Release a previously acquired lockfile token; swallow cleanup failures.
+
+    The file itself stays: unlinking it would let a starter that opened the
+    old inode and one that creates a new file both win the lock.
+    """
+    file_descriptor = _held_locks.pop(Path(handle), None)
+    if file_descriptor is None:
         return
+    with suppress(OSError):
+        os.ftruncate(file_descriptor, 0)
+    os.close(file_descriptor)
+
+
+def start_hotkey_listener(
+    combo: str, on_activate: Callable[[], object], /
+) -> Result[HotkeyListener, str]:
+    """Grab combo system-wide and call on_activate on its listener thread per press."""
+    try:
+        keyboard = importlib.import_module("pynput.keyboard")
+    except ImportError as error:
+        # pynput raises ImportError itself when no X display is reachable.
+        return {"ok": False, "error": f"pynput keyboard backend unavailable: {error}"}
+
+    try:
+        listener = keyboard.GlobalHotKeys({pynput_hotkey(combo): on_activate})
+    except ValueError as error:
+        return {"ok": False, "error": f"invalid hotkey_combo {combo!r}: {error}"}
+    listener.start()
+    return {"ok": True, "value": cast("HotkeyListener", listener)}
+
+
+def pynput_hotkey(combo: str, /) -> str:
+    """Translate hotkey_combo into pynput syntax, which spells the super key <cmd>."""
+    return combo.replace("<super>", "<cmd>")
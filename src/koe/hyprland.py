@@ -0,0 +1,195 @@
+"""Hyprland IPC client speaking to the compositor's Unix sockets directly.
+
+Requests go to .socket.sock, one command per connection, as hyprctl itself
+does, so focus lookups and paste shortcuts cost a connect instead of a process
+launch. A resident process can also follow .socket2.sock, the event stream,
+and keep the active window current without asking for it at all.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+from contextlib import suppress
+from pathlib import Path
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, TypedDict, cast
+
+from koe.types import WindowId
+
+if TYPE_CHECKING:
+    from koe.types import FocusedWindow, FocusError, Result
+
+_REQUEST_TIMEOUT_SECONDS = 1.0
+_MAX_REPLY_BYTES = 1 << 20
+
+
+class ActiveWindow(TypedDict):
+    address: int | None
+    title: str
+
+
+# Active window as last announced on the event socket, while a tracker runs.
+_tracked_lock = Lock()
+_tracked: dict[str, ActiveWindow] = {}
+
+
+def hyprland_socket_dir() -> Path | None:
+    """Directory holding this session's IPC sockets; None outside Hyprland."""
+    signature = os.environ.get("HYPRLAND_INSTANCE_SIGNATURE")
+    if not signature:
+        return None
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        socket_dir = Path(runtime_dir) / "hypr" / signature
+        if socket_dir.exists():
+            return socket_dir
+    # Hyprland releases before 0.40 kept their sockets under /tmp.
+    legacy_dir = Path("/tmp/hypr") / signature
+    return legacy_dir if legacy_dir.exists() else None
+
+
+def hyprland_request(command: str, /) -> str | None:
+    """Send one hyprctl-style command and return the reply; None when unreachable."""
+    socket_dir = hyprland_socket_dir()
+    if socket_dir is None:
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with client:
+        try:
+            client.settimeout(_REQUEST_TIMEOUT_SECONDS)
+            client.connect(str(socket_dir / ".socket.sock"))
+            client.sendall(command.encode())
+            reply = bytearray()
+            while len(reply) <= _MAX_REPLY_BYTES:
+                chunk = client.recv(65536)
+                if not chunk:
+                    break
+                reply.extend(chunk)
+        except OSError:
+            return None
+    return reply.decode(errors="replace")
+
+
+def query_active_window() -> Result[FocusedWindow, FocusError] | None:
+    """Focused window from the event tracker, else over IPC; None when IPC is unavailable."""
+    with _tracked_lock:
+        tracked = _tracked.get("active")
+    if tracked is not None:
+        return _focused_window(tracked)
+
+    reply = hyprland_request("j/activewindow")
+    if reply is None:
+        return None
+    try:
+        payload = json.loads(reply)
+    except ValueError:
+        return {
+            "ok": False,
+            "error": {"category": "focus", "message": "invalid focused window payload"},
+        }
+    if not isinstance(payload, dict):
+        return {"ok": False, "error": {"category": "focus", "message": "no focused window"}}
+    fields = cast("dict[str, object]", payload)
+    address, title = fields.get("address"), fields.get("title")
+    return _focused_window(
+        {
+            "address": _parse_address(address) if isinstance(address, str) else None,
+            "title": title if isinstance(title, str) else "",
+        }
+    )
+
+
+def send_shortcut(shortcut: str, /) -> Result[None, str] | None:
+    """Dispatch sendshortcut (such as "SHIFT, Insert,"); None when IPC is unavailable."""
+    reply = hyprland_request(f"dispatch sendshortcut {shortcut}")
+    if reply is None:
+        return None
+    if reply.strip() != "ok":
+        return {"ok": False, "error": reply.strip() or "empty reply"}
+    return {"ok": True, "value": None}
+
+
+def start_active_window_tracker() -> bool:
+    """Follow focus changes on the event socket from now on; False when it is unreachable.
+
+    The first answer comes from a request, since events only announce changes.
+    """
+    socket_dir = hyprland_socket_dir()
+    if socket_dir is None:
+        return False
+    events = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        events.connect(str(socket_dir / ".socket2.sock"))
+    except OSError:
+        events.close()
+        return False
+
+    initial = query_active_window()
+    if initial is not None:
+        with _tracked_lock:
+            _tracked["active"] = (
+                {"address": int(initial["value"]["window_id"]), "title": initial["value"]["title"]}
+                if initial["ok"] is True
+                else {"address": None, "title": ""}
+            )
+    Thread(target=_follow_events, args=(events,), name="koe-hyprland", daemon=True).start()
+    return True
+
+
+def apply_event(active: ActiveWindow, line: str, /) -> ActiveWindow:
+    """Fold one event-socket line into the active window it describes."""
+    name, _separator, data = line.partition(">>")
+    match name:
+        case "activewindow":
+            # WINDOWCLASS,WINDOWTITLE: the class never contains a comma, the title may.
+            return {"address": active["address"], "title": data.partition(",")[2]}
+        case "activewindowv2":
+            return {"address": _parse_address(data), "title": active["title"]}
+        case "windowtitlev2":
+            address, _separator, title = data.partition(",")
+            if active["address"] is not None and _parse_address(address) == active["address"]:
+                return {"address": active["address"], "title": title}
+            return active
+        case _:
+            return active
+
+
+def _follow_events(events: socket.socket, /) -> None:
+    buffer = b""
+    with events:
+        while True:
+            try:
+                chunk = events.recv(65536)
+            except OSError:
+                break
+            if not chunk:
+                break
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            with _tracked_lock:
+                active = _tracked.get("active", {"address": None, "title": ""})
+                for line in lines:
+                    active = apply_event(active, line.decode(errors="replace"))
+                _tracked["active"] = active
+    # A stale answer is worse than a request, so stop answering from the cache.
+    with _tracked_lock:
+        _tracked.clear()
+
+
+def _focused_window(active: ActiveWindow, /) -> Result[FocusedWindow, FocusError]:
+    if active["address"] is None:
+        return {"ok": False, "error": {"category": "focus", "message": "no focused window"}}
+    return {
+        "ok": True,
+        "value": {"window_id": WindowId(active["address"]), "title": active["title"]},
+    }
+
+
+def _parse_address(address: str, /) -> int | None:
+    """Window address as sent by Hyprland, with or without 0x; None when empty or invalid."""
+    with suppress(ValueError):
+        window_id = int(address.removeprefix("0x"), 16)
+        return window_id or None
+    return None
@@ -2,12 +2,16 @@
 
 from __future__ import annotations
 
-import os
-import shutil
 import subprocess
 from typing import TYPE_CHECKING
 
+from koe.backend import session_backend, tool_command
+from koe.hyprland import send_shortcut
+from koe.stages import timed_stage
+from koe.x11 import send_paste_chord, set_clipboard_text
+
 if TYPE_CHECKING:
+    from koe.backend import Backend
     from koe.config import KoeConfig
     from koe.types import InsertionError, Result
 
@@ -26,11 +30,13 @@ def insert_transcript_text(
             ),
         }
 
-    write_result = write_clipboard_text(transcript_text, transcript_text)
+    with timed_stage("clipboard_write"):
+        write_result = write_clipboard_text(transcript_text, transcript_text)
     if write_result["ok"] is False:
         return write_result
 
-    paste_result = simulate_paste(config, transcript_text)
+    with timed_stage("paste"):
+        paste_result = simulate_paste(config, transcript_text)
     if paste_result["ok"] is False:
         return paste_result
 
@@ -44,12 +50,19 @@ def write_clipboard_text(text: str, transcript_text: str, /) -> Result[None, Ins
     keeping stdout AND stderr open indefinitely. subprocess.run waits for all
     pipes to close, so any PIPE on either fd will hang. Both must be DEVNULL.
     We lose stderr error detail on Wayland but gain a non-hanging process.
+
+    On X11 a resident process owns CLIPBOARD itself; xclip is the fallback.
     """
-    is_wayland = _is_wayland_session()
+    backend = session_backend()
+    if backend["clipboard"] == "xlib":
+        native_result = set_clipboard_text(text)
+        if native_result is not None and native_result["ok"] is True:
+            return native_result
+    is_wl_copy = backend["clipboard"] == "wl-copy"
     try:
-        if is_wayland:
+        if is_wl_copy:
             result = subprocess.run(
-                _clipboard_write_command(),
+                _clipboard_write_command(backend),
                 check=False,
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL,
@@ -58,7 +71,7 @@ def write_clipboard_text(text: str, transcript_text: str, /) -> Result[None, Ins
             )
         else:
             result = subprocess.run(
-                _clipboard_write_command(),
+                _clipboard_write_command(backend),
                 check=False,
                 capture_output=True,
                 text=True,
@@ -75,8 +88,8 @@ def write_clipboard_text(text: str, transcript_text: str, /) -> Result[None, Ins
         }
 
     if result.returncode != 0:
-        stderr_detail = "" if is_wayland else (result.stderr.strip() if result.stderr else "")
-        tool_name = "wl-copy" if is_wayland else "xclip"
+        stderr_detail = "" if is_wl_copy else (result.stderr.strip() if result.stderr else "")
+        tool_name = "wl-copy" if is_wl_copy else "xclip"
         return {
             "ok": False,
             "error": _insertion_error(
@@ -90,14 +103,20 @@ def write_clipboard_text(text: str, transcript_text: str, /) -> Result[None, Ins
 
 
 def simulate_paste(config: KoeConfig, transcript_text: str, /) -> Result[None, InsertionError]:
-    """Paste clipboard content into the focused input."""
-    if _is_wayland_session():
-        return _simulate_wayland_paste(config, transcript_text)
+    """Paste clipboard content into the focused input, through XTest when available."""
+    backend = session_backend()
+    if backend["session"] == "wayland":
+        return _simulate_wayland_paste(backend, transcript_text)
 
     key_chord = f"{config['paste_key_modifier']}+{config['paste_key']}"
+    if backend["paste"] == "xtest":
+        native_result = send_paste_chord(key_chord)
+        if native_result is not None and native_result["ok"] is True:
+            return native_result
+
     try:
         result = subprocess.run(
-            ["xdotool", "key", "--clearmodifiers", key_chord],
+            [tool_command(backend, "xdotool"), "key", "--clearmodifiers", key_chord],
             check=False,
             capture_output=True,
             text=True,
@@ -134,34 +153,29 @@ def _insertion_error(prefix: str, detail: str, transcript_text: str, /) -> Inser
     }
 
 
-def _is_wayland_session() -> bool:
-    backend_override = os.environ.get("KOE_BACKEND")
-    if backend_override == "wayland":
-        return True
-    if backend_override == "x11":
-        return False
-
-    return os.environ.get("XDG_SESSION_TYPE") == "wayland" and not bool(os.environ.get("DISPLAY"))
-
-
-def _clipboard_write_command() -> list[str]:
-    if _is_wayland_session() and shutil.which("wl-copy") is not None:
-        return ["wl-copy"]
-    return ["xclip", "-selection", "clipboard", "-in"]
+def _clipboard_write_command(backend: Backend, /) -> list[str]:
+    if backend["clipboard"] == "wl-copy":
+        return [tool_command(backend, "wl-copy")]
+    return [tool_command(backend, "xclip"), "-selection", "clipboard", "-in"]
 
 
 def _simulate_wayland_paste(
-    config: KoeConfig, transcript_text: str, /
+    backend: Backend, transcript_text: str, /
 ) -> Result[None, InsertionError]:
     """Simulate paste on Wayland using Shift+Insert (Omarchy universal paste).
 
     Shift+Insert is the universal paste shortcut that works in both terminals
     and GUI applications, matching Omarchy's clipboard.conf binding for SUPER+V.
+    The paste key config is not used for that reason.
     """
-    _ = config  # paste key config not used; Shift+Insert is universal
+    if backend["paste"] == "hyprland_ipc":
+        ipc_result = send_shortcut("SHIFT, Insert,")
+        if ipc_result is not None and ipc_result["ok"] is True:
+            return ipc_result
+
     try:
         result = subprocess.run(
-            ["hyprctl", "dispatch", "sendshortcut", "SHIFT, Insert,"],
+            [tool_command(backend, "hyprctl"), "dispatch", "sendshortcut", "SHIFT, Insert,"],
             check=False,
             capture_output=True,
             text=True,
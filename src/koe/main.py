@@ -4,68 +4,429 @@ from __future__ import annotations
 
 import importlib.util
 import os
-import shutil
 import signal
 import sys
 import time
+from concurrent.futures import Future
+from contextvars import copy_context
 from datetime import UTC, datetime
-from threading import Event
-from typing import TYPE_CHECKING, assert_never
+from functools import partial
+from queue import Queue
+from threading import Event, Lock, Thread
+from typing import TYPE_CHECKING, TypedDict, assert_never, cast
 
 from koe.audio import capture_audio, remove_audio_artifact
+from koe.backend import session_backend
+from koe.bench import run_benchmark, run_startup_benchmark
 from koe.config import DEFAULT_CONFIG, KoeConfig
-from koe.hotkey import (
-    acquire_instance_lock,
-    determine_hotkey_action,
-    release_instance_lock,
-    signal_running_instance,
+from koe.control import (
+    recording_command_handler,
+    run_control_command,
+    send_control_command,
+    start_control_server,
+    stop_control_server,
 )
+from koe.daemon import is_daemon_running, request_daemon_transcription, run_daemon
+from koe.history import record_transcription_history, run_history_import, run_history_search
+from koe.hotkey import acquire_instance_lock, release_instance_lock, start_hotkey_listener
+from koe.hyprland import start_active_window_tracker
 from koe.insert import insert_transcript_text
 from koe.notify import send_notification
-from koe.transcribe import transcribe_audio
+from koe.stages import (
+    add_stage_duration,
+    reset_stage_timings,
+    set_stage_timing,
+    stage_durations_ms,
+    stage_timing_scope,
+    timed_stage,
+)
+from koe.stats import run_stats
+from koe.transcribe import (
+    claim_load_metrics,
+    close_streaming_transcription,
+    finish_streaming_transcription,
+    model_ready,
+    start_model_load,
+    start_streaming_transcription,
+    submit_audio_window,
+    transcribe_audio,
+)
 from koe.usage_log import ensure_data_dir, write_transcription_record, write_usage_log_record
 from koe.window import check_focused_window, check_x11_context
+from koe.x11 import start_clipboard_owner
+from koe.zygote import request_zygote_session, run_zygote
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
     from types import FrameType
 
-    from koe.types import DependencyError, ExitCode, PipelineOutcome, Result
+    from koe.backend import ToolName
+    from koe.control import ControlHandler
+    from koe.transcribe import ModelLoad, StreamingTranscription
+    from koe.types import (
+        AudioArtifactPath,
+        AudioBuffer,
+        AudioCapture,
+        AudioSamples,
+        AudioSpill,
+        ControlCommand,
+        ControlReply,
+        DependencyError,
+        ExitCode,
+        FocusedWindow,
+        PipelineOutcome,
+        Result,
+        StageName,
+        TranscriptionResult,
+        UsageMetrics,
+    )
 
-# Module-level stop event set by SIGUSR1 handler during recording.
+# Module-level events set by the control channel while this instance records:
+# stop ends the capture, cancel additionally discards it.
 _stop_event = Event()
-
-
-def _handle_stop_signal(_signum: int, _frame: FrameType | None) -> None:
-    """SIGUSR1 handler: signal the recording loop to stop."""
-    _stop_event.set()
+_cancel_event = Event()
+
+# Module-level usage metrics filled in by a recording session and flushed by
+# run_logged, which empties the map again for the next session.
+_usage_metrics: UsageMetrics = {}
+
+
+class SessionJob(TypedDict):
+    """A stopped capture waiting for transcription and insertion."""
+
+    capture: AudioCapture | AudioBuffer | AudioSpill
+    window_title: str
+    stream: StreamingTranscription | None
+    model_load: ModelLoad | None
+    cancel_event: Event
+    metrics: UsageMetrics
+
+
+class QueuedSession(TypedDict):
+    job: SessionJob
+    invoked_at: str
+    started_at: float
+    stages: dict[StageName, float]
+
+
+class ResidentCapture(TypedDict):
+    thread: Thread
+    handler: ControlHandler
+    stop_event: Event
+
+
+def cli() -> None:
+    """Dispatch `koe` subcommands; a bare `koe` is the hotkey toggle."""
+    match sys.argv[1:]:
+        case []:
+            main()
+        case ["listen"]:
+            sys.exit(run_resident(DEFAULT_CONFIG))
+        case ["daemon"]:
+            sys.exit(run_daemon(DEFAULT_CONFIG))
+        case ["zygote"]:
+            ensure_data_dir(DEFAULT_CONFIG)
+            set_stage_timing(DEFAULT_CONFIG["stage_timing"])
+            sys.exit(run_zygote(DEFAULT_CONFIG, zygote_session))
+        case ["bench"]:
+            sys.exit(run_benchmark(DEFAULT_CONFIG))
+        case ["bench", "startup"]:
+            sys.exit(run_startup_benchmark(DEFAULT_CONFIG))
+        case ["cancel" | "status" as command]:
+            sys.exit(run_control_command(DEFAULT_CONFIG, command))
+        case ["stats"]:
+            sys.exit(run_stats(DEFAULT_CONFIG))
+        case ["history", "search", *terms] if terms:
+            sys.exit(run_history_search(DEFAULT_CONFIG, " ".join(terms)))
+        case ["history", "import"]:
+            sys.exit(run_history_import(DEFAULT_CONFIG))
+        case _:
+            print(
+                "usage: koe [listen|cancel|status|daemon|zygote|bench|bench startup|stats"
+                "|history search <query>|history import]",
+                file=sys.stderr,
+            )
+            sys.exit(2)
 
 
 def main() -> None:
+    # A parked zygote already holds the imports and PortAudio: hand it the press.
+    exit_code = request_zygote_session(DEFAULT_CONFIG)
+    if exit_code is not None:
+        sys.exit(exit_code)
     ensure_data_dir(DEFAULT_CONFIG)
+    set_stage_timing(DEFAULT_CONFIG["stage_timing"])
+    outcome = run_logged(DEFAULT_CONFIG, run_pipeline)
+    sys.exit(outcome_to_exit_code(outcome))
+
+
+def zygote_session() -> ExitCode:
+    """One hotkey press, run in a child forked from `koe zygote`."""
+    return outcome_to_exit_code(run_logged(DEFAULT_CONFIG, run_pipeline))
+
+
+def run_logged(
+    config: KoeConfig, pipeline: Callable[[KoeConfig], PipelineOutcome], /
+) -> PipelineOutcome:
+    """Run one invocation, append its usage record, then reset the per-run metrics."""
     invoked_at = datetime.now(UTC).isoformat()
     started_at = time.monotonic()
 
     try:
-        outcome = run_pipeline(DEFAULT_CONFIG)
+        outcome = pipeline(config)
     except Exception:
         outcome = "error_unexpected"
 
+    log_usage(config, outcome, invoked_at=invoked_at, started_at=started_at, metrics=_usage_metrics)
+    cast("dict[str, object]", _usage_metrics).clear()
+    reset_stage_timings()
+    return outcome
+
+
+def log_usage(
+    config: KoeConfig,
+    outcome: PipelineOutcome,
+    /,
+    *,
+    invoked_at: str,
+    started_at: float,
+    metrics: UsageMetrics,
+) -> None:
+    """Append the usage record of a run that began at started_at on the monotonic clock."""
     duration_ms = int((time.monotonic() - started_at) * 1000)
     write_usage_log_record(
-        DEFAULT_CONFIG,
+        config,
         outcome,
         invoked_at=invoked_at,
         duration_ms=duration_ms,
+        metrics=_with_stage_timings({**metrics}),
     )
-    sys.exit(outcome_to_exit_code(outcome))
+
+
+def run_resident(config: KoeConfig, /) -> ExitCode:
+    """`koe listen`: keep the lock and model resident and run sessions in-process.
+
+    On X11 hotkey_combo is grabbed here, so a press starts recording without
+    spawning an interpreter. Elsewhere the desktop binding keeps running a bare
+    `koe`, which reaches this process as a toggle over the control socket.
+    """
+    ensure_data_dir(config)
+    set_stage_timing(config["stage_timing"])
+    preflight = dependency_preflight(config)
+    if preflight["ok"] is False:
+        print(f"koe listen: {preflight['error']['message']}", file=sys.stderr)
+        return 1
+
+    lock_result = acquire_instance_lock(config)
+    if lock_result["ok"] is False:
+        print(f"koe listen: {lock_result['error']['message']}", file=sys.stderr)
+        return 1
+    lock_handle = lock_result["value"]
+
+    model_load = None if is_daemon_running(config) else start_model_load(config)
+    captures: list[ResidentCapture] = []
+    jobs: Queue[Future[QueuedSession | None] | None] = Queue()
+    handler = resident_command_handler(config, model_load, captures, jobs)
+    control_result = start_control_server(config["control_socket_path"], handler=handler)
+    if control_result["ok"] is False:
+        release_instance_lock(lock_handle)
+        print(f"koe listen: {control_result['error']}", file=sys.stderr)
+        return 1
+    control = control_result["value"]
+
+    listener = None
+    if session_backend()["session"] == "wayland":
+        # Without the event socket, each session asks Hyprland for focus instead.
+        start_active_window_tracker()
+    else:
+        # Without a display connection for the owner, insertion keeps using xclip.
+        start_clipboard_owner()
+        listener_result = start_hotkey_listener(config["hotkey_combo"], lambda: handler("toggle"))
+        if listener_result["ok"] is False:
+            stop_control_server(control)
+            release_instance_lock(lock_handle)
+            print(f"koe listen: {listener_result['error']}", file=sys.stderr)
+            return 1
+        listener = listener_result["value"]
+
+    # Captures stopped before the worker starts simply wait in jobs.
+    worker = Thread(target=process_session_jobs, args=(config, jobs), name="koe-sessions")
+    worker.start()
+    shutdown_event = Event()
+
+    def _handle_shutdown(_signum: int, _frame: FrameType | None) -> None:
+        shutdown_event.set()
+
+    signal.signal(signal.SIGTERM, _handle_shutdown)
+    signal.signal(signal.SIGINT, _handle_shutdown)
+    try:
+        shutdown_event.wait()
+    finally:
+        if listener is not None:
+            listener.stop()
+        stop_control_server(control)
+        # A recording in progress is discarded; stopped ones are still inserted.
+        # Every capture resolves its slot before the sentinel goes in behind them.
+        handler("cancel")
+        for capture in captures:
+            capture["thread"].join()
+        jobs.put(None)
+        worker.join()
+        release_instance_lock(lock_handle)
+    return 0
+
+
+def resident_command_handler(
+    config: KoeConfig,
+    model_load: ModelLoad | None,
+    captures: list[ResidentCapture],
+    jobs: Queue[Future[QueuedSession | None] | None],
+    /,
+) -> ControlHandler:
+    """Toggle starts a capture unless one is recording, even while earlier ones transcribe.
+
+    The live capture answers commands like a one-shot recording. Once stopped,
+    it only answers commands other than toggle until it resolves its slot in
+    jobs. Slots are queued at the press, so the single worker inserts
+    transcripts in press order even when a later capture finishes first.
+    captures keeps every capture still running, for shutdown to join.
+    The handler is called from the control and hotkey listener threads.
+    """
+    capture_lock = Lock()
+
+    def _handle(command: ControlCommand | None) -> ControlReply:
+        with capture_lock:
+            last = captures[-1] if captures else None
+            # A stopped capture still finishing (trimming, spill drain, queueing)
+            # keeps answering cancel and status, but a toggle starts the next one.
+            if (
+                last is not None
+                and last["thread"].is_alive()
+                and (command != "toggle" or not last["stop_event"].is_set())
+            ):
+                return last["handler"](command)
+            # Read before the new slot is queued: this reply reports the earlier sessions.
+            state = "processing" if jobs.unfinished_tasks > 0 else "idle"
+            if command == "toggle":
+                stop_event, cancel_event = Event(), Event()
+                slot: Future[QueuedSession | None] = Future()
+                thread = Thread(
+                    target=_capture_into_queue,
+                    args=(config, slot, model_load, stop_event, cancel_event),
+                    name="koe-capture",
+                )
+                captures[:] = [
+                    *(capture for capture in captures if capture["thread"].is_alive()),
+                    {
+                        "thread": thread,
+                        "handler": recording_command_handler(stop_event, cancel_event),
+                        "stop_event": stop_event,
+                    },
+                ]
+                jobs.put(slot)
+                thread.start()
+        return {"ok": command is not None, "state": state, "pid": os.getpid()}
+
+    return _handle
+
+
+def process_session_jobs(
+    config: KoeConfig, jobs: Queue[Future[QueuedSession | None] | None], /
+) -> None:
+    """Transcribe and insert queued captures one at a time until a None sentinel.
+
+    Each slot is awaited in turn; one resolved to None was already logged.
+    """
+    while (slot := jobs.get()) is not None:
+        queued = slot.result()
+        if queued is None:
+            jobs.task_done()
+            continue
+        with stage_timing_scope(queued["stages"]):
+            try:
+                outcome = process_session(config, queued["job"])
+            except Exception:
+                outcome = "error_unexpected"
+            log_usage(
+                config,
+                outcome,
+                invoked_at=queued["invoked_at"],
+                started_at=queued["started_at"],
+                metrics=queued["job"]["metrics"],
+            )
+        jobs.task_done()
+    jobs.task_done()
+
+
+def _capture_into_queue(
+    config: KoeConfig,
+    slot: Future[QueuedSession | None],
+    model_load: ModelLoad | None,
+    stop_event: Event,
+    cancel_event: Event,
+    /,
+) -> None:
+    invoked_at = datetime.now(UTC).isoformat()
+    started_at = time.monotonic()
+    stages: dict[StageName, float] = {}
+    metrics: UsageMetrics = {}
+    queued: QueuedSession | None = None
+    # The worker waits on this slot in press order, so it resolves however the capture ends.
+    try:
+        with stage_timing_scope(stages):
+            try:
+                job = capture_session(
+                    config,
+                    metrics,
+                    started_at=started_at,
+                    preflight=False,
+                    model_load=model_load,
+                    stop_event=stop_event,
+                    cancel_event=cancel_event,
+                )
+            except Exception:
+                job = "error_unexpected"
+            if isinstance(job, str):
+                log_usage(
+                    config, job, invoked_at=invoked_at, started_at=started_at, metrics=metrics
+                )
+            else:
+                queued = {
+                    "job": job,
+                    "invoked_at": invoked_at,
+                    "started_at": started_at,
+                    "stages": stages,
+                }
+    finally:
+        slot.set_result(queued)
+
+
+def _with_stage_timings(metrics: UsageMetrics, /) -> UsageMetrics:
+    """Attach recorded stage durations and, when derivable, the real-time factor."""
+    stages = stage_durations_ms()
+    if not stages:
+        return metrics
+    timed_metrics: UsageMetrics = {**metrics, "stages": stages}
+    audio_seconds = metrics.get("audio_seconds")
+    # inference adds up over every window; a daemon request means some of the
+    # audio was decoded elsewhere, so the in-process total would understate it.
+    if "inference" in stages and "daemon_transcription" not in stages and audio_seconds:
+        timed_metrics["real_time_factor"] = round(stages["inference"] / 1000 / audio_seconds, 3)
+    return timed_metrics
 
 
 def dependency_preflight(config: KoeConfig, /) -> Result[None, DependencyError]:  # noqa: PLR0911
     """Validate startup dependencies required before Section 3 handoff."""
-    required_tools = ["notify-send"]
-    if _is_wayland_session():
-        required_tools.extend(["hyprctl", "wl-copy", "wl-paste"])
-        if shutil.which("wtype") is None and shutil.which("hyprctl") is None:
+    backend = session_backend()
+    tools = backend["tools"]
+    required_tools: list[ToolName] = ["notify-send"]
+    if backend["session"] == "wayland":
+        required_tools.extend(["wl-copy", "wl-paste"])
+        # Focus and paste go over Hyprland IPC when its socket is there.
+        hyprland_ipc = backend["hyprland_socket_dir"] is not None
+        if not hyprland_ipc:
+            required_tools.append("hyprctl")
+        if not hyprland_ipc and tools["wtype"] is None and tools["hyprctl"] is None:
             return {
                 "ok": False,
                 "error": {
@@ -78,7 +439,7 @@ def dependency_preflight(config: KoeConfig, /) -> Result[None, DependencyError]:
         required_tools.extend(["xdotool", "xclip"])
 
     for tool in required_tools:
-        if shutil.which(tool) is None:
+        if tools.get(tool) is None:
             return {
                 "ok": False,
                 "error": {
@@ -88,12 +449,12 @@ def dependency_preflight(config: KoeConfig, /) -> Result[None, DependencyError]:
                 },
             }
 
-    if config["whisper_device"] != "cuda":
+    if config["whisper_device"] not in {"auto", "cuda", "cpu"}:
         return {
             "ok": False,
             "error": {
                 "category": "dependency",
-                "message": "whisper_device must be cuda",
+                "message": "whisper_device must be auto, cuda or cpu",
                 "missing_tool": "whisper_device",
             },
         }
@@ -133,50 +494,134 @@ def dependency_preflight(config: KoeConfig, /) -> Result[None, DependencyError]:
     return {"ok": True, "value": None}
 
 
-def _is_wayland_session() -> bool:
-    backend_override = os.environ.get("KOE_BACKEND")
-    if backend_override == "wayland":
-        return True
-    if backend_override == "x11":
-        return False
-
-    return os.environ.get("XDG_SESSION_TYPE") == "wayland" and not bool(os.environ.get("DISPLAY"))
-
-
-def run_pipeline(config: KoeConfig, /) -> PipelineOutcome:  # noqa: PLR0911
-    preflight = dependency_preflight(config)
-    if preflight["ok"] is False:
-        send_notification("error_dependency", preflight["error"])
-        return "error_dependency"
-
-    # Toggle logic: if another instance is recording, signal it to stop.
-    action, running_pid = determine_hotkey_action(config)
-    if action == "stop" and running_pid is not None:
-        signal_running_instance(running_pid)
+def run_pipeline(config: KoeConfig, /) -> PipelineOutcome:
+    # Toggle logic: a recording or resident instance acknowledges toggle on its
+    # control socket. Resolved before preflight so that path stays on stdlib-only work.
+    if send_control_command(config["control_socket_path"], "toggle") is not None:
         return "signaled_stop"
 
-    lock_result = acquire_instance_lock(config)
+    started_at = time.monotonic()
+    with timed_stage("lock"):
+        lock_result = acquire_instance_lock(config)
     if lock_result["ok"] is False:
         send_notification("already_running", lock_result["error"])
         return "already_running"
 
-    # Install SIGUSR1 handler so the second press can stop recording.
-    signal.signal(signal.SIGUSR1, _handle_stop_signal)
-
     lock_handle = lock_result["value"]
+    _stop_event.clear()
+    _cancel_event.clear()
+    control_result = start_control_server(
+        config["control_socket_path"],
+        handler=recording_command_handler(_stop_event, _cancel_event),
+    )
+    if control_result["ok"] is False:
+        release_instance_lock(lock_handle)
+        send_notification("error_dependency", control_socket_error(control_result["error"]))
+        return "error_dependency"
+    control = control_result["value"]
+
+    # Warm the model while the user speaks unless a resident daemon already holds it.
+    model_load = None if is_daemon_running(config) else start_model_load(config)
+
     try:
-        x11_context = check_x11_context()
-        if x11_context["ok"] is False:
-            send_notification("error_dependency", x11_context["error"])
-            return "error_dependency"
+        return run_recording_session(
+            config,
+            started_at=started_at,
+            model_load=model_load,
+            stop_event=_stop_event,
+            cancel_event=_cancel_event,
+        )
+    finally:
+        stop_control_server(control)
+        release_instance_lock(lock_handle)
 
-        focused_window = check_focused_window()
-        if focused_window["ok"] is False:
-            send_notification("error_focus", focused_window["error"])
-            return "no_focus"
 
-        send_notification("recording_started")
-        capture_result = capture_audio(config, stop_event=_stop_event)
+def control_socket_error(message: str, /) -> DependencyError:
+    return {"category": "dependency", "message": message, "missing_tool": "control_socket_path"}
+
+
+def run_recording_session(
+    config: KoeConfig,
+    /,
+    *,
+    started_at: float,
+    model_load: ModelLoad | None,
+    stop_event: Event,
+    cancel_event: Event,
+) -> PipelineOutcome:
+    """Record from preflight to insertion; the caller holds the instance lock.
+
+    stop_event ends the capture and cancel_event discards it. Metrics land in
+    the module-level usage map for run_logged to flush.
+    """
+    job = capture_session(
+        config,
+        _usage_metrics,
+        started_at=started_at,
+        preflight=True,
+        model_load=model_load,
+        stop_event=stop_event,
+        cancel_event=cancel_event,
+    )
+    if isinstance(job, str):
+        return job
+    return process_session(config, job)
+
+
+def capture_session(  # noqa: PLR0913
+    config: KoeConfig,
+    metrics: UsageMetrics,
+    /,
+    *,
+    started_at: float,
+    preflight: bool,
+    model_load: ModelLoad | None,
+    stop_event: Event,
+    cancel_event: Event,
+) -> SessionJob | PipelineOutcome:
+    """Record while the startup checks run; the outcome when nothing is left to transcribe.
+
+    The microphone opens first so the first syllables are not lost to the
+    dependency preflight and focus lookups, which run on a thread beside the
+    capture. A failed check stops the capture, discards its audio and is
+    reported as if it had run first. started_at is the monotonic time the
+    session was requested, which first_audio_frame_ms is measured from.
+    """
+    stream: StreamingTranscription | None = None
+    checks: Future[FocusedWindow | PipelineOutcome] = Future()
+    Thread(
+        target=copy_context().run,
+        args=(_run_session_checks, config, checks),
+        kwargs={"preflight": preflight, "stop_event": stop_event},
+        name="koe-session-checks",
+        daemon=True,
+    ).start()
+    first_frame_at: list[float] = []
+    try:
+        if config["stream_transcription"]:
+            stream = start_streaming_transcription(
+                lambda window: _transcribe_capture(window, config, model_load)
+            )
+
+        with timed_stage("capture"):
+            capture_result = capture_audio(
+                config,
+                stop_event=stop_event,
+                on_window=None if stream is None else partial(submit_audio_window, stream),
+                on_first_frame=lambda: first_frame_at.append(time.monotonic()),
+            )
+        # However the capture ended (stop, time limit, error), it is no longer
+        # recording: later commands see it as processing.
+        stop_event.set()
+        if first_frame_at:
+            metrics["first_audio_frame_ms"] = round((first_frame_at[0] - started_at) * 1000, 1)
+
+        focused_window = checks.result()
+        if isinstance(focused_window, str) or cancel_event.is_set():
+            # Audio recorded for a failed check or a cancelled session is discarded.
+            if "artifact_path" in capture_result:
+                remove_audio_artifact(capture_result["artifact_path"])
+            return focused_window if isinstance(focused_window, str) else "cancelled"
 
         if capture_result["kind"] == "empty":
             send_notification("no_speech")
@@ -186,38 +631,190 @@ def run_pipeline(config: KoeConfig, /) -> PipelineOutcome:  # noqa: PLR0911
             send_notification("error_audio", capture_result["error"])
             return "error_audio"
 
-        artifact_path = capture_result["artifact_path"]
-        try:
-            send_notification("processing")
-            transcription_result = transcribe_audio(artifact_path, config)
+        if "trimmed_seconds" in capture_result:
+            metrics["trimmed_seconds"] = capture_result["trimmed_seconds"]
+        if "audio_seconds" in capture_result:
+            metrics["audio_seconds"] = capture_result["audio_seconds"]
+
+        job: SessionJob = {
+            "capture": capture_result,
+            "window_title": focused_window["title"],
+            "stream": stream,
+            "model_load": model_load,
+            "cancel_event": cancel_event,
+            "metrics": metrics,
+        }
+        # The job owns the stream from here on; process_session closes it.
+        stream = None
+        return job
+    finally:
+        if stream is not None:
+            close_streaming_transcription(stream)
+
+
+def _run_session_checks(
+    config: KoeConfig,
+    checks: Future[FocusedWindow | PipelineOutcome],
+    /,
+    *,
+    preflight: bool,
+    stop_event: Event,
+) -> None:
+    try:
+        result = session_checks(config, preflight=preflight)
+    except Exception as error:
+        stop_event.set()
+        checks.set_exception(error)
+        return
+    if isinstance(result, str):
+        stop_event.set()
+    checks.set_result(result)
+
+
+def session_checks(config: KoeConfig, /, *, preflight: bool) -> FocusedWindow | PipelineOutcome:
+    """Preflight and focus checks in their original order; the outcome of the first failure.
+
+    Failures are notified here. Passing all of them announces the recording,
+    which by then has been running since the microphone opened.
+    """
+    if preflight:
+        with timed_stage("preflight"):
+            preflight_result = dependency_preflight(config)
+        if preflight_result["ok"] is False:
+            send_notification("error_dependency", preflight_result["error"])
+            return "error_dependency"
+
+    with timed_stage("focus"):
+        x11_context = check_x11_context()
+    if x11_context["ok"] is False:
+        send_notification("error_dependency", x11_context["error"])
+        return "error_dependency"
 
-            if transcription_result["kind"] == "empty":
-                send_notification("no_speech")
-                return "no_speech"
+    with timed_stage("focus"):
+        focused_window = check_focused_window()
+    if focused_window["ok"] is False:
+        send_notification("error_focus", focused_window["error"])
+        return "no_focus"
 
-            if transcription_result["kind"] == "error":
-                send_notification("error_transcription", transcription_result["error"])
-                return "error_transcription"
+    send_notification("recording_started")
+    return focused_window["value"]
 
-            transcript_text = transcription_result["text"]
-            write_transcription_record(config, transcript_text)
 
-            insertion_result = insert_transcript_text(transcript_text, config)
-            if insertion_result["ok"] is False:
-                send_notification("error_insertion", insertion_result["error"])
-                return "error_insertion"
+def process_session(config: KoeConfig, job: SessionJob, /) -> PipelineOutcome:  # noqa: PLR0912
+    """Transcribe a stopped capture, log it and insert it into the focused window."""
+    capture_result, stream, model_load = job["capture"], job["stream"], job["model_load"]
+    metrics = job["metrics"]
+    if capture_result["kind"] == "buffered":
+        audio = capture_result["samples"]
+        artifact_path = None
+    else:
+        audio = artifact_path = capture_result["artifact_path"]
+    windowed = capture_result["kind"] == "spilled"
+    try:
+        send_notification("processing")
+        demanded_at = time.monotonic()
+        if model_load is not None:
+            metrics["model_ready"] = model_ready(model_load)
+        with timed_stage("transcription"):
+            if (
+                stream is not None
+                and stream["submitted_frames"] > 0
+                and capture_result["kind"] == "buffered"
+            ):
+                # Earlier windows were transcribed while the user spoke; only the tail remains.
+                transcription_result = finish_streaming_transcription(
+                    stream, capture_result["samples"]
+                )
+            else:
+                transcription_result = _transcribe_capture(
+                    audio, config, model_load, windowed=windowed
+                )
+        if model_load is not None:
+            metrics.update(claim_load_metrics(model_load, demanded_at))
+
+        if transcription_result["kind"] == "empty":
+            send_notification("no_speech")
+            return "no_speech"
 
-            send_notification("completed")
-            return "success"
-        finally:
-            remove_audio_artifact(artifact_path)
+        if transcription_result["kind"] == "error":
+            send_notification("error_transcription", transcription_result["error"])
+            return "error_transcription"
+
+        if job["cancel_event"].is_set():
+            return "cancelled"
+
+        transcript_text = transcription_result["text"]
+        logged_at = write_transcription_record(config, transcript_text)
+        if config["transcription_history"]:
+            record_transcription_history(
+                config,
+                transcript_text,
+                timestamp=logged_at,
+                window_title=job["window_title"],
+                audio_seconds=metrics.get("audio_seconds"),
+            )
+
+        insertion_result = insert_transcript_text(transcript_text, config)
+        if insertion_result["ok"] is False:
+            send_notification("error_insertion", insertion_result["error"])
+            return "error_insertion"
+
+        send_notification("completed")
+        return "success"
     finally:
-        release_instance_lock(lock_handle)
+        if artifact_path is not None:
+            remove_audio_artifact(artifact_path)
+        if stream is not None:
+            close_streaming_transcription(stream)
+
+
+def _transcribe_capture(
+    audio: AudioArtifactPath | AudioSamples,
+    config: KoeConfig,
+    model_load: ModelLoad | None,
+    /,
+    *,
+    windowed: bool = False,
+) -> TranscriptionResult:
+    """Transcribe via the resident daemon when no in-process model load is underway.
+
+    windowed reads a spilled WAV artefact in bounded windows.
+    """
+    if windowed:
+        if model_load is not None:
+            return transcribe_audio(audio, config, model=model_load, windowed=True)
+        transcription_result = _request_daemon_transcription(audio, config, windowed=True)
+        if transcription_result is None:
+            return transcribe_audio(audio, config, windowed=True)
+        return transcription_result
+
+    if model_load is not None:
+        return transcribe_audio(audio, config, model=model_load)
+
+    transcription_result = _request_daemon_transcription(audio, config, windowed=False)
+    if transcription_result is None:
+        return transcribe_audio(audio, config)
+    return transcription_result
+
+
+def _request_daemon_transcription(
+    audio: AudioArtifactPath | AudioSamples, config: KoeConfig, /, *, windowed: bool
+) -> TranscriptionResult | None:
+    """Ask the daemon, timing the request as daemon_transcription only if it answered."""
+    started_at = time.perf_counter()
+    transcription_result = (
+        request_daemon_transcription(audio, config, windowed=True)
+        if windowed
+        else request_daemon_transcription(audio, config)
+    )
+    if transcription_result is not None:
+        add_stage_duration("daemon_transcription", (time.perf_counter() - started_at) * 1000)
+    return transcription_result
 
 
 def outcome_to_exit_code(outcome: PipelineOutcome) -> ExitCode:
     match outcome:
-        case "success" | "signaled_stop":
+        case "success" | "signaled_stop" | "cancelled":
             return 0
         case (
             "no_focus"
@@ -1,28 +1,130 @@
-"""Desktop notification transport with non-raising behavior."""
+"""Desktop notifications delivered off the pipeline, with non-raising behavior.
+
+send_notification only queues. A background worker holds one session bus
+connection to org.freedesktop.Notifications and keeps reusing the id the
+server returned as replaces_id, so a dictation's recording, processing and
+result notices update one notification in place instead of stacking up. When
+no bus or notification server answers, the worker runs notify-send instead.
+Notices still queued when the process exits are flushed, within a bound.
+"""
 
 from __future__ import annotations
 
+import atexit
 import subprocess
-from typing import TYPE_CHECKING, assert_never
+from contextlib import suppress
+from queue import SimpleQueue
+from threading import Event, Lock, Thread
+from typing import TYPE_CHECKING, TypedDict, assert_never
+
+from koe.dbus import call_method, close_connection, connect_session_bus
 
 if TYPE_CHECKING:
+    from koe.dbus import BusConnection
     from koe.types import KoeError, NotificationKind
 
+_APP_NAME = "Koe"
+_BUS_TIMEOUT_SECONDS = 2.0
+_FLUSH_TIMEOUT_SECONDS = 3.0
+# Let the notification server apply its default expiry.
+_DEFAULT_EXPIRY = -1
+
+
+class _Session(TypedDict, total=False):
+    connection: BusConnection
+    notification_id: int
+
+
+# Queued (title, message) notices, or an Event the worker sets once it reaches it.
+_pending: SimpleQueue[tuple[str, str] | Event] = SimpleQueue()
+_worker_lock = Lock()
+_worker: dict[str, Thread] = {}
+# Only the worker thread touches the session.
+_session: _Session = {}
+
 
 def send_notification(kind: NotificationKind, error: KoeError | None = None) -> None:
-    """Attempt to send a desktop notification and swallow transport failures."""
+    """Queue a desktop notification for background delivery; never blocks or raises."""
     title, message = _notification_payload(kind, error)
     try:
-        subprocess.run(
-            ["notify-send", title, message],
-            check=False,
-            capture_output=True,
-            text=True,
-        )
+        _ensure_worker()
+        _pending.put((title, message))
     except Exception:
         return
 
 
+def flush_notifications(timeout: float = _FLUSH_TIMEOUT_SECONDS) -> bool:
+    """Wait until notifications queued so far are delivered; False if timeout ran out first."""
+    with _worker_lock:
+        if "thread" not in _worker:
+            return True
+    delivered = Event()
+    _pending.put(delivered)
+    return delivered.wait(timeout)
+
+
+def _ensure_worker() -> None:
+    with _worker_lock:
+        if "thread" in _worker:
+            return
+        thread = Thread(target=_deliver_notifications, name="koe-notify", daemon=True)
+        thread.start()
+        _worker["thread"] = thread
+    atexit.register(flush_notifications)
+
+
+def _deliver_notifications() -> None:
+    while True:
+        item = _pending.get()
+        if isinstance(item, Event):
+            item.set()
+            continue
+        # A failed notice must not stop the ones queued after it.
+        with suppress(Exception):
+            _deliver(*item)
+
+
+def _deliver(title: str, message: str, /) -> None:
+    if "connection" not in _session:
+        connected = connect_session_bus(timeout=_BUS_TIMEOUT_SECONDS)
+        if connected["ok"] is True:
+            _session["connection"] = connected["value"]
+
+    if "connection" in _session:
+        connection = _session["connection"]
+        reply = call_method(
+            connection,
+            destination="org.freedesktop.Notifications",
+            path="/org/freedesktop/Notifications",
+            interface="org.freedesktop.Notifications",
+            member="Notify",
+            signature="susssasa{sv}i",
+            body=[
+                _APP_NAME,
+                _session.get("notification_id", 0),
+                "",
+                title,
+                message,
+                [],
+                {},
+                _DEFAULT_EXPIRY,
+            ],
+        )
+        if reply["ok"] is True and reply["value"] and isinstance(reply["value"][0], int):
+            _session["notification_id"] = reply["value"][0]
+            return
+        # Reconnect next time; a bus restart or a server crash should not stick.
+        close_connection(connection)
+        del _session["connection"]
+
+    subprocess.run(
+        ["notify-send", title, message],
+        check=False,
+        capture_output=True,
+        text=True,
+    )
+
+
 def _notification_payload(kind: NotificationKind, error: KoeError | None) -> tuple[str, str]:  # noqa: PLR0911
     match kind:
         case "recording_started":
@@ -0,0 +1,83 @@
+"""Monotonic per-stage timers feeding the usage log's latency breakdown.
+
+Durations accumulate in one process-wide map by default. A resident process
+overlapping sessions gives each one its own map with stage_timing_scope, and
+the map is chosen per context, so threads recording different sessions do
+not mix. With timing disabled, timed_stage hands out a shared no-op context
+manager, so instrumented code pays one flag check per stage.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from threading import Event
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from contextlib import AbstractContextManager
+
+    from koe.types import StageName
+
+_timing_enabled = Event()
+_stage_durations_ms: dict[StageName, float] = {}
+_active_durations_ms: ContextVar[dict[StageName, float]] = ContextVar(
+    "koe_stage_durations_ms", default=_stage_durations_ms
+)
+_NO_OP_STAGE: AbstractContextManager[None] = nullcontext()
+
+
+def set_stage_timing(enabled: bool, /) -> None:
+    """Turn stage recording on or off for the rest of the process."""
+    if enabled:
+        _timing_enabled.set()
+    else:
+        _timing_enabled.clear()
+
+
+def timed_stage(name: StageName, /) -> AbstractContextManager[None]:
+    """Time the enclosed block as stage name; repeated stages add up."""
+    if not _timing_enabled.is_set():
+        return _NO_OP_STAGE
+    return _record_stage(name)
+
+
+def add_stage_duration(name: StageName, elapsed_ms: float, /) -> None:
+    """Count elapsed_ms towards stage name, for work timed before knowing it counts."""
+    if _timing_enabled.is_set():
+        durations = _active_durations_ms.get()
+        durations[name] = durations.get(name, 0.0) + elapsed_ms
+
+
+def stage_durations_ms() -> dict[StageName, float]:
+    """Snapshot of recorded stage durations in milliseconds, rounded to 0.1 ms."""
+    durations = _active_durations_ms.get()
+    return {name: round(duration, 1) for name, duration in durations.items()}
+
+
+def reset_stage_timings() -> None:
+    """Forget recorded durations so the next run starts from zero."""
+    _active_durations_ms.get().clear()
+
+
+@contextmanager
+def stage_timing_scope(durations: dict[StageName, float], /) -> Generator[None]:
+    """Record stages timed in the enclosed block into durations instead."""
+    token = _active_durations_ms.set(durations)
+    try:
+        yield
+    finally:
+        _active_durations_ms.reset(token)
+
+
+@contextmanager
+def _record_stage(name: StageName, /) -> Generator[None]:
+    durations = _active_durations_ms.get()
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        durations[name] = durations.get(name, 0.0) + elapsed_ms
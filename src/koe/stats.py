@@ -0,0 +1,296 @@
+"""`koe stats`: incremental outcome counts and latency percentiles from the JSONL logs.
+
+Each run resumes both logs from the byte offsets saved in a checkpoint,
+following them into rotated segments, and folds only the new lines into
+per-day summaries. Latencies are kept as
+log-bucketed sketches with 1% relative error, so a day's summary stays a few
+hundred integers however many runs it covers and windows merge by addition.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import math
+import os
+import sys
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, TypedDict, cast
+
+from koe.usage_log import ensure_data_dir, read_log_manifest, shared_log_lock
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from pathlib import Path
+
+    from koe.config import KoeConfig
+    from koe.types import ExitCode
+    from koe.usage_log import LogSegment
+
+type Sketch = dict[str, int]
+
+_CHECKPOINT_VERSION = 3
+_SKETCH_RELATIVE_ERROR = 0.01
+_SKETCH_GAMMA = (1 + _SKETCH_RELATIVE_ERROR) / (1 - _SKETCH_RELATIVE_ERROR)
+_SKETCH_LOG_GAMMA = math.log(_SKETCH_GAMMA)
+# Values at or below this many milliseconds share one bucket.
+_SKETCH_MIN_VALUE = 0.01
+_ZERO_BUCKET = "zero"
+_QUANTILES: tuple[tuple[str, float], ...] = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+
+
+class LogCursor(TypedDict):
+    inode: int
+    offset: int
+    segments: int
+
+
+class DaySummary(TypedDict):
+    outcomes: dict[str, int]
+    duration_ms: Sketch
+    first_audio_frame_ms: Sketch
+    stages: dict[str, Sketch]
+    transcriptions: int
+    words: int
+
+
+class StatsCheckpoint(TypedDict):
+    version: int
+    usage_log: LogCursor
+    transcription_log: LogCursor
+    days: dict[str, DaySummary]
+
+
+def run_stats(config: KoeConfig, /) -> ExitCode:
+    """Fold new log lines into the checkpoint, save it, and print each window's report."""
+    ensure_data_dir(config)
+    checkpoint = load_stats_checkpoint(config["stats_checkpoint_path"])
+    try:
+        update_stats_checkpoint(checkpoint, config)
+        save_stats_checkpoint(config["stats_checkpoint_path"], checkpoint)
+    except OSError as error:
+        print(f"koe stats: {error}", file=sys.stderr)
+        return 1
+
+    today = datetime.now(UTC).date()
+    for window_days in config["stats_window_days"]:
+        since = (today - timedelta(days=window_days - 1)).isoformat()
+        days = [summary for day, summary in checkpoint["days"].items() if day >= since]
+        print(format_stats_window(f"{window_days}d", merge_day_summaries(days)))
+    print(format_stats_window("all", merge_day_summaries(checkpoint["days"].values())))
+    return 0
+
+
+def load_stats_checkpoint(path: Path, /) -> StatsCheckpoint:
+    """Read the checkpoint, starting afresh when it is missing, unreadable or outdated."""
+    try:
+        checkpoint = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return _empty_checkpoint()
+    if not isinstance(checkpoint, dict) or checkpoint.get("version") != _CHECKPOINT_VERSION:
+        return _empty_checkpoint()
+    return cast("StatsCheckpoint", checkpoint)
+
+
+def save_stats_checkpoint(path: Path, checkpoint: StatsCheckpoint, /) -> None:
+    """Atomically replace the checkpoint so an interrupted run never leaves it half-written."""
+    staging_path = path.with_name(f"{path.name}.tmp")
+    file_descriptor = os.open(staging_path, os.O_CREAT | os.O_TRUNC | os.O_WRONLY, 0o600)
+    with os.fdopen(file_descriptor, "w", encoding="utf-8") as handle:
+        json.dump(checkpoint, handle, separators=(",", ":"))
+    staging_path.replace(path)
+
+
+def update_stats_checkpoint(checkpoint: StatsCheckpoint, config: KoeConfig, /) -> None:
+    """Parse only the lines appended to both logs since the checkpoint's offsets."""
+    days = checkpoint["days"]
+    for record in _read_new_records(config["usage_log_path"], checkpoint["usage_log"]):
+        _fold_usage_record(days, record)
+    for record in _read_new_records(
+        config["transcription_log_path"], checkpoint["transcription_log"]
+    ):
+        _fold_transcription_record(days, record)
+
+
+def merge_day_summaries(summaries: Iterable[DaySummary], /) -> DaySummary:
+    merged = _empty_day()
+    for summary in summaries:
+        for outcome, count in summary["outcomes"].items():
+            merged["outcomes"][outcome] = merged["outcomes"].get(outcome, 0) + count
+        _merge_sketch(merged["duration_ms"], summary["duration_ms"])
+        _merge_sketch(merged["first_audio_frame_ms"], summary["first_audio_frame_ms"])
+        for stage, sketch in summary["stages"].items():
+            _merge_sketch(merged["stages"].setdefault(stage, {}), sketch)
+        merged["transcriptions"] += summary["transcriptions"]
+        merged["words"] += summary["words"]
+    return merged
+
+
+def format_stats_window(label: str, summary: DaySummary, /) -> str:
+    runs = sum(summary["outcomes"].values())
+    outcomes = " ".join(f"{name}={count}" for name, count in sorted(summary["outcomes"].items()))
+    lines = [
+        f"window={label} runs={runs} {outcomes}".rstrip(),
+        f"  duration_ms {_format_quantiles(summary['duration_ms'])}",
+        f"  first_audio_frame_ms {_format_quantiles(summary['first_audio_frame_ms'])}",
+    ]
+    lines.extend(
+        f"  stage {stage} {_format_quantiles(sketch)}"
+        for stage, sketch in sorted(summary["stages"].items())
+    )
+    lines.append(f"  transcriptions={summary['transcriptions']} words={summary['words']}")
+    return "\n".join(lines)
+
+
+def sketch_add(sketch: Sketch, value: float, /) -> None:
+    bucket = (
+        _ZERO_BUCKET
+        if value <= _SKETCH_MIN_VALUE
+        else str(math.ceil(math.log(value) / _SKETCH_LOG_GAMMA))
+    )
+    sketch[bucket] = sketch.get(bucket, 0) + 1
+
+
+def sketch_quantile(sketch: Sketch, quantile: float, /) -> float | None:
+    """Estimate the value at quantile (0..1) to within the sketch's relative error."""
+    total = sum(sketch.values())
+    if total == 0:
+        return None
+    rank = quantile * (total - 1)
+    seen = sketch.get(_ZERO_BUCKET, 0)
+    if seen > rank:
+        return 0.0
+    for index in sorted(int(bucket) for bucket in sketch if bucket != _ZERO_BUCKET):
+        seen += sketch[str(index)]
+        if seen > rank:
+            return 2 * _SKETCH_GAMMA**index / (_SKETCH_GAMMA + 1)
+    return None
+
+
+def _read_new_records(path: Path, cursor: LogCursor, /) -> Iterator[dict[str, object]]:
+    """Yield JSON objects from complete lines past cursor, advancing it as they are read.
+
+    Segments rotated out since the cursor was saved are read first, starting
+    at the cursor's offset in the one it was reading. A replaced or truncated
+    live log is read from its start. A trailing line without its newline is
+    still being written and is left for next time.
+    """
+    with shared_log_lock(path):
+        segments = read_log_manifest(path)
+        if len(segments) > cursor["segments"]:
+            yield from _parse_records(_read_segment_lines(path, segments, cursor))
+            cursor["inode"] = cursor["offset"] = 0
+            cursor["segments"] = len(segments)
+        try:
+            handle = path.open("rb")
+        except FileNotFoundError:
+            return
+        with handle:
+            status = os.fstat(handle.fileno())
+            if status.st_size < cursor["offset"] or cursor["inode"] not in {0, status.st_ino}:
+                cursor["offset"] = 0
+            cursor["inode"] = status.st_ino
+            handle.seek(cursor["offset"])
+            for line in handle:
+                if not line.endswith(b"\n"):
+                    return
+                cursor["offset"] += len(line)
+                yield from _parse_records((line,))
+
+
+def _read_segment_lines(
+    path: Path, segments: list[LogSegment], cursor: LogCursor, /
+) -> Iterator[bytes]:
+    """Lines of segments the cursor has not seen, resuming the first at its offset."""
+    skip = cursor["offset"]
+    for segment in segments[cursor["segments"] :]:
+        with gzip.open(path.with_name(segment["name"]), "rb") as lines:
+            lines.seek(skip)
+            yield from lines
+        skip = 0
+
+
+def _parse_records(lines: Iterable[bytes], /) -> Iterator[dict[str, object]]:
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            yield record  # pyright: ignore[reportUnknownVariableType]
+
+
+def _fold_usage_record(days: dict[str, DaySummary], record: dict[str, object], /) -> None:
+    day = _record_day(record.get("invoked_at"))
+    outcome = record.get("outcome")
+    duration_ms = record.get("duration_ms")
+    if day is None or not isinstance(outcome, str) or not isinstance(duration_ms, int | float):
+        return
+    summary = days.setdefault(day, _empty_day())
+    summary["outcomes"][outcome] = summary["outcomes"].get(outcome, 0) + 1
+    sketch_add(summary["duration_ms"], duration_ms)
+    first_audio_frame_ms = record.get("first_audio_frame_ms")
+    if isinstance(first_audio_frame_ms, int | float):
+        sketch_add(summary["first_audio_frame_ms"], first_audio_frame_ms)
+    stages = record.get("stages")
+    if isinstance(stages, dict):
+        for stage, stage_ms in stages.items():  # pyright: ignore[reportUnknownVariableType]
+            if isinstance(stage, str) and isinstance(stage_ms, int | float):
+                sketch_add(summary["stages"].setdefault(stage, {}), stage_ms)
+
+
+def _fold_transcription_record(days: dict[str, DaySummary], record: dict[str, object], /) -> None:
+    day = _record_day(record.get("timestamp"))
+    word_count = record.get("word_count")
+    if day is None:
+        return
+    summary = days.setdefault(day, _empty_day())
+    summary["transcriptions"] += 1
+    if isinstance(word_count, int):
+        summary["words"] += word_count
+
+
+def _record_day(timestamp: object, /) -> str | None:
+    """UTC calendar day of an ISO-8601 timestamp, or None when it does not parse."""
+    if not isinstance(timestamp, str):
+        return None
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(UTC)
+    return moment.date().isoformat()
+
+
+def _merge_sketch(into: Sketch, sketch: Sketch, /) -> None:
+    for bucket, count in sketch.items():
+        into[bucket] = into.get(bucket, 0) + count
+
+
+def _format_quantiles(sketch: Sketch, /) -> str:
+    values: list[str] = []
+    for name, quantile in _QUANTILES:
+        estimate = sketch_quantile(sketch, quantile)
+        values.append(f"{name}={'-' if estimate is None else round(estimate)}")
+    return " ".join(values)
+
+
+def _empty_day() -> DaySummary:
+    return {
+        "outcomes": {},
+        "duration_ms": {},
+        "first_audio_frame_ms": {},
+        "stages": {},
+        "transcriptions": 0,
+        "words": 0,
+    }
+
+
+def _empty_checkpoint() -> StatsCheckpoint:
+    return {
+        "version": _CHECKPOINT_VERSION,
+        "usage_log": {"inode": 0, "offset": 0, "segments": 0},
+        "transcription_log": {"inode": 0, "offset": 0, "segments": 0},
+        "days": {},
+    }
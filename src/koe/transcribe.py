@@ -1,47 +1,180 @@
-"""Local CUDA Whisper transcription result shaping for Section 4."""
+"""Local Whisper transcription (CUDA, or int8 on CPU) and result shaping for Section 4."""
 
 from __future__ import annotations
 
 import ctypes
+import importlib
+import json
+import os
 import site
+import time
+from concurrent.futures import Future
+from contextlib import suppress
+from contextvars import copy_context
+from functools import cache
 from pathlib import Path
-from typing import TYPE_CHECKING, Protocol, cast
+from queue import SimpleQueue
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, Literal, NamedTuple, NotRequired, Protocol, TypedDict, cast
 
+from koe.stages import timed_stage
 
-def _preload_cuda_libraries() -> None:
+_CUDA_LIBRARIES = ("libcublas.so.12", "libcublasLt.so.12", "libcudnn.so.9")
+_CUDA_MANIFEST_VERSION = 1
+_load_report_lock = Lock()
+
+
+@cache
+def _preload_cuda_libraries(manifest_path: Path | None = None, /) -> None:
     """Pre-load pip-installed nvidia CUDA libraries into the process global symbol table.
 
     LD_LIBRARY_PATH is read at process startup and cannot be modified at runtime.
     Instead, use ctypes.CDLL with RTLD_GLOBAL to make the shared libraries available
     before CTranslate2 (via faster-whisper) tries to link against them.
+
+    Finding the libraries means walking thousands of files in the nvidia wheels,
+    so the paths found are kept at manifest_path, keyed by the installed nvidia
+    distributions. Later starts check that manifest with one stat per library.
     """
-    packages = site.getsitepackages()
-    if not packages:
-        return
-    nvidia_dir = Path(packages[0]) / "nvidia"
-    if not nvidia_dir.is_dir():
-        return
+    site_dirs = _site_package_dirs()
+    distributions = _nvidia_distributions(site_dirs)
+    libraries = None if manifest_path is None else _read_cuda_manifest(manifest_path, distributions)
+    if libraries is None:
+        libraries = _find_cuda_libraries(site_dirs)
+        if manifest_path is not None:
+            _write_cuda_manifest(manifest_path, distributions, libraries)
+
+    for library in libraries:
+        try:
+            ctypes.CDLL(str(library), mode=ctypes.RTLD_GLOBAL)
+        except OSError:
+            continue
+
+
+def _site_package_dirs() -> list[Path]:
+    """Every site-packages directory, system then user, without duplicates."""
+    return list(
+        dict.fromkeys(
+            Path(entry) for entry in [*site.getsitepackages(), site.getusersitepackages()]
+        )
+    )
+
+
+def _nvidia_distributions(site_dirs: list[Path], /) -> list[str]:
+    """Installed nvidia distributions: their dist-info paths, which carry the versions."""
+    distributions: list[str] = []
+    for site_dir in site_dirs:
+        with suppress(OSError):
+            distributions.extend(
+                str(site_dir / name)
+                for name in os.listdir(site_dir)
+                if name.startswith("nvidia_") and name.endswith(".dist-info")
+            )
+    return sorted(distributions)
+
 
-    targets = ["libcublas.so.12", "libcublasLt.so.12", "libcudnn.so.9"]
-    for target in targets:
-        matches = list(nvidia_dir.rglob(target))
-        for match in matches:
-            try:
-                ctypes.CDLL(str(match), mode=ctypes.RTLD_GLOBAL)
-            except OSError:
-                continue
+def _find_cuda_libraries(site_dirs: list[Path], /) -> list[Path]:
+    nvidia_dirs = [site_dir / "nvidia" for site_dir in site_dirs if (site_dir / "nvidia").is_dir()]
+    return [
+        match
+        for target in _CUDA_LIBRARIES
+        for nvidia_dir in nvidia_dirs
+        for match in sorted(nvidia_dir.rglob(target))
+    ]
 
 
-_preload_cuda_libraries()
+def _read_cuda_manifest(manifest_path: Path, distributions: list[str], /) -> list[Path] | None:
+    """Library paths from the manifest; None when it is missing, outdated or stale."""
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict):
+        return None
+    fields = cast("dict[str, object]", manifest)
+    libraries = fields.get("libraries")
+    if (
+        fields.get("version") != _CUDA_MANIFEST_VERSION
+        or fields.get("distributions") != distributions
+        or not isinstance(libraries, list)
+    ):
+        return None
+
+    paths: list[Path] = []
+    for library in cast("list[object]", libraries):
+        if not isinstance(library, str):
+            return None
+        try:
+            os.stat(library)
+        except OSError:
+            return None
+        paths.append(Path(library))
+    return paths
+
+
+def _write_cuda_manifest(
+    manifest_path: Path, distributions: list[str], libraries: list[Path], /
+) -> None:
+    """Atomically replace the manifest; a read-only data dir only costs the next scan."""
+    manifest = {
+        "version": _CUDA_MANIFEST_VERSION,
+        "distributions": distributions,
+        "libraries": [str(library) for library in libraries],
+    }
+    staging_path = manifest_path.with_name(f"{manifest_path.name}.tmp")
+    with suppress(OSError):
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        staging_path.write_text(json.dumps(manifest), encoding="utf-8")
+        staging_path.replace(manifest_path)
+
+
+def WhisperModel(  # noqa: N802, PLR0913 - stands in for faster_whisper.WhisperModel
+    model_size_or_path: str,
+    /,
+    *,
+    device: str,
+    compute_type: str,
+    cpu_threads: int = 0,
+    num_workers: int = 1,
+    cuda_library_manifest: Path | None = None,
+) -> TranscriptionModel:
+    """Import faster-whisper on first model construction, then build the model.
+
+    Importing koe.transcribe stays cheap: CUDA preload and the faster-whisper
+    import (CTranslate2, numpy) only happen once a model is actually needed,
+    and a CPU model never preloads the CUDA libraries at all.
+    """
+    if device != "cpu":
+        _preload_cuda_libraries(cuda_library_manifest)
+    faster_whisper = importlib.import_module("faster_whisper")
+    model = faster_whisper.WhisperModel(
+        model_size_or_path,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+        num_workers=num_workers,
+    )
+    return cast("TranscriptionModel", model)
 
-from faster_whisper import WhisperModel  # noqa: E402
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
+    from collections.abc import Callable, Iterable
 
     from koe.config import KoeConfig
-    from koe.types import AudioArtifactPath, TranscriptionError, TranscriptionResult
+    from koe.types import (
+        AudioArtifactPath,
+        AudioSamples,
+        Result,
+        TranscriptionError,
+        TranscriptionResult,
+        UsageMetrics,
+    )
+
 
+_WHISPER_SAMPLE_RATE = 16_000
+# Whisper's own receptive field; longer windows are split internally anyway.
+_FILE_WINDOW_SECONDS = 30.0
+_WARM_UP_SECONDS = 1.0
 
 _NOISE_TOKENS: frozenset[str] = frozenset(
     {
@@ -68,25 +201,314 @@ _NOISE_TOKENS: frozenset[str] = frozenset(
 
 
 class _SegmentLike(Protocol):
+    @property
+    def text(self) -> str: ...
+
+
+class _WindowText(NamedTuple):
     text: str
 
 
-def transcribe_audio(artifact_path: AudioArtifactPath, config: KoeConfig, /) -> TranscriptionResult:
-    """Transcribe a WAV artifact into text, empty, or typed transcription error."""
+class TranscriptionModel(Protocol):
+    """The slice of faster-whisper's WhisperModel surface the pipeline relies on."""
+
+    def transcribe(self, audio: str | AudioSamples, /) -> tuple[object, object]: ...
+
+
+class StreamingTranscription(TypedDict):
+    """Background worker transcribing capture windows while recording continues."""
+
+    windows: SimpleQueue[AudioSamples | None]
+    results: list[TranscriptionResult]
+    worker: Thread
+    submitted_frames: int
+    closed: bool
+
+
+class ModelLoad(TypedDict):
+    """Background WhisperModel construction started ahead of transcription."""
+
+    future: Future[Result[TranscriptionModel, TranscriptionError]]
+    started_at: float
+    finished_at: float | None
+    warm_up_ms: NotRequired[int]
+    # Set once a session has logged the load, which the resident process shares.
+    reported: NotRequired[bool]
+
+
+def transcribe_audio(
+    audio: AudioArtifactPath | AudioSamples,
+    config: KoeConfig,
+    /,
+    model: TranscriptionModel | ModelLoad | None = None,
+    *,
+    windowed: bool = False,
+) -> TranscriptionResult:
+    """Transcribe a WAV artifact or in-memory samples into text, empty, or typed error.
+
+    When model is None the WhisperModel is constructed here. A loaded model is
+    used directly, and a ModelLoad handle is awaited until its load completes.
+    windowed reads a WAV artifact in bounded windows instead of decoding it whole.
+    """
+    model_result: Result[TranscriptionModel, TranscriptionError]
+    if model is None:
+        model_result = load_whisper_model(config)
+    elif isinstance(model, dict):
+        with timed_stage("model_wait"):
+            model_result = model["future"].result()
+    else:
+        model_result = {"ok": True, "value": model}
+
+    if model_result["ok"] is False:
+        return {"kind": "error", "error": model_result["error"]}
+    if windowed and isinstance(audio, Path):
+        return transcribe_file_in_windows(model_result["value"], audio)
+    return transcribe_with_model(model_result["value"], audio)
+
+
+def start_model_load(config: KoeConfig, /) -> ModelLoad:
+    """Begin constructing, and optionally warming, the WhisperModel on a background thread.
+
+    The future resolves only after warm-up, so a done future means the model
+    is ready to serve its first real request at full speed.
+    """
+    model_load: ModelLoad = {
+        "future": Future(),
+        "started_at": time.monotonic(),
+        "finished_at": None,
+    }
+
+    def _load() -> None:
+        model_result: Result[TranscriptionModel, TranscriptionError] = load_whisper_model(config)
+        if model_result["ok"] is True and config["whisper_warm_up"]:
+            warm_up = warm_up_model(model_result["value"])
+            if warm_up["ok"] is True:
+                model_load["warm_up_ms"] = warm_up["value"]
+            else:
+                model_result = {"ok": False, "error": warm_up["error"]}
+        model_load["finished_at"] = time.monotonic()
+        model_load["future"].set_result(model_result)
+
+    # Threads start from an empty context; copy this one so model_load is
+    # timed into the caller's stage map.
+    Thread(target=copy_context().run, args=(_load,), name="koe-model-load", daemon=True).start()
+    return model_load
+
+
+def start_streaming_transcription(
+    transcribe_window: Callable[[AudioSamples], TranscriptionResult], /
+) -> StreamingTranscription:
+    """Start a worker that transcribes submitted windows in arrival order."""
+    windows: SimpleQueue[AudioSamples | None] = SimpleQueue()
+    results: list[TranscriptionResult] = []
+
+    def _drain() -> None:
+        while (window := windows.get()) is not None:
+            results.append(transcribe_window(window))
+
+    # Per-window inference is timed into the stage map of the session starting the stream.
+    worker = Thread(
+        target=copy_context().run, args=(_drain,), name="koe-stream-transcribe", daemon=True
+    )
+    worker.start()
+    return {
+        "windows": windows,
+        "results": results,
+        "worker": worker,
+        "submitted_frames": 0,
+        "closed": False,
+    }
+
+
+def submit_audio_window(stream: StreamingTranscription, samples: AudioSamples, /) -> None:
+    """Queue a completed capture window for background transcription."""
+    stream["submitted_frames"] += samples.size
+    stream["windows"].put(samples)
+
+
+def finish_streaming_transcription(
+    stream: StreamingTranscription, samples: AudioSamples, /
+) -> TranscriptionResult:
+    """Transcribe the untranscribed tail of samples, then stitch all window results.
+
+    Window texts are joined under the same rules _normalize_segments applies to
+    model segments, so the output matches a single pass over the whole capture.
+    """
+    tail = samples[stream["submitted_frames"] :]
+    if tail.size > 0:
+        submit_audio_window(stream, tail)
+    close_streaming_transcription(stream)
+    stream["worker"].join()
+    return _stitch_window_results(stream["results"])
+
+
+def close_streaming_transcription(stream: StreamingTranscription, /) -> None:
+    """Let the worker exit once queued windows drain; safe to call repeatedly."""
+    if stream["closed"]:
+        return
+    stream["closed"] = True
+    stream["windows"].put(None)
+
+
+def model_ready(model_load: ModelLoad, /) -> bool:
+    """Return True once the background load has finished with a usable model."""
+    future = model_load["future"]
+    return future.done() and future.result()["ok"] is True
+
+
+def warm_up_model(model: TranscriptionModel, /) -> Result[int, TranscriptionError]:
+    """Run a second of silence through the encoder and decoder; return its cost in ms.
+
+    The first transcribe call pays CUDA kernel selection, memory pool growth and
+    tokenizer setup. Paying them here keeps them off the first real request.
+    """
+    started_at = time.monotonic()
     try:
-        model = WhisperModel(
-            config["whisper_model"],
-            device=config["whisper_device"],
-            compute_type=config["whisper_compute_type"],
-        )
+        np = importlib.import_module("numpy")
+        silence = np.zeros(int(_WARM_UP_SECONDS * _WHISPER_SAMPLE_RATE), dtype=np.float32)
+        segments, _info = model.transcribe(silence)
+        # faster-whisper decodes lazily; drain the generator so the decoder runs.
+        list(cast("Iterable[object]", segments))
     except Exception as error:
-        if _is_cuda_unavailable_error(error):
-            return _transcription_error(f"CUDA not available: {error}", cuda_available=False)
-        return _transcription_error(f"model load failed: {error}", cuda_available=True)
+        return {
+            "ok": False,
+            "error": _transcription_error_payload(
+                f"warm-up failed: {error}", cuda_available=_loaded_on_cuda(model)
+            ),
+        }
+    return {"ok": True, "value": int((time.monotonic() - started_at) * 1000)}
+
+
+def _loaded_on_cuda(model: TranscriptionModel, /) -> bool:
+    """Whether model runs on CUDA, per the CTranslate2 model faster-whisper wraps.
+
+    In auto mode a failed CUDA load falls back to CPU, so the configured device
+    does not say where a loaded model ended up.
+    """
+    return getattr(getattr(model, "model", None), "device", None) == "cuda"
+
+
+def hidden_load_ms(model_load: ModelLoad, demanded_at: float, /) -> int:
+    """Milliseconds of model load that ran before transcription needed the model."""
+    finished_at = model_load["finished_at"]
+    overlap_end = demanded_at if finished_at is None else min(finished_at, demanded_at)
+    return max(0, int((overlap_end - model_load["started_at"]) * 1000))
+
+
+def claim_load_metrics(model_load: ModelLoad, demanded_at: float, /) -> UsageMetrics:
+    """Hidden-load and warm-up metrics for the first session to ask; {} for every later one.
+
+    A resident process serves every session from one load, which only the
+    session that overlapped it should report.
+    """
+    with _load_report_lock:
+        if model_load.get("reported", False):
+            return {}
+        model_load["reported"] = True
+    metrics: UsageMetrics = {"model_load_hidden_ms": hidden_load_ms(model_load, demanded_at)}
+    if "warm_up_ms" in model_load:
+        metrics["model_warm_up_ms"] = model_load["warm_up_ms"]
+    return metrics
+
+
+def load_whisper_model(config: KoeConfig, /) -> Result[TranscriptionModel, TranscriptionError]:
+    """Construct the configured WhisperModel or return a typed load failure.
 
+    In auto mode a failed CUDA load falls back to the int8 CPU backend.
+    """
+    with timed_stage("model_load"):
+        if config["whisper_device"] == "cpu":
+            return _load_model_on(config, "cpu")
+
+        model_result = _load_model_on(config, "cuda")
+        if model_result["ok"] is False and config["whisper_device"] == "auto":
+            return _load_model_on(config, "cpu")
+        return model_result
+
+
+def cpu_thread_count(num_workers: int, /) -> int:
+    """Split the cores this process may run on evenly across CTranslate2 workers."""
+    return max(1, len(os.sched_getaffinity(0)) // max(1, num_workers))
+
+
+def _load_model_on(
+    config: KoeConfig, device: Literal["cuda", "cpu"], /
+) -> Result[TranscriptionModel, TranscriptionError]:
+    try:
+        if device == "cuda":
+            model = WhisperModel(
+                config["whisper_model"],
+                device="cuda",
+                compute_type=config["whisper_compute_type"],
+                cuda_library_manifest=config["cuda_library_manifest_path"],
+            )
+        else:
+            num_workers = config["whisper_cpu_workers"]
+            model = WhisperModel(
+                config["whisper_model"],
+                device="cpu",
+                compute_type=config["whisper_cpu_compute_type"],
+                cpu_threads=cpu_thread_count(num_workers),
+                num_workers=num_workers,
+            )
+    except Exception as error:
+        if device == "cuda" and _is_cuda_unavailable_error(error):
+            return {
+                "ok": False,
+                "error": _transcription_error_payload(
+                    f"CUDA not available: {error}", cuda_available=False
+                ),
+            }
+        return {
+            "ok": False,
+            "error": _transcription_error_payload(
+                f"model load failed: {error}", cuda_available=device == "cuda"
+            ),
+        }
+
+    return {"ok": True, "value": model}
+
+
+def transcribe_file_in_windows(
+    model: TranscriptionModel, artifact_path: AudioArtifactPath, /
+) -> TranscriptionResult:
+    """Transcribe a 16 kHz WAV artefact window by window, stitching the texts.
+
+    Only one window is decoded into memory at a time, so spilled recordings of
+    any length transcribe in bounded memory. Other sample rates are handed to
+    the model's own decoder, which resamples the whole file.
+    """
     try:
-        segments, _info = model.transcribe(str(artifact_path))
-        normalized_text = _normalize_segments(cast("Iterable[_SegmentLike]", segments))
+        soundfile = importlib.import_module("soundfile")
+        vad = importlib.import_module("koe.vad")
+        with soundfile.SoundFile(str(artifact_path)) as audio_file:
+            if audio_file.samplerate != _WHISPER_SAMPLE_RATE:
+                return transcribe_with_model(model, artifact_path)
+            results: list[TranscriptionResult] = []
+            for window in vad.iter_quiet_windows(
+                audio_file,
+                sample_rate=_WHISPER_SAMPLE_RATE,
+                window_frames=int(_FILE_WINDOW_SECONDS * _WHISPER_SAMPLE_RATE),
+            ):
+                results.append(transcribe_with_model(model, window))
+                if results[-1]["kind"] == "error":
+                    break
+    except Exception as error:
+        return _transcription_error(f"audio read failed: {error}", cuda_available=True)
+
+    return _stitch_window_results(results)
+
+
+def transcribe_with_model(
+    model: TranscriptionModel, audio: AudioArtifactPath | AudioSamples, /
+) -> TranscriptionResult:
+    """Run inference on an already-loaded model and shape the result."""
+    try:
+        model_input = str(audio) if isinstance(audio, Path) else audio
+        with timed_stage("inference"):
+            segments, _info = model.transcribe(model_input)
+            # Segments decode lazily, so inference runs while they are consumed.
+            normalized_text = _normalize_segments(cast("Iterable[_SegmentLike]", segments))
     except Exception as error:
         return _transcription_error(f"inference failed: {error}", cuda_available=True)
 
@@ -106,6 +528,21 @@ def _normalize_segments(segments: Iterable[_SegmentLike], /) -> str:
     return " ".join(normalized_segments).strip()
 
 
+def _stitch_window_results(results: Iterable[TranscriptionResult], /) -> TranscriptionResult:
+    """Join per-window results under _normalize_segments rules; the first error wins."""
+    texts: list[_WindowText] = []
+    for result in results:
+        if result["kind"] == "error":
+            return result
+        if result["kind"] == "text":
+            texts.append(_WindowText(result["text"]))
+
+    stitched_text = _normalize_segments(texts)
+    if stitched_text == "":
+        return {"kind": "empty"}
+    return {"kind": "text", "text": stitched_text}
+
+
 def _is_cuda_unavailable_error(error: Exception, /) -> bool:
     """Classify load-time exceptions that indicate CUDA is unavailable."""
     message = str(error).lower()
@@ -117,9 +554,15 @@ def _is_cuda_unavailable_error(error: Exception, /) -> bool:
 
 def _transcription_error(message: str, *, cuda_available: bool) -> TranscriptionResult:
     """Create a typed transcription failure result."""
-    error: TranscriptionError = {
+    return {
+        "kind": "error",
+        "error": _transcription_error_payload(message, cuda_available=cuda_available),
+    }
+
+
+def _transcription_error_payload(message: str, *, cuda_available: bool) -> TranscriptionError:
+    return {
         "category": "transcription",
         "message": message,
         "cuda_available": cuda_available,
     }
-    return {"kind": "error", "error": error}
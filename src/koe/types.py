@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Generic, Literal, NewType, TypeAlias, TypedDict, TypeVar
+from typing import Generic, Literal, NewType, NotRequired, Protocol, TypeAlias, TypedDict, TypeVar
 
 T = TypeVar("T")
 E = TypeVar("E")
@@ -27,6 +27,14 @@ Result: TypeAlias = Ok[T] | Err[E]  # noqa: UP040
 
 type HotkeyAction = Literal["start", "stop"]
 
+type ControlCommand = Literal["toggle", "stop", "cancel", "status"]
+
+
+class ControlReply(TypedDict):
+    ok: bool
+    state: Literal["idle", "recording", "processing"]
+    pid: int
+
 
 class FocusedWindow(TypedDict):
     window_id: WindowId
@@ -36,9 +44,37 @@ class FocusedWindow(TypedDict):
 type WindowFocusResult = FocusedWindow | None
 
 
+class AudioSamples(Protocol):
+    """Mono float32 PCM at 16 kHz; numpy arrays satisfy this structurally."""
+
+    @property
+    def size(self) -> int: ...
+
+    def __getitem__(self, index: slice, /) -> AudioSamples: ...
+
+    def tobytes(self) -> bytes: ...
+
+
 class AudioCapture(TypedDict):
     kind: Literal["captured"]
     artifact_path: AudioArtifactPath
+    trimmed_seconds: NotRequired[float]
+    audio_seconds: NotRequired[float]
+
+
+class AudioBuffer(TypedDict):
+    kind: Literal["buffered"]
+    samples: AudioSamples
+    trimmed_seconds: NotRequired[float]
+    audio_seconds: NotRequired[float]
+
+
+class AudioSpill(TypedDict):
+    """Capture streamed to a WAV artefact as it was recorded, for long sessions."""
+
+    kind: Literal["spilled"]
+    artifact_path: AudioArtifactPath
+    audio_seconds: NotRequired[float]
 
 
 class AudioEmpty(TypedDict):
@@ -50,7 +86,7 @@ class AudioCaptureFailed(TypedDict):
     error: AudioError
 
 
-type AudioCaptureResult = AudioCapture | AudioEmpty | AudioCaptureFailed
+type AudioCaptureResult = AudioCapture | AudioBuffer | AudioSpill | AudioEmpty | AudioCaptureFailed
 
 
 class TranscriptionText(TypedDict):
@@ -132,6 +168,7 @@ type KoeError = (
 type PipelineOutcome = Literal[
     "success",
     "signaled_stop",
+    "cancelled",
     "no_focus",
     "no_speech",
     "error_dependency",
@@ -143,7 +180,34 @@ type PipelineOutcome = Literal[
 ]
 
 
-class UsageLogRecord(TypedDict):
+type StageName = Literal[
+    "preflight",
+    "lock",
+    "focus",
+    "stream_open",
+    "capture",
+    "model_load",
+    "model_wait",
+    "inference",
+    "daemon_transcription",
+    "transcription",
+    "clipboard_write",
+    "paste",
+]
+
+
+class UsageMetrics(TypedDict, total=False):
+    model_load_hidden_ms: int
+    model_warm_up_ms: int
+    model_ready: bool
+    first_audio_frame_ms: float
+    trimmed_seconds: float
+    audio_seconds: float
+    real_time_factor: float
+    stages: dict[StageName, float]
+
+
+class UsageLogRecord(UsageMetrics):
     run_id: str
     invoked_at: str
     outcome: PipelineOutcome
@@ -2,18 +2,33 @@
 
 from __future__ import annotations
 
+import fcntl
+import gzip
 import json
 import os
 import sys
-from datetime import UTC, datetime
-from typing import TYPE_CHECKING
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, TypedDict, cast
 from uuid import uuid4
 
 if TYPE_CHECKING:
+    from collections.abc import Generator, Iterator
     from pathlib import Path
 
     from koe.config import KoeConfig
-    from koe.types import PipelineOutcome, UsageLogRecord
+    from koe.types import PipelineOutcome, UsageLogRecord, UsageMetrics
+
+
+class LogSegment(TypedDict):
+    """Manifest entry for one gzip-compressed, rotated-out log segment."""
+
+    name: str
+    inode: int
+    bytes: int
+    records: int
+    first: str | None
+    last: str | None
 
 
 def ensure_data_dir(config: KoeConfig, /) -> None:
@@ -31,6 +46,7 @@ def write_usage_log_record(
     *,
     invoked_at: str,
     duration_ms: int,
+    metrics: UsageMetrics | None = None,
 ) -> None:
     """Append one JSONL usage record and never raise."""
     try:
@@ -39,36 +55,191 @@ def write_usage_log_record(
             "invoked_at": invoked_at,
             "outcome": outcome,
             "duration_ms": duration_ms,
+            **(metrics or {}),
         }
-        _append_jsonl(config["usage_log_path"], record)
+        _append_jsonl(config, config["usage_log_path"], record)
     except Exception as error:
         print(f"usage log write failed: {error}", file=sys.stderr)
 
 
-def write_transcription_record(config: KoeConfig, text: str, /) -> None:
+def write_transcription_record(config: KoeConfig, text: str, /) -> str | None:
     """Append one JSONL transcription record and never raise.
 
     Every successful transcription is saved for later analysis. Records
-    include timestamp, text, and word count.
+    include timestamp, text, and word count. Returns the record's timestamp,
+    or None when the write failed.
     """
     try:
+        timestamp = datetime.now(UTC).isoformat()
         record = {
-            "timestamp": datetime.now(UTC).isoformat(),
+            "timestamp": timestamp,
             "text": text,
             "word_count": len(text.split()),
         }
-        _append_jsonl(config["transcription_log_path"], record)
+        _append_jsonl(config, config["transcription_log_path"], record)
     except Exception as error:
         print(f"transcription log write failed: {error}", file=sys.stderr)
+        return None
+    return timestamp
 
 
-def _append_jsonl(path: Path, record: object, /) -> None:
-    """Append a JSON record to a JSONL file with restrictive permissions."""
+def _append_jsonl(config: KoeConfig, path: Path, record: object, /) -> None:
+    """Append a JSON record to a JSONL file with restrictive permissions.
+
+    Appends hold a shared flock on the log's lock file and rotation holds it
+    exclusively, so a concurrent koe process never writes into a segment that
+    is being compressed.
+    """
     payload = json.dumps(record)
-    file_descriptor = os.open(
-        path,
-        os.O_APPEND | os.O_CREAT | os.O_WRONLY,
-        0o600,
-    )
-    with os.fdopen(file_descriptor, "a", encoding="utf-8") as handle:
-        handle.write(f"{payload}\n")
+    lock_descriptor = os.open(_rotation_lock_path(path), os.O_CREAT | os.O_RDWR, 0o600)
+    with os.fdopen(lock_descriptor, "rb") as lock_handle:
+        fcntl.flock(lock_handle, fcntl.LOCK_SH)
+        file_descriptor = os.open(
+            path,
+            os.O_APPEND | os.O_CREAT | os.O_WRONLY,
+            0o600,
+        )
+        with os.fdopen(file_descriptor, "a", encoding="utf-8") as handle:
+            handle.write(f"{payload}\n")
+        fcntl.flock(lock_handle, fcntl.LOCK_UN)
+
+        if _needs_rotation(config, path):
+            fcntl.flock(lock_handle, fcntl.LOCK_EX)
+            try:
+                # Another process may have rotated between our append and this lock.
+                if _needs_rotation(config, path):
+                    _rotate_log(path)
+            except OSError as error:
+                print(f"log rotation failed: {error}", file=sys.stderr)
+
+
+def read_log_manifest(path: Path, /) -> list[LogSegment]:
+    """Rotated segments of the log at path, oldest first; empty when never rotated."""
+    try:
+        manifest = json.loads(_manifest_path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    return cast("list[LogSegment]", manifest.get("segments", []))
+
+
+def log_segments(
+    path: Path, /, *, since: datetime | None = None, until: datetime | None = None
+) -> list[Path]:
+    """Compressed segments whose records overlap [since, until], oldest first."""
+    selected: list[Path] = []
+    for segment in read_log_manifest(path):
+        first, last = segment["first"], segment["last"]
+        if since is not None and last is not None and datetime.fromisoformat(last) < since:
+            continue
+        if until is not None and first is not None and datetime.fromisoformat(first) > until:
+            continue
+        selected.append(path.with_name(segment["name"]))
+    return selected
+
+
+def iter_log_lines(
+    path: Path, /, *, since: datetime | None = None, until: datetime | None = None
+) -> Iterator[bytes]:
+    """Stream raw lines from matching rotated segments, then from the live log."""
+    for segment_path in log_segments(path, since=since, until=until):
+        with gzip.open(segment_path, "rb") as segment:
+            yield from segment
+    try:
+        with path.open("rb") as live:
+            yield from live
+    except FileNotFoundError:
+        return
+
+
+@contextmanager
+def shared_log_lock(path: Path, /) -> Generator[None]:
+    """Hold off rotation of the log at path while the caller reads it."""
+    lock_descriptor = os.open(_rotation_lock_path(path), os.O_CREAT | os.O_RDWR, 0o600)
+    with os.fdopen(lock_descriptor, "rb") as lock_handle:
+        fcntl.flock(lock_handle, fcntl.LOCK_SH)
+        yield
+
+
+def _needs_rotation(config: KoeConfig, path: Path, /) -> bool:
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return False
+    if size >= config["log_rotate_bytes"]:
+        return True
+    if size == 0 or config["log_rotate_days"] <= 0:
+        return False
+    with path.open("rb") as handle:
+        started_at = _record_time(handle.readline())
+    if started_at is None:
+        return False
+    return datetime.now(UTC) - started_at >= timedelta(days=config["log_rotate_days"])
+
+
+def _rotate_log(path: Path, /) -> None:
+    """Move the live log aside, gzip it into a 0o600 segment and record it in the manifest.
+
+    The caller holds the exclusive rotation lock, so no append can land in the
+    renamed file and the manifest has a single writer.
+    """
+    stamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%S%fZ")
+    rotated_path = path.with_name(f"{path.stem}-{stamp}{path.suffix}")
+    segment_path = rotated_path.with_name(f"{rotated_path.name}.gz")
+    inode = path.stat().st_ino
+    path.rename(rotated_path)
+
+    records = 0
+    first_line = last_line = b""
+    segment_descriptor = os.open(segment_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+    with (
+        rotated_path.open("rb") as source,
+        os.fdopen(segment_descriptor, "wb") as raw_segment,
+        gzip.GzipFile(fileobj=raw_segment, mode="wb") as segment,
+    ):
+        for line in source:
+            segment.write(line)
+            first_line = first_line or line
+            last_line = line
+            records += 1
+        size = source.tell()
+
+    first, last = _record_time(first_line), _record_time(last_line)
+    segments = [
+        *read_log_manifest(path),
+        {
+            "name": segment_path.name,
+            "inode": inode,
+            "bytes": size,
+            "records": records,
+            "first": None if first is None else first.isoformat(),
+            "last": None if last is None else last.isoformat(),
+        },
+    ]
+    _write_private_json(_manifest_path(path), {"segments": segments})
+    rotated_path.unlink()
+
+
+def _record_time(line: bytes, /) -> datetime | None:
+    """UTC time of a usage (invoked_at) or transcription (timestamp) record line."""
+    try:
+        record = json.loads(line)
+        moment = datetime.fromisoformat(record.get("invoked_at") or record["timestamp"])
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return None
+    return moment if moment.tzinfo is None else moment.astimezone(UTC)
+
+
+def _write_private_json(path: Path, payload: object, /) -> None:
+    staging_path = path.with_name(f"{path.name}.tmp")
+    file_descriptor = os.open(staging_path, os.O_CREAT | os.O_TRUNC | os.O_WRONLY, 0o600)
+    with os.fdopen(file_descriptor, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle)
+    staging_path.replace(path)
+
+
+def _manifest_path(path: Path, /) -> Path:
+    return path.with_name(f"{path.stem}.manifest.json")
+
+
+def _rotation_lock_path(path: Path, /) -> Path:
+    return path.with_name(f".{path.name}.lock")
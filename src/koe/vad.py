@@ -0,0 +1,132 @@
+"""Vectorized energy-based voice-activity helpers over float32 capture buffers.
+
+Imported lazily by koe.audio once a recording is underway, so numpy stays off
+the hotkey stop path.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Protocol
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from numpy.typing import NDArray
+
+_ENERGY_FRAME_SECONDS = 0.02
+
+
+class FrameReader(Protocol):
+    """Sequential float32 reader; soundfile.SoundFile satisfies this structurally."""
+
+    def read(self, frames: int, dtype: str) -> NDArray[np.float32]: ...
+
+
+def to_mono(frames: NDArray[np.float32], /) -> NDArray[np.float32]:
+    """Flatten (frames, channels) capture blocks to 1-D mono, averaging channels."""
+    if frames.ndim == 1:
+        return frames
+    if frames.shape[1] == 1:
+        return frames.reshape(-1)
+    return frames.mean(axis=1, dtype=np.float32)
+
+
+def frame_rms(samples: NDArray[np.float32], /, *, sample_rate: int) -> NDArray[np.float64]:
+    """RMS energy of consecutive 20 ms frames; a trailing partial frame uses what it has."""
+    frame_length = int(_ENERGY_FRAME_SECONDS * sample_rate)
+    starts = np.arange(0, samples.size, frame_length)
+    if starts.size == 0:
+        return np.zeros(0, dtype=np.float64)
+    lengths = np.diff(starts, append=samples.size)
+    return np.sqrt(np.add.reduceat(np.square(samples, dtype=np.float64), starts) / lengths)
+
+
+def silent_frames(
+    samples: NDArray[np.float32], /, *, sample_rate: int, threshold: float
+) -> NDArray[np.bool_]:
+    """Classify consecutive 20 ms energy frames as silent by RMS threshold."""
+    return frame_rms(samples, sample_rate=sample_rate) < threshold
+
+
+def speech_bounds(
+    samples: NDArray[np.float32],
+    /,
+    *,
+    sample_rate: int,
+    threshold: float,
+    padding_seconds: float,
+) -> tuple[int, int] | None:
+    """Return padded [start, end) sample bounds around voiced frames, or None if none are."""
+    voiced = np.flatnonzero(~silent_frames(samples, sample_rate=sample_rate, threshold=threshold))
+    if voiced.size == 0:
+        return None
+
+    frame_length = int(_ENERGY_FRAME_SECONDS * sample_rate)
+    padding = int(padding_seconds * sample_rate)
+    start = max(0, int(voiced[0]) * frame_length - padding)
+    end = min(samples.size, (int(voiced[-1]) + 1) * frame_length + padding)
+    return (start, end)
+
+
+def find_silence_cut(
+    samples: NDArray[np.float32],
+    /,
+    *,
+    sample_rate: int,
+    min_frames: int,
+    silence_seconds: float,
+    threshold: float,
+) -> int | None:
+    """Return a sample index inside the last silence gap ending past min_frames.
+
+    A gap is a run of at least silence_seconds of silent energy frames; the
+    cut lands in its middle so neither side clips speech. Returns None when no
+    such gap exists yet.
+    """
+    frame_length = int(_ENERGY_FRAME_SECONDS * sample_rate)
+    gap_frames = max(1, round(silence_seconds / _ENERGY_FRAME_SECONDS))
+    silent = silent_frames(samples, sample_rate=sample_rate, threshold=threshold)
+    if silent.size < gap_frames:
+        return None
+
+    run_lengths = np.convolve(silent.astype(np.int32), np.ones(gap_frames, dtype=np.int32), "valid")
+    gap_starts = np.flatnonzero(run_lengths == gap_frames)
+    cut_samples = (gap_starts + gap_frames // 2) * frame_length
+    eligible = cut_samples[cut_samples >= min_frames]
+    if eligible.size == 0:
+        return None
+    return int(eligible[-1])
+
+
+def quietest_cut(samples: NDArray[np.float32], /, *, sample_rate: int, min_frames: int) -> int:
+    """Return the start of the lowest-energy 20 ms frame at or after min_frames."""
+    frame_length = int(_ENERGY_FRAME_SECONDS * sample_rate)
+    first_frame = -(-min_frames // frame_length)
+    energy = frame_rms(samples, sample_rate=sample_rate)[first_frame:]
+    if energy.size == 0:
+        return samples.size
+    return (first_frame + int(np.argmin(energy))) * frame_length
+
+
+def iter_quiet_windows(
+    reader: FrameReader, /, *, sample_rate: int, window_frames: int
+) -> Iterator[NDArray[np.float32]]:
+    """Read mono windows of at most window_frames, each cut at its quietest point.
+
+    The cut lands in the back half of a full window, so words are rarely split
+    and at most one window plus its carried-over remainder is held in memory.
+    """
+    carry = np.zeros(0, dtype=np.float32)
+    while True:
+        block = to_mono(reader.read(window_frames - carry.size, dtype="float32"))
+        pending = np.concatenate([carry, block]) if carry.size > 0 else block
+        if pending.size < window_frames:
+            if pending.size > 0:
+                yield pending
+            return
+
+        cut = quietest_cut(pending, sample_rate=sample_rate, min_frames=window_frames // 2)
+        yield pending[:cut]
+        carry = pending[cut:]
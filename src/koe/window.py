@@ -4,21 +4,31 @@ from __future__ import annotations
 
 import json
 import os
-import shutil
 import subprocess
+from typing import TYPE_CHECKING
 
+from koe.backend import session_backend, tool_command
+from koe.hyprland import query_active_window
 from koe.types import DependencyError, FocusedWindow, FocusError, Result, WindowId
+from koe.x11 import query_focused_window
+
+if TYPE_CHECKING:
+    from koe.backend import Backend
 
 
 def check_x11_context() -> Result[None, DependencyError]:
-    """Validate DISPLAY and xdotool availability before focus probing."""
-    if _is_wayland_session():
-        if shutil.which("hyprctl") is None:
+    """Validate DISPLAY and xdotool availability before focus probing.
+
+    On Wayland the Hyprland IPC socket stands in for hyprctl.
+    """
+    backend = session_backend()
+    if backend["session"] == "wayland":
+        if backend["focus"] == "hyprctl" and backend["tools"]["hyprctl"] is None:
             return {
                 "ok": False,
                 "error": {
                     "category": "dependency",
-                    "message": "hyprctl is required on Wayland sessions",
+                    "message": "hyprctl or the Hyprland IPC socket is required on Wayland sessions",
                     "missing_tool": "hyprctl",
                 },
             }
@@ -35,7 +45,7 @@ def check_x11_context() -> Result[None, DependencyError]:
             },
         }
 
-    if shutil.which("xdotool") is None:
+    if backend["tools"]["xdotool"] is None:
         return {
             "ok": False,
             "error": {
@@ -60,12 +70,19 @@ def check_focused_window() -> Result[FocusedWindow, FocusError]:  # noqa: PLR091
             },
         }
 
-    if _is_wayland_session():
-        return _check_wayland_focused_window()
+    backend = session_backend()
+    if backend["session"] == "wayland":
+        return _check_wayland_focused_window(backend)
 
+    if backend["focus"] == "xlib":
+        native_result = query_focused_window()
+        if native_result is not None:
+            return native_result
+
+    xdotool = tool_command(backend, "xdotool")
     try:
         window_id_result = subprocess.run(
-            ["xdotool", "getwindowfocus"],
+            [xdotool, "getwindowfocus"],
             check=False,
             capture_output=True,
             text=True,
@@ -110,7 +127,7 @@ def check_focused_window() -> Result[FocusedWindow, FocusError]:  # noqa: PLR091
         }
 
     title_result = subprocess.run(
-        ["xdotool", "getwindowname", window_id_text],
+        [xdotool, "getwindowname", window_id_text],
         check=False,
         capture_output=True,
         text=True,
@@ -126,20 +143,18 @@ def check_focused_window() -> Result[FocusedWindow, FocusError]:  # noqa: PLR091
     }
 
 
-def _is_wayland_session() -> bool:
-    backend_override = os.environ.get("KOE_BACKEND")
-    if backend_override == "wayland":
-        return True
-    if backend_override == "x11":
-        return False
-
-    return os.environ.get("XDG_SESSION_TYPE") == "wayland" and not bool(os.environ.get("DISPLAY"))
+def _check_wayland_focused_window(backend: Backend, /) -> Result[FocusedWindow, FocusError]:
+    if backend["focus"] == "hyprland_ipc":
+        ipc_result = query_active_window()
+        if ipc_result is not None:
+            return ipc_result
+    return _check_hyprctl_focused_window(backend)
 
 
-def _check_wayland_focused_window() -> Result[FocusedWindow, FocusError]:
+def _check_hyprctl_focused_window(backend: Backend, /) -> Result[FocusedWindow, FocusError]:
     try:
         active_window = subprocess.run(
-            ["hyprctl", "activewindow", "-j"],
+            [tool_command(backend, "hyprctl"), "activewindow", "-j"],
             check=False,
             capture_output=True,
             text=True,
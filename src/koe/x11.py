@@ -0,0 +1,282 @@
+"""In-process X11 backend holding one Xlib display connection.
+
+Focus lookups and the paste chord travel over one long-lived connection
+instead of forking xdotool per call, and the CLIPBOARD selection can be owned
+in-process instead of through xclip. python-xlib is imported on first use;
+whenever it or the display is unavailable these functions return None and
+callers fall back to the subprocess tools.
+
+Owning a selection means answering every paste request for as long as the text
+should stay pasteable, so the clipboard owner only runs in a resident process.
+A one-shot invocation exits right after pasting and keeps xclip, which forks
+to go on serving.
+"""
+
+from __future__ import annotations
+
+import importlib
+from contextlib import suppress
+from functools import cache
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, Any, TypedDict
+
+from koe.types import WindowId
+
+if TYPE_CHECKING:
+    from types import ModuleType
+
+    from koe.types import FocusedWindow, FocusError, Result
+
+_MODIFIER_KEYSYMS: dict[str, str] = {
+    "ctrl": "Control_L",
+    "shift": "Shift_L",
+    "alt": "Alt_L",
+    "super": "Super_L",
+}
+# Index of Lock in the modifier mapping; Caps Lock latches, so it is never released.
+_LOCK_MODIFIER_INDEX = 1
+# Focus values X reports when no window has it: None and PointerRoot.
+_NO_FOCUS_IDS = frozenset({0, 1})
+# Larger selections need the INCR transfer protocol; xclip handles those.
+_MAX_SELECTION_BYTES = 64 * 1024
+
+_connection_lock = Lock()
+_connection: dict[str, Any] = {}
+_clipboard_lock = Lock()
+_clipboard: dict[str, Any] = {}
+
+
+class _Xlib(TypedDict):
+    display: ModuleType
+    X: ModuleType
+    XK: ModuleType
+    Xatom: ModuleType
+    event: ModuleType
+    xtest: ModuleType
+    errors: tuple[type[Exception], ...]
+
+
+def query_focused_window() -> Result[FocusedWindow, FocusError] | None:
+    """Focused top-level window and its title; None when the native backend is unavailable.
+
+    Reads the EWMH active window, or the input focus when the window manager
+    does not publish one, then the window's UTF-8 title.
+    """
+    xlib = _load_xlib()
+    if xlib is None:
+        return None
+    with _connection_lock:
+        display = _shared_display(xlib)
+        if display is None:
+            return None
+        try:
+            window_id = _focused_window_id(display, xlib)
+            title = "" if window_id in _NO_FOCUS_IDS else _window_title(display, window_id, xlib)
+        except xlib["errors"]:
+            _drop_shared_display(xlib)
+            return None
+
+    if window_id in _NO_FOCUS_IDS:
+        return {"ok": False, "error": {"category": "focus", "message": "no focused window"}}
+    return {"ok": True, "value": {"window_id": WindowId(window_id), "title": title}}
+
+
+def send_paste_chord(chord: str, /) -> Result[None, str] | None:
+    """Press and release chord (such as ctrl+v) through XTest; None without the backend.
+
+    Like xdotool's --clearmodifiers, modifiers the user still holds (often the
+    hotkey's own) are released around the chord and pressed again afterwards.
+    """
+    xlib = _load_xlib()
+    if xlib is None:
+        return None
+    with _connection_lock:
+        display = _shared_display(xlib)
+        if display is None or not display.has_extension("XTEST"):
+            return None
+        keysyms = [_MODIFIER_KEYSYMS.get(part, part) for part in chord.split("+")]
+        keycodes = [
+            display.keysym_to_keycode(xlib["XK"].string_to_keysym(keysym)) for keysym in keysyms
+        ]
+        if 0 in keycodes:
+            return {"ok": False, "error": f"no keycode for {chord}"}
+        try:
+            held = _held_modifier_keycodes(display)
+            for keycode in held:
+                xlib["xtest"].fake_input(display, xlib["X"].KeyRelease, keycode)
+            for keycode in keycodes:
+                xlib["xtest"].fake_input(display, xlib["X"].KeyPress, keycode)
+            for keycode in reversed(keycodes):
+                xlib["xtest"].fake_input(display, xlib["X"].KeyRelease, keycode)
+            for keycode in held:
+                xlib["xtest"].fake_input(display, xlib["X"].KeyPress, keycode)
+            display.sync()
+        except xlib["errors"] as error:
+            _drop_shared_display(xlib)
+            return {"ok": False, "error": f"XTest failed: {error}"}
+    return {"ok": True, "value": None}
+
+
+def start_clipboard_owner() -> bool:
+    """Serve the CLIPBOARD selection from this process from now on; False without X."""
+    xlib = _load_xlib()
+    if xlib is None:
+        return False
+    try:
+        display = xlib["display"].Display()
+    except xlib["errors"]:
+        return False
+    try:
+        window = display.screen().root.create_window(0, 0, 1, 1, 0, xlib["X"].CopyFromParent)
+    except xlib["errors"]:
+        _close_display(display, xlib)
+        return False
+    with _clipboard_lock:
+        _clipboard.update(display=display, window=window, text=None)
+    Thread(target=_serve_clipboard, args=(display, xlib), name="koe-clipboard", daemon=True).start()
+    return True
+
+
+def set_clipboard_text(text: str, /) -> Result[None, str] | None:
+    """Own CLIPBOARD holding text; None when no owner runs or text is too large to serve."""
+    encoded = text.encode()
+    xlib = _load_xlib()
+    with _clipboard_lock:
+        if xlib is None or "display" not in _clipboard or len(encoded) > _MAX_SELECTION_BYTES:
+            return None
+        display, window = _clipboard["display"], _clipboard["window"]
+        _clipboard["text"] = encoded
+        try:
+            clipboard = display.intern_atom("CLIPBOARD")
+            window.set_selection_owner(clipboard, xlib["X"].CurrentTime)
+            owner = display.get_selection_owner(clipboard)
+        except xlib["errors"] as error:
+            return {"ok": False, "error": f"unable to own CLIPBOARD: {error}"}
+    if owner != window:
+        return {"ok": False, "error": "another client kept CLIPBOARD ownership"}
+    return {"ok": True, "value": None}
+
+
+@cache
+def _load_xlib() -> _Xlib | None:
+    try:
+        # Xlib.threaded makes connections safe to share between threads.
+        importlib.import_module("Xlib.threaded")
+        error = importlib.import_module("Xlib.error")
+        return {
+            "display": importlib.import_module("Xlib.display"),
+            "X": importlib.import_module("Xlib.X"),
+            "XK": importlib.import_module("Xlib.XK"),
+            "Xatom": importlib.import_module("Xlib.Xatom"),
+            "event": importlib.import_module("Xlib.protocol.event"),
+            "xtest": importlib.import_module("Xlib.ext.xtest"),
+            "errors": (OSError, error.DisplayError, error.ConnectionClosedError, error.XError),
+        }
+    except ImportError:
+        return None
+
+
+def _shared_display(xlib: _Xlib, /) -> Any | None:  # noqa: ANN401 - Xlib Display via importlib
+    """The shared connection, opened on first use and again after a failure."""
+    if "display" not in _connection:
+        try:
+            _connection["display"] = xlib["display"].Display()
+        except xlib["errors"]:
+            return None
+    return _connection["display"]
+
+
+def _drop_shared_display(xlib: _Xlib, /) -> None:
+    """Close the shared connection after an error; the next call opens a fresh one."""
+    display = _connection.pop("display", None)
+    if display is not None:
+        _close_display(display, xlib)
+
+
+def _close_display(display: Any, xlib: _Xlib, /) -> None:  # noqa: ANN401
+    # A connection that already broke can fail to close; its socket is released either way.
+    with suppress(*xlib["errors"]):
+        display.close()
+
+
+def _held_modifier_keycodes(display: Any, /) -> list[int]:  # noqa: ANN401
+    """Return the modifier keycodes currently pressed, per the server's keymap."""
+    keymap = display.query_keymap()
+    return [
+        keycode
+        for index, keycodes in enumerate(display.get_modifier_mapping())
+        if index != _LOCK_MODIFIER_INDEX
+        for keycode in keycodes
+        if keycode and keymap[keycode // 8] & (1 << (keycode % 8))
+    ]
+
+
+def _focused_window_id(display: Any, xlib: _Xlib, /) -> int:  # noqa: ANN401
+    root = display.screen().root
+    active = root.get_full_property(display.intern_atom("_NET_ACTIVE_WINDOW"), xlib["Xatom"].WINDOW)
+    if active is not None and len(active.value) > 0:
+        return int(active.value[0])
+    focus = display.get_input_focus().focus
+    return focus if isinstance(focus, int) else int(focus.id)
+
+
+def _window_title(display: Any, window_id: int, xlib: _Xlib, /) -> str:  # noqa: ANN401
+    window = display.create_resource_object("window", window_id)
+    name = window.get_full_property(
+        display.intern_atom("_NET_WM_NAME"), display.intern_atom("UTF8_STRING")
+    )
+    if name is not None:
+        return bytes(name.value).decode(errors="replace")
+    legacy = window.get_full_property(xlib["Xatom"].WM_NAME, xlib["X"].AnyPropertyType)
+    if legacy is None:
+        return ""
+    value = legacy.value
+    return value.decode("latin-1") if isinstance(value, bytes) else str(value)
+
+
+def _serve_clipboard(display: Any, xlib: _Xlib, /) -> None:  # noqa: ANN401
+    """Answer selection requests until the connection drops."""
+    while True:
+        try:
+            event = display.next_event()
+            if event.type == xlib["X"].SelectionRequest:
+                _answer_selection_request(display, event, xlib)
+            elif event.type == xlib["X"].SelectionClear:
+                with _clipboard_lock:
+                    _clipboard["text"] = None
+        except xlib["errors"]:
+            with _clipboard_lock:
+                _clipboard.clear()
+            _close_display(display, xlib)
+            return
+
+
+def _answer_selection_request(display: Any, request: Any, xlib: _Xlib, /) -> None:  # noqa: ANN401
+    targets = display.intern_atom("TARGETS")
+    utf8_string = display.intern_atom("UTF8_STRING")
+    string = xlib["Xatom"].STRING
+    # Obsolete requestors leave property unset and expect the target as property.
+    prop = request.property or request.target
+    with _clipboard_lock:
+        text = _clipboard.get("text")
+
+    if text is None:
+        prop = xlib["X"].NONE
+    elif request.target == targets:
+        request.requestor.change_property(
+            prop, xlib["Xatom"].ATOM, 32, [targets, utf8_string, string]
+        )
+    elif request.target in {utf8_string, string}:
+        request.requestor.change_property(prop, request.target, 8, text)
+    else:
+        prop = xlib["X"].NONE
+
+    notify = xlib["event"].SelectionNotify(
+        time=request.time,
+        requestor=request.requestor,
+        selection=request.selection,
+        target=request.target,
+        property=prop,
+    )
+    request.requestor.send_event(notify)
+    display.flush()
@@ -0,0 +1,187 @@
+"""`koe zygote`: a parked, pre-imported process that forks one child per hotkey press.
+
+A bare `koe` spends most of its first second importing numpy, sounddevice and
+faster-whisper and initialising PortAudio before the microphone opens. The
+zygote pays that once: it imports everything, parks on a Unix socket and forks
+a child for each press, so the child starts with warm imports and goes straight
+to opening the stream. The parent never runs a session, starts no threads and
+never touches CUDA. Its PortAudio device list dates from the zygote's start,
+though, so each child re-initialises PortAudio before recording and sees
+devices plugged in since; that re-scan still costs far less than the imports.
+
+Each connection is one press. The child answers {"started": true} as soon as
+it exists and {"exit_code": N} once its session ends, so the hotkey client
+exits with the same code an in-process run would have.
+"""
+
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import signal
+import socket
+import sys
+from contextlib import suppress
+from threading import Event
+from typing import TYPE_CHECKING, cast
+
+from koe.daemon import bind_daemon_socket
+from koe.notify import flush_notifications
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from io import BufferedReader
+    from types import FrameType
+
+    from koe.config import KoeConfig
+    from koe.types import ExitCode
+
+# Imported before parking; sounddevice initialises PortAudio on import.
+_WARM_MODULES = ("numpy", "sounddevice", "soundfile", "koe.vad", "faster_whisper")
+_CONNECT_TIMEOUT_SECONDS = 0.5
+# A parent that accepted but never forked (shutting down) must not hang the press.
+_START_TIMEOUT_SECONDS = 2.0
+_MAX_REPLY_BYTES = 4096
+
+
+def run_zygote(config: KoeConfig, session: Callable[[], ExitCode], /) -> ExitCode:
+    """Warm the imports, then fork a child running session per connection until signalled.
+
+    The socket is bound only once the imports are warm, so a reachable zygote
+    is always a warm one; presses before that run in-process as usual.
+    """
+    for module in _WARM_MODULES:
+        try:
+            importlib.import_module(module)
+        except (ImportError, OSError) as error:
+            print(f"koe zygote: {module} not preloaded: {error}", file=sys.stderr)
+
+    listener_result = bind_daemon_socket(config["zygote_socket_path"])
+    if listener_result["ok"] is False:
+        print(f"koe zygote: {listener_result['error']}", file=sys.stderr)
+        return 1
+
+    listener = listener_result["value"]
+    shutdown_event = Event()
+
+    def _handle_shutdown(_signum: int, _frame: FrameType | None) -> None:
+        shutdown_event.set()
+
+    signal.signal(signal.SIGTERM, _handle_shutdown)
+    signal.signal(signal.SIGINT, _handle_shutdown)
+
+    try:
+        while not shutdown_event.is_set():
+            _reap_children()
+            try:
+                connection, _address = listener.accept()
+            except OSError:
+                continue
+
+            with connection:
+                pid = os.fork()
+                if pid == 0:
+                    listener.close()
+                    _run_forked_session(connection, session)
+    finally:
+        # Sessions still running finish on their own; only the parent goes away.
+        listener.close()
+        with suppress(OSError):
+            config["zygote_socket_path"].unlink()
+    return 0
+
+
+def request_zygote_session(config: KoeConfig, /) -> ExitCode | None:
+    """Hand this press to a running zygote and wait for its session's exit code.
+
+    Returns None when no zygote is reachable or it never forks a child, so the
+    caller can run the session in-process instead.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with client:
+        try:
+            client.settimeout(_CONNECT_TIMEOUT_SECONDS)
+            client.connect(str(config["zygote_socket_path"]))
+            client.settimeout(_START_TIMEOUT_SECONDS)
+            with client.makefile("rb") as reader:
+                if _read_reply(reader).get("started") is not True:
+                    return None
+                # The session lasts as long as the user keeps talking.
+                client.settimeout(None)
+                exit_code = _read_reply(reader).get("exit_code")
+        except OSError:
+            return None
+
+    if exit_code in (0, 1, 2):
+        return exit_code
+    # The child died without reporting; count it as an unexpected error.
+    return 2
+
+
+def is_zygote_running(config: KoeConfig, /) -> bool:
+    """Return True when a zygote is accepting connections on the configured socket."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with probe:
+        probe.settimeout(_CONNECT_TIMEOUT_SECONDS)
+        try:
+            probe.connect(str(config["zygote_socket_path"]))
+        except OSError:
+            return False
+    return True
+
+
+def _run_forked_session(connection: socket.socket, session: Callable[[], ExitCode], /) -> None:
+    """Child side of a fork: run one session and leave without returning to the parent's loop."""
+    exit_code: ExitCode = 2
+    try:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        connection.settimeout(None)
+        _send_reply(connection, {"started": True})
+        _refresh_audio_devices()
+        exit_code = session()
+        _send_reply(connection, {"exit_code": exit_code})
+    except BaseException:
+        # Nothing may unwind into the parent's accept loop.
+        exit_code = 2
+    finally:
+        # os._exit skips atexit and buffered output, so drain both first.
+        with suppress(BaseException):
+            flush_notifications()
+            sys.stdout.flush()
+            sys.stderr.flush()
+        os._exit(exit_code)
+
+
+def _refresh_audio_devices() -> None:
+    """Re-initialise the inherited PortAudio so newly plugged devices are visible.
+
+    On failure the session's own stream open reports the audio error.
+    """
+    sounddevice = sys.modules.get("sounddevice")
+    if sounddevice is None:
+        return
+    # sounddevice has no public re-scan; its query_devices docs point to these.
+    with suppress(Exception):
+        sounddevice._terminate()
+        sounddevice._initialize()
+
+
+def _reap_children() -> None:
+    with suppress(ChildProcessError):
+        while os.waitpid(-1, os.WNOHANG) != (0, 0):
+            pass
+
+
+def _send_reply(connection: socket.socket, reply: dict[str, object], /) -> None:
+    connection.sendall(f"{json.dumps(reply)}\n".encode())
+
+
+def _read_reply(reader: BufferedReader, /) -> dict[str, object]:
+    line = reader.readline(_MAX_REPLY_BYTES)
+    try:
+        payload = json.loads(line)
+    except ValueError:
+        return {}
+    return cast("dict[str, object]", payload) if isinstance(payload, dict) else {}
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pytest
+
+from koe import notify
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+
+@pytest.fixture(autouse=True)
+def _isolate_pipeline_from_resident_daemon() -> Iterator[None]:
+    """Keep pipeline tests off any host daemon, zygote, control socket and real model load."""
+    with (
+        patch("koe.main.request_zygote_session", return_value=None),
+        patch("koe.main.send_control_command", return_value=None),
+        patch("koe.main.start_control_server", return_value={"ok": True, "value": None}),
+        patch("koe.main.stop_control_server"),
+        patch("koe.main.is_daemon_running", return_value=False),
+        patch("koe.main.request_daemon_transcription", return_value=None),
+        patch("koe.main.start_model_load", return_value=None),
+    ):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def _isolate_stage_timings() -> Iterator[None]:
+    """Start every test with an empty stage-duration map."""
+    with patch.dict("koe.stages._stage_durations_ms", clear=True):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def _isolate_from_host_display_server() -> Iterator[None]:
+    """Send X11 and Hyprland calls to the mocked subprocess tools, whatever the host runs."""
+    with (
+        patch.dict("koe.backend._resolved", clear=True),
+        patch("koe.window.query_focused_window", return_value=None),
+        patch("koe.window.query_active_window", return_value=None),
+        patch("koe.insert.send_shortcut", return_value=None),
+        patch("koe.insert.set_clipboard_text", return_value=None),
+        patch("koe.insert.send_paste_chord", return_value=None),
+    ):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def _isolate_from_host_session_bus(tmp_path: Path) -> Iterator[None]:
+    """Point D-Bus at a socket that does not exist, so no test notifies the host desktop."""
+    with patch.dict(
+        os.environ, {"DBUS_SESSION_BUS_ADDRESS": f"unix:path={tmp_path / 'absent-bus'}"}
+    ):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def _drain_notifications() -> Iterator[None]:
+    """Deliver a test's queued notifications before the next test patches subprocess.run."""
+    yield
+    notify.flush_notifications()
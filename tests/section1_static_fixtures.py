@@ -95,6 +95,7 @@ def t16_pipeline_outcome_is_closed(outcome: PipelineOutcome) -> None:
         case (
             "success"
             | "signaled_stop"
+            | "cancelled"
             | "no_focus"
             | "no_speech"
             | "error_dependency"
@@ -118,8 +119,8 @@ def t17_exit_code_is_closed(code: ExitCode) -> None:
 
 
 def t18_whisper_device_literal_is_preserved(config: KoeConfig) -> None:
-    assert_type(config["whisper_device"], Literal["cuda"])
-    assert_type(DEFAULT_CONFIG["whisper_device"], Literal["cuda"])
+    assert_type(config["whisper_device"], Literal["auto", "cuda", "cpu"])
+    assert_type(DEFAULT_CONFIG["whisper_device"], Literal["auto", "cuda", "cpu"])
 
 
 def t21_run_pipeline_signature_contract() -> None:
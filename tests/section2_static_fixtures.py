@@ -48,6 +48,7 @@ def t06_pipeline_outcome_includes_already_running(outcome: PipelineOutcome) -> N
         case (
             "success"
             | "signaled_stop"
+            | "cancelled"
             | "no_focus"
             | "no_speech"
             | "error_dependency"
@@ -2,13 +2,23 @@ from __future__ import annotations
 
 from typing import assert_never, assert_type
 
-from koe.types import AudioArtifactPath, AudioCaptureResult, AudioError, NotificationKind
+from koe.types import (
+    AudioArtifactPath,
+    AudioCaptureResult,
+    AudioError,
+    AudioSamples,
+    NotificationKind,
+)
 
 
 def t04_audio_capture_result_is_closed(result: AudioCaptureResult) -> None:
     match result["kind"]:
         case "captured":
             assert_type(result["artifact_path"], AudioArtifactPath)
+        case "buffered":
+            assert_type(result["samples"], AudioSamples)
+        case "spilled":
+            assert_type(result["artifact_path"], AudioArtifactPath)
         case "empty":
             return
         case "error":
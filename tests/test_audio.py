@@ -1,13 +1,28 @@
 from __future__ import annotations
 
+import importlib
+import os
+import time
 from pathlib import Path
-from typing import cast
+from threading import Event, Thread
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, cast
 from unittest.mock import patch
 
+import numpy as np
+import soundfile
+
 from koe.audio import capture_audio, remove_audio_artifact
 from koe.config import DEFAULT_CONFIG, KoeConfig
 from koe.types import AudioArtifactPath
 
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from contextlib import AbstractContextManager
+
+SPEECH_FRAMES = 19_200
+PAUSE_FRAMES = 8_000
+
 
 def _audio_config(temp_dir: Path) -> KoeConfig:
     return cast("KoeConfig", {**DEFAULT_CONFIG, "temp_dir": temp_dir})
@@ -100,3 +115,282 @@ def test_remove_audio_artifact_is_safe_for_missing_file(tmp_path: Path) -> None:
 
     assert remove_audio_artifact(artifact) is None
     assert remove_audio_artifact(artifact) is None
+
+
+class _FakeInputStream:
+    def __init__(self, blocks: list[object], **kwargs: object) -> None:
+        self._blocks = blocks
+        self._callback = cast("Callable[..., None]", kwargs["callback"])
+
+    def __enter__(self) -> _FakeInputStream:
+        for block in self._blocks:
+            self._callback(block, len(cast("list[object]", block)), None, None)
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        return None
+
+
+def _patched_sounddevice(blocks: list[object]) -> AbstractContextManager[object]:
+    def _input_stream(**kwargs: object) -> _FakeInputStream:
+        return _FakeInputStream(blocks, **kwargs)
+
+    return _patched_input_stream(_input_stream)
+
+
+def _patched_input_stream(input_stream: Callable[..., object]) -> AbstractContextManager[object]:
+    fake_sounddevice = SimpleNamespace(InputStream=input_stream)
+    real_import = importlib.import_module
+
+    def _import(name: str) -> object:
+        if name == "sounddevice":
+            return fake_sounddevice
+        return real_import(name)
+
+    return patch("koe.audio.importlib.import_module", side_effect=_import)
+
+
+def _stopped() -> Event:
+    stop_event = Event()
+    stop_event.set()
+    return stop_event
+
+
+def test_capture_audio_hands_samples_over_in_memory_without_wav(tmp_path: Path) -> None:
+    config = _audio_config(tmp_path)
+    blocks: list[object] = [
+        np.array([[0.1], [0.2]], dtype=np.float32),
+        np.array([[0.3]], dtype=np.float32),
+    ]
+
+    with (
+        _patched_sounddevice(blocks),
+        patch("koe.audio.soundfile.write", create=True) as write_mock,
+    ):
+        result = capture_audio(config, stop_event=_stopped())
+
+    assert result["kind"] == "buffered"
+    samples = cast("np.ndarray[tuple[int], np.dtype[np.float32]]", result["samples"])
+    assert samples.shape == (3,)
+    assert samples.dtype == np.float32
+    np.testing.assert_allclose(samples, [0.1, 0.2, 0.3])
+    write_mock.assert_not_called()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_capture_audio_reports_only_the_first_frame(tmp_path: Path) -> None:
+    blocks: list[object] = [
+        np.array([[0.1]], dtype=np.float32),
+        np.array([[0.2]], dtype=np.float32),
+    ]
+    first_frames: list[None] = []
+
+    with _patched_sounddevice(blocks):
+        capture_audio(
+            _audio_config(tmp_path),
+            stop_event=_stopped(),
+            on_first_frame=lambda: first_frames.append(None),
+        )
+
+    assert first_frames == [None]
+
+
+def test_capture_audio_archives_wav_copy_when_archive_dir_configured(tmp_path: Path) -> None:
+    archive_dir = tmp_path / "archive"
+    config = cast("KoeConfig", {**_audio_config(tmp_path), "audio_archive_dir": archive_dir})
+    blocks: list[object] = [np.array([[0.5]], dtype=np.float32)]
+
+    with (
+        _patched_sounddevice(blocks),
+        patch("koe.audio.soundfile.write", create=True) as write_mock,
+    ):
+        result = capture_audio(config, stop_event=_stopped())
+
+    assert result["kind"] == "buffered"
+    write_mock.assert_called_once()
+    archive_path = write_mock.call_args.args[0]
+    assert archive_path.parent == archive_dir
+    assert archive_path.suffix == ".wav"
+
+
+def test_capture_audio_persists_wav_when_sample_rate_is_not_whisper_native(
+    tmp_path: Path,
+) -> None:
+    config = cast("KoeConfig", {**_audio_config(tmp_path), "sample_rate": 44_100})
+    blocks: list[object] = [np.array([[0.5]], dtype=np.float32)]
+
+    with (
+        _patched_sounddevice(blocks),
+        patch("koe.audio.soundfile.write", create=True) as write_mock,
+    ):
+        result = capture_audio(config, stop_event=_stopped())
+
+    assert result["kind"] == "captured"
+    assert Path(result["artifact_path"]).parent == tmp_path
+    write_mock.assert_called_once()
+    remove_audio_artifact(result["artifact_path"])
+
+
+def test_capture_audio_emits_window_at_pause_while_recording(tmp_path: Path) -> None:
+    config = cast(
+        "KoeConfig",
+        {
+            **_audio_config(tmp_path),
+            "stream_window_seconds": 1.0,
+            "stream_silence_seconds": 0.3,
+        },
+    )
+    speech = np.full((SPEECH_FRAMES, 1), 0.5, dtype=np.float32)
+    pause = np.zeros((PAUSE_FRAMES, 1), dtype=np.float32)
+    blocks: list[object] = [speech, pause, speech[:8_000]]
+    windows: list[object] = []
+    stop_event = Event()
+
+    def _on_window(samples: object) -> None:
+        windows.append(samples)
+        stop_event.set()
+
+    with (
+        _patched_sounddevice(blocks),
+        patch("koe.audio._WINDOW_POLL_SECONDS", 0.01),
+    ):
+        result = capture_audio(config, stop_event=stop_event, on_window=_on_window)
+
+    assert len(windows) == 1
+    window = cast("np.ndarray[tuple[int], np.dtype[np.float32]]", windows[0])
+    assert SPEECH_FRAMES < window.size < SPEECH_FRAMES + PAUSE_FRAMES
+    assert result["kind"] == "buffered"
+    assert result["samples"].size == SPEECH_FRAMES + PAUSE_FRAMES + 8_000
+
+
+def test_capture_audio_trims_leading_and_trailing_silence(tmp_path: Path) -> None:
+    config = cast("KoeConfig", {**_audio_config(tmp_path), "vad_padding_seconds": 0.1})
+    silence = np.zeros((16_000, 1), dtype=np.float32)
+    speech = np.full((SPEECH_FRAMES, 1), 0.5, dtype=np.float32)
+
+    with _patched_sounddevice([silence, speech, silence]):
+        result = capture_audio(config, stop_event=_stopped())
+
+    assert result["kind"] == "buffered"
+    padding_frames = 1_600
+    assert result["samples"].size == SPEECH_FRAMES + 2 * padding_frames
+    assert result.get("trimmed_seconds") == (2 * 16_000 - 2 * padding_frames) / 16_000
+
+
+def test_capture_audio_routes_speechless_capture_to_empty_without_wav(tmp_path: Path) -> None:
+    config = _audio_config(tmp_path)
+    room_noise = np.full((32_000, 1), 0.001, dtype=np.float32)
+
+    with (
+        _patched_sounddevice([room_noise]),
+        patch("koe.audio.soundfile.write", create=True) as write_mock,
+    ):
+        result = capture_audio(config, stop_event=_stopped())
+
+    assert result == {"kind": "empty"}
+    write_mock.assert_not_called()
+
+
+def test_capture_audio_returns_view_of_preallocated_buffer(tmp_path: Path) -> None:
+    config = _audio_config(tmp_path)
+    blocks: list[object] = [np.full((512, 1), 0.5, dtype=np.float32) for _ in range(4)]
+
+    with _patched_sounddevice(blocks):
+        result = capture_audio(config, stop_event=_stopped())
+
+    assert result["kind"] == "buffered"
+    samples = cast("np.ndarray[tuple[int], np.dtype[np.float32]]", result["samples"])
+    assert samples.shape == (2_048,)
+    assert not samples.flags.owndata
+
+
+def test_capture_audio_drops_frames_past_maximum_recording_length(tmp_path: Path) -> None:
+    config = cast("KoeConfig", {**_audio_config(tmp_path), "max_recording_seconds": 1})
+    blocks: list[object] = [np.full((12_000, 1), 0.5, dtype=np.float32) for _ in range(2)]
+
+    with _patched_sounddevice(blocks):
+        result = capture_audio(config, stop_event=_stopped())
+
+    assert result["kind"] == "buffered"
+    assert result["samples"].size == config["sample_rate"]
+
+
+class _PacedInputStream:
+    """Feeds blocks from a driver thread, like PortAudio, then presses stop."""
+
+    def __init__(self, block: object, count: int, stop_event: Event, **kwargs: object) -> None:
+        self._block = block
+        self._count = count
+        self._stop_event = stop_event
+        self._callback = cast("Callable[..., None]", kwargs["callback"])
+        self._driver = Thread(target=self._feed)
+
+    def _feed(self) -> None:
+        frames = len(cast("list[object]", self._block))
+        for _ in range(self._count):
+            self._callback(self._block, frames, None, None)
+            time.sleep(0.002)
+        self._stop_event.set()
+
+    def __enter__(self) -> _PacedInputStream:
+        self._driver.start()
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self._driver.join()
+
+
+def _resident_bytes() -> int:
+    resident_pages = int(Path("/proc/self/statm").read_text().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def test_spill_recording_keeps_memory_flat_over_multi_minute_capture(tmp_path: Path) -> None:
+    config = cast(
+        "KoeConfig",
+        {**_audio_config(tmp_path), "spill_recording": True, "max_recording_seconds": 3_600},
+    )
+    minutes = 10
+    block = np.full((config["sample_rate"], 1), 0.25, dtype=np.float32)
+    stop_event = Event()
+
+    def _input_stream(**kwargs: object) -> _PacedInputStream:
+        return _PacedInputStream(block, minutes * 60, stop_event, **kwargs)
+
+    peak_rss = baseline_rss = _resident_bytes()
+    sampling = Event()
+
+    def _sample_rss() -> None:
+        nonlocal peak_rss
+        while not sampling.wait(0.005):
+            peak_rss = max(peak_rss, _resident_bytes())
+
+    sampler = Thread(target=_sample_rss)
+    sampler.start()
+    try:
+        with (
+            _patched_input_stream(_input_stream),
+            patch("koe.audio._WINDOW_POLL_SECONDS", 0.005),
+        ):
+            result = capture_audio(config, stop_event=stop_event)
+    finally:
+        sampling.set()
+        sampler.join()
+
+    assert result["kind"] == "spilled"
+    recording_bytes = minutes * 60 * config["sample_rate"] * 4
+    assert peak_rss - baseline_rss < recording_bytes // 4
+    info = soundfile.info(str(result["artifact_path"]))
+    assert info.samplerate == config["sample_rate"]
+    assert info.frames == minutes * 60 * config["sample_rate"]
+    remove_audio_artifact(result["artifact_path"])
+
+
+def test_spill_recording_without_frames_removes_artifact(tmp_path: Path) -> None:
+    config = cast("KoeConfig", {**_audio_config(tmp_path), "spill_recording": True})
+
+    with _patched_sounddevice([]):
+        result = capture_audio(config, stop_event=_stopped())
+
+    assert result == {"kind": "empty"}
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+from koe import backend
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+X11_TOOL_COUNT = 3
+
+
+def _which(tool: str) -> str | None:
+    return None if tool == "wl-copy" else f"/usr/bin/{tool}"
+
+
+def test_session_backend_resolves_once_until_path_changes() -> None:
+    with (
+        patch.dict(os.environ, {"KOE_BACKEND": "x11", "PATH": "/usr/bin"}),
+        patch("koe.backend.shutil.which", side_effect=_which) as which_mock,
+    ):
+        first = backend.session_backend()
+        second = backend.session_backend()
+        calls_before_path_change = which_mock.call_count
+        os.environ["PATH"] = "/opt/tools/bin:/usr/bin"
+        third = backend.session_backend()
+
+    assert second is first
+    assert calls_before_path_change == X11_TOOL_COUNT
+    assert third is not first
+    assert which_mock.call_count == 2 * X11_TOOL_COUNT
+    assert first["tools"] == {
+        "notify-send": "/usr/bin/notify-send",
+        "xdotool": "/usr/bin/xdotool",
+        "xclip": "/usr/bin/xclip",
+    }
+    assert (first["focus"], first["paste"], first["clipboard"]) == ("xlib", "xtest", "xlib")
+
+
+def test_wayland_backend_prefers_hyprland_ipc_when_its_socket_exists(tmp_path: Path) -> None:
+    (tmp_path / "hypr" / "sig").mkdir(parents=True)
+    wayland = {"KOE_BACKEND": "wayland", "XDG_RUNTIME_DIR": str(tmp_path)}
+
+    with patch("koe.backend.shutil.which", side_effect=_which):
+        with patch.dict(os.environ, {**wayland, "HYPRLAND_INSTANCE_SIGNATURE": "sig"}):
+            with_ipc = backend.session_backend()
+        with patch.dict(os.environ, wayland):
+            os.environ.pop("HYPRLAND_INSTANCE_SIGNATURE", None)
+            without_ipc = backend.session_backend()
+
+    assert with_ipc["hyprland_socket_dir"] == tmp_path / "hypr" / "sig"
+    assert (with_ipc["focus"], with_ipc["paste"]) == ("hyprland_ipc", "hyprland_ipc")
+    assert (without_ipc["focus"], without_ipc["paste"]) == ("hyprctl", "hyprctl")
+    # wl-copy is missing from PATH, so the clipboard falls back to xclip.
+    assert with_ipc["clipboard"] == "xclip"
+
+
+def test_tool_command_uses_resolved_paths_and_bare_names_otherwise() -> None:
+    with (
+        patch.dict(os.environ, {"KOE_BACKEND": "wayland"}),
+        patch("koe.backend.shutil.which", side_effect=_which),
+    ):
+        resolved = backend.session_backend()
+
+    assert backend.tool_command(resolved, "hyprctl") == "/usr/bin/hyprctl"
+    assert backend.tool_command(resolved, "wl-copy") == "wl-copy"
+    assert backend.tool_command(resolved, "xclip") == "xclip"
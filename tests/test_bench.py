@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+from koe.bench import run_benchmark, run_startup_benchmark
+from koe.config import DEFAULT_CONFIG
+
+if TYPE_CHECKING:
+    import pytest
+
+
+class _Segment:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class _CountingModel:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def transcribe(self, _audio: object, /) -> tuple[list[_Segment], object]:
+        self.calls += 1
+        return ([_Segment("tone")], object())
+
+
+def test_run_benchmark_reports_cold_then_warm_pass(capsys: pytest.CaptureFixture[str]) -> None:
+    models = [_CountingModel(), _CountingModel()]
+
+    with patch(
+        "koe.bench.load_whisper_model",
+        side_effect=[{"ok": True, "value": model} for model in models],
+    ):
+        exit_code = run_benchmark(DEFAULT_CONFIG)
+
+    assert exit_code == 0
+    cold, warm = capsys.readouterr().out.splitlines()
+    assert cold.startswith("warm_up=off ")
+    assert "warm_up_ms=- " in cold
+    assert warm.startswith("warm_up=on ")
+    assert "warm_up_ms=-" not in warm
+    for line in (cold, warm):
+        fields = dict(field.split("=") for field in line.split())
+        assert set(fields) == {
+            "warm_up",
+            "load_ms",
+            "warm_up_ms",
+            "first_request_ms",
+            "second_request_ms",
+        }
+    assert [model.calls for model in models] == [2, 3]
+
+
+def test_run_benchmark_reports_model_load_failure(capsys: pytest.CaptureFixture[str]) -> None:
+    load_error = {
+        "ok": False,
+        "error": {
+            "category": "transcription",
+            "message": "model load failed: no such model",
+            "cuda_available": True,
+        },
+    }
+
+    with patch("koe.bench.load_whisper_model", return_value=load_error):
+        exit_code = run_benchmark(DEFAULT_CONFIG)
+
+    assert exit_code == 1
+    assert "model load failed: no such model" in capsys.readouterr().err
+
+
+def test_run_startup_benchmark_reports_without_then_with_zygote(
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    passes = [
+        {"ok": True, "value": {"zygote": zygote, "runs": 5, "median_ms": 40, "max_ms": 55}}
+        for zygote in (False, True)
+    ]
+
+    with patch("koe.bench.measure_stream_open", side_effect=passes) as measure_mock:
+        exit_code = run_startup_benchmark(DEFAULT_CONFIG)
+
+    assert exit_code == 0
+    assert [call.kwargs["zygote"] for call in measure_mock.call_args_list] == [False, True]
+    cold, parked = capsys.readouterr().out.splitlines()
+    assert cold == "zygote=off runs=5 median_ms=40 max_ms=55"
+    assert parked.startswith("zygote=on ")
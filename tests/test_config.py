@@ -37,7 +37,7 @@ def test_default_config_matches_section_1_defaults() -> None:
     assert DEFAULT_CONFIG["sample_rate"] == EXPECTED_SAMPLE_RATE
     assert DEFAULT_CONFIG["audio_channels"] == 1
     assert DEFAULT_CONFIG["audio_format"] == "float32"
-    assert DEFAULT_CONFIG["whisper_device"] == "cuda"
+    assert DEFAULT_CONFIG["whisper_device"] == "auto"
 
 
 def test_default_config_is_override_spreadable() -> None:
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import socket
+import time
+from threading import Event
+from typing import TYPE_CHECKING
+
+from koe import control
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+STOP_ROUND_TRIP_BUDGET_SECONDS = 0.05
+
+
+def _serve(socket_path: Path) -> tuple[control.ControlServer, Event, Event]:
+    stop_event = Event()
+    cancel_event = Event()
+    server_result = control.start_control_server(
+        socket_path, handler=control.recording_command_handler(stop_event, cancel_event)
+    )
+    assert server_result["ok"] is True
+    return server_result["value"], stop_event, cancel_event
+
+
+def test_stop_is_acknowledged_with_the_state_it_found(tmp_path: Path) -> None:
+    socket_path = tmp_path / "control.sock"
+    server, stop_event, cancel_event = _serve(socket_path)
+    try:
+        started_at = time.perf_counter()
+        first = control.send_control_command(socket_path, "stop")
+        elapsed = time.perf_counter() - started_at
+        second = control.send_control_command(socket_path, "stop")
+    finally:
+        control.stop_control_server(server)
+
+    assert first is not None
+    assert first["ok"] is True
+    assert first["state"] == "recording"
+    assert second is not None
+    assert second["state"] == "processing"
+    assert stop_event.is_set()
+    assert not cancel_event.is_set()
+    assert elapsed < STOP_ROUND_TRIP_BUDGET_SECONDS
+
+
+def test_cancel_sets_stop_and_cancel_while_status_changes_nothing(tmp_path: Path) -> None:
+    socket_path = tmp_path / "control.sock"
+    server, stop_event, cancel_event = _serve(socket_path)
+    try:
+        status = control.send_control_command(socket_path, "status")
+        status_left_running = not stop_event.is_set()
+        cancelled = control.send_control_command(socket_path, "cancel")
+    finally:
+        control.stop_control_server(server)
+
+    assert status is not None
+    assert status["state"] == "recording"
+    assert status_left_running
+    assert cancelled is not None
+    assert cancelled["ok"] is True
+    assert stop_event.is_set()
+    assert cancel_event.is_set()
+
+
+def test_malformed_command_is_refused_without_stopping(tmp_path: Path) -> None:
+    socket_path = tmp_path / "control.sock"
+    server, stop_event, _cancel_event = _serve(socket_path)
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        with client:
+            client.connect(str(socket_path))
+            client.sendall(b'{"command": "reboot"}\n')
+            reply = client.recv(4096)
+    finally:
+        control.stop_control_server(server)
+
+    assert b'"ok": false' in reply
+    assert not stop_event.is_set()
+
+
+def test_send_control_command_returns_none_without_listener(tmp_path: Path) -> None:
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(tmp_path / "control.sock"))
+    stale.close()
+
+    assert control.send_control_command(tmp_path / "missing.sock", "stop") is None
+    assert control.send_control_command(tmp_path / "control.sock", "stop") is None
+
+
+def test_start_control_server_replaces_stale_socket_and_cleans_up(tmp_path: Path) -> None:
+    socket_path = tmp_path / "control.sock"
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(socket_path))
+    stale.close()
+
+    server, _stop_event, _cancel_event = _serve(socket_path)
+    control.stop_control_server(server)
+
+    assert not socket_path.exists()
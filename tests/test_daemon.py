@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import socket
+from contextlib import contextmanager
+from threading import Event, Thread
+from typing import TYPE_CHECKING, cast
+from unittest.mock import patch
+
+import numpy as np
+import soundfile
+
+from koe import daemon
+from koe.config import DEFAULT_CONFIG, KoeConfig
+from koe.types import AudioArtifactPath
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from pathlib import Path
+
+OWNER_ONLY_MODE = 0o600
+
+
+class _Segment:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class _FakeModel:
+    def __init__(self) -> None:
+        self.calls: list[object] = []
+
+    def transcribe(self, audio: object, /) -> tuple[list[_Segment], object]:
+        self.calls.append(audio)
+        return ([_Segment(" hello "), _Segment("[BLANK_AUDIO]"), _Segment("daemon")], object())
+
+
+def _daemon_config(tmp_path: Path) -> KoeConfig:
+    return cast("KoeConfig", {**DEFAULT_CONFIG, "daemon_socket_path": tmp_path / "d.sock"})
+
+
+@contextmanager
+def _serving(config: KoeConfig, model: _FakeModel) -> Generator[None]:
+    listener_result = daemon.bind_daemon_socket(config["daemon_socket_path"])
+    assert listener_result["ok"] is True
+    listener = listener_result["value"]
+    shutdown_event = Event()
+    worker = Thread(
+        target=daemon.serve_transcription_requests,
+        args=(listener, model, shutdown_event),
+        daemon=True,
+    )
+    worker.start()
+    try:
+        yield
+    finally:
+        shutdown_event.set()
+        worker.join(timeout=5)
+        listener.close()
+
+
+def test_request_daemon_transcription_returns_none_when_no_daemon(tmp_path: Path) -> None:
+    config = _daemon_config(tmp_path)
+
+    result = daemon.request_daemon_transcription(
+        AudioArtifactPath(tmp_path / "capture.wav"), config
+    )
+
+    assert result is None
+
+
+def test_request_daemon_transcription_round_trips_through_loaded_model(tmp_path: Path) -> None:
+    config = _daemon_config(tmp_path)
+    model = _FakeModel()
+    artifact = AudioArtifactPath(tmp_path / "capture.wav")
+
+    with _serving(config, model):
+        first = daemon.request_daemon_transcription(artifact, config)
+        second = daemon.request_daemon_transcription(artifact, config)
+
+    assert first == {"kind": "text", "text": "hello daemon"}
+    assert second == first
+    assert model.calls == [str(artifact), str(artifact)]
+
+
+def test_request_daemon_transcription_streams_in_memory_samples(tmp_path: Path) -> None:
+    config = _daemon_config(tmp_path)
+    model = _FakeModel()
+    samples = np.linspace(-1.0, 1.0, 48_000, dtype=np.float32)
+
+    with _serving(config, model):
+        result = daemon.request_daemon_transcription(samples, config)
+
+    assert result == {"kind": "text", "text": "hello daemon"}
+    assert len(model.calls) == 1
+    received = cast("np.ndarray[tuple[int], np.dtype[np.float32]]", model.calls[0])
+    assert received.dtype == np.float32
+    np.testing.assert_array_equal(received, samples)
+
+
+def test_bind_daemon_socket_replaces_stale_socket_file(tmp_path: Path) -> None:
+    socket_path = tmp_path / "d.sock"
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(socket_path))
+    stale.close()
+
+    result = daemon.bind_daemon_socket(socket_path)
+
+    assert result["ok"] is True
+    result["value"].close()
+    assert socket_path.stat().st_mode & 0o777 == OWNER_ONLY_MODE
+
+
+def test_bind_daemon_socket_refuses_when_daemon_already_listening(tmp_path: Path) -> None:
+    config = _daemon_config(tmp_path)
+
+    with _serving(config, _FakeModel()):
+        result = daemon.bind_daemon_socket(config["daemon_socket_path"])
+
+    assert result["ok"] is False
+    assert "another daemon" in result["error"]
+
+
+def test_run_daemon_reports_model_load_failure_and_removes_socket(tmp_path: Path) -> None:
+    config = _daemon_config(tmp_path)
+    load_error = {
+        "ok": False,
+        "error": {
+            "category": "transcription",
+            "message": "CUDA not available: driver missing",
+            "cuda_available": False,
+        },
+    }
+
+    with (
+        patch("koe.daemon.load_whisper_model", return_value=load_error),
+        patch("koe.daemon.signal.signal"),
+    ):
+        exit_code = daemon.run_daemon(config)
+
+    assert exit_code == 1
+    assert not config["daemon_socket_path"].exists()
+
+
+def test_request_daemon_transcription_windowed_reads_artifact_in_windows(tmp_path: Path) -> None:
+    config = _daemon_config(tmp_path)
+    model = _FakeModel()
+    artifact = AudioArtifactPath(tmp_path / "spilled.wav")
+    samples = np.full(16_000, 0.5, dtype=np.float32)
+    soundfile.write(artifact, samples, 16_000, subtype="FLOAT")
+
+    with _serving(config, model):
+        result = daemon.request_daemon_transcription(artifact, config, windowed=True)
+
+    assert result == {"kind": "text", "text": "hello daemon"}
+    assert len(model.calls) == 1
+    window = cast("np.ndarray[tuple[int], np.dtype[np.float32]]", model.calls[0])
+    np.testing.assert_array_equal(window, samples)
+
+
+def test_is_daemon_ready_only_once_serving(tmp_path: Path) -> None:
+    config = _daemon_config(tmp_path)
+    listener_result = daemon.bind_daemon_socket(config["daemon_socket_path"])
+    assert listener_result["ok"] is True
+    listener = listener_result["value"]
+
+    with patch("koe.daemon._CONNECT_TIMEOUT_SECONDS", 0.05):
+        loading = daemon.is_daemon_ready(config)
+    listener.close()
+
+    with _serving(config, _FakeModel()):
+        serving = daemon.is_daemon_ready(config)
+
+    assert loading is False
+    assert serving is True
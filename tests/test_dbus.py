@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import os
+import socket
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pytest
+
+from koe import dbus
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@pytest.mark.parametrize(
+    ("address", "expected"),
+    [
+        ("unix:path=/run/user/1000/bus", "/run/user/1000/bus"),
+        ("unix:abstract=/tmp/dbus-Xy%2cz,guid=0123", "\0/tmp/dbus-Xy,z"),
+        ("tcp:host=localhost,port=1;unix:path=/tmp/bus", "/tmp/bus"),
+        ("tcp:host=localhost,port=1", None),
+    ],
+)
+def test_session_bus_address_reads_unix_transports(address: str, expected: str | None) -> None:
+    with patch.dict(os.environ, {"DBUS_SESSION_BUS_ADDRESS": address}):
+        assert dbus.session_bus_address() == expected
+
+
+def test_session_bus_address_falls_back_to_the_runtime_dir_socket(tmp_path: Path) -> None:
+    with patch.dict(os.environ, {"XDG_RUNTIME_DIR": str(tmp_path)}, clear=True):
+        without_socket = dbus.session_bus_address()
+        (tmp_path / "bus").touch()
+        with_socket = dbus.session_bus_address()
+
+    assert without_socket is None
+    assert with_socket == str(tmp_path / "bus")
+
+
+def test_hello_call_matches_the_reference_wire_format() -> None:
+    message = dbus.encode_message(
+        dbus.METHOD_CALL,
+        1,
+        {
+            dbus.FIELD_PATH: ("o", "/org/freedesktop/DBus"),
+            dbus.FIELD_MEMBER: ("s", "Hello"),
+        },
+    )
+
+    assert message == (
+        b"l\x01\x00\x01\x00\x00\x00\x00\x01\x00\x00\x00\x2e\x00\x00\x00"
+        b"\x01\x01o\x00\x15\x00\x00\x00/org/freedesktop/DBus\x00\x00\x00"
+        b"\x03\x01s\x00\x05\x00\x00\x00Hello\x00\x00\x00"
+    )
+
+
+def test_messages_round_trip_containers_and_variants() -> None:
+    body: list[object] = [
+        "Koe",
+        7,
+        ["default", "Open"],
+        {"urgency": ("y", 2), "x-koe-stage": ("s", "processing"), "volume": ("d", 0.5)},
+        (-1, ("at", [1, 2**40])),
+    ]
+    message = dbus.encode_message(
+        dbus.METHOD_RETURN,
+        3,
+        {dbus.FIELD_REPLY_SERIAL: ("u", 2)},
+        signature="suasa{sv}(iv)",
+        body=body,
+    )
+    sender, receiver = socket.socketpair()
+    with sender, receiver:
+        sender.sendall(message)
+        decoded = dbus.receive_message(receiver)
+
+    assert decoded == {
+        "kind": dbus.METHOD_RETURN,
+        "serial": 3,
+        "fields": {dbus.FIELD_REPLY_SERIAL: 2, dbus.FIELD_SIGNATURE: "suasa{sv}(iv)"},
+        "body": body,
+    }
+
+
+def test_connect_session_bus_reports_an_unreachable_bus(tmp_path: Path) -> None:
+    address = f"unix:path={tmp_path / 'absent'}"
+    with patch.dict(os.environ, {"DBUS_SESSION_BUS_ADDRESS": address}):
+        result = dbus.connect_session_bus(timeout=1.0)
+
+    assert result["ok"] is False
+    assert "unable to reach the session bus" in result["error"]
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import sqlite3
+from contextlib import closing
+from typing import TYPE_CHECKING, cast
+from unittest.mock import patch
+
+import pytest
+
+from koe import history
+from koe.config import DEFAULT_CONFIG, KoeConfig
+from koe.usage_log import iter_log_lines, write_transcription_record
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+IMPORTED_COUNT = 3
+PRIVATE_MODE = 0o600
+
+
+def _history_config(tmp_path: Path, **overrides: object) -> KoeConfig:
+    return cast(
+        "KoeConfig",
+        {
+            **DEFAULT_CONFIG,
+            "transcription_log_path": tmp_path / "transcriptions.jsonl",
+            "history_db_path": tmp_path / "history.sqlite3",
+            "transcription_history": True,
+            **overrides,
+        },
+    )
+
+
+def test_history_database_and_wal_files_are_private(tmp_path: Path) -> None:
+    config = _history_config(tmp_path)
+    db_path = config["history_db_path"]
+    previous_umask = os.umask(0o022)
+    try:
+        with closing(history.open_history(db_path)) as reader:
+            history.record_transcription_history(
+                config, "private words", timestamp=None, window_title=None, audio_seconds=None
+            )
+            modes = {
+                path.name: path.stat().st_mode & 0o777
+                for path in tmp_path.iterdir()
+                if path.name.startswith(db_path.name)
+            }
+            reader.execute("SELECT count(*) FROM transcriptions").fetchone()
+    finally:
+        os.umask(previous_umask)
+
+    assert modes == {
+        "history.sqlite3": PRIVATE_MODE,
+        "history.sqlite3-wal": PRIVATE_MODE,
+        "history.sqlite3-shm": PRIVATE_MODE,
+    }
+
+
+def test_open_history_tightens_an_existing_world_readable_database(tmp_path: Path) -> None:
+    db_path = tmp_path / "history.sqlite3"
+    db_path.touch(mode=0o644)
+    db_path.chmod(0o644)
+
+    with closing(history.open_history(db_path)):
+        pass
+
+    assert db_path.stat().st_mode & 0o777 == PRIVATE_MODE
+
+
+def test_recording_after_the_first_write_runs_only_the_insert(tmp_path: Path) -> None:
+    config = _history_config(tmp_path)
+    statements: list[str] = []
+    connect = sqlite3.connect
+
+    def _traced_connect(db_path: Path, *, timeout: float) -> sqlite3.Connection:
+        connection = connect(db_path, timeout=timeout)
+        connection.set_trace_callback(statements.append)
+        return connection
+
+    history.record_transcription_history(
+        config, "first", timestamp=None, window_title=None, audio_seconds=None
+    )
+    with patch("koe.history.sqlite3.connect", side_effect=_traced_connect):
+        history.record_transcription_history(
+            config, "second", timestamp=None, window_title=None, audio_seconds=None
+        )
+
+    assert "PRAGMA synchronous=NORMAL" in statements
+    assert not any("CREATE" in statement for statement in statements)
+    assert not any("journal_mode" in statement for statement in statements)
+    assert history.search_history(config["history_db_path"], "second")["ok"] is True
+
+
+def test_search_history_reports_an_unopenable_database(tmp_path: Path) -> None:
+    db_path = tmp_path / "history.sqlite3"
+    db_path.mkdir()
+
+    result = history.search_history(db_path, "anything")
+
+    assert result["ok"] is False
+    assert result["error"].startswith("history search failed:")
+
+
+def test_search_history_ranks_matches_and_keeps_metadata(tmp_path: Path) -> None:
+    config = _history_config(tmp_path)
+    history.record_transcription_history(
+        config,
+        "ship the release notes tomorrow",
+        timestamp="2026-10-13T09:00:00+00:00",
+        window_title="Editor",
+        audio_seconds=2.5,
+    )
+    history.record_transcription_history(
+        config,
+        "release release release checklist",
+        timestamp="2026-10-14T09:00:00+00:00",
+        window_title=None,
+        audio_seconds=None,
+    )
+    history.record_transcription_history(
+        config, "lunch order", timestamp=None, window_title="Chat", audio_seconds=1.0
+    )
+
+    result = history.search_history(config["history_db_path"], "release")
+
+    assert result["ok"] is True
+    assert [match["timestamp"] for match in result["value"]] == [
+        "2026-10-14T09:00:00+00:00",
+        "2026-10-13T09:00:00+00:00",
+    ]
+    assert result["value"][1]["window_title"] == "Editor"
+    assert "[release]" in result["value"][1]["snippet"]
+
+
+@pytest.mark.parametrize("query", ['notes"', "AND", "release OR (", "col:umn*"])
+def test_search_history_treats_fts_syntax_as_literal_words(tmp_path: Path, query: str) -> None:
+    config = _history_config(tmp_path)
+    history.record_transcription_history(
+        config, "release notes", timestamp=None, window_title=None, audio_seconds=None
+    )
+
+    result = history.search_history(config["history_db_path"], query)
+
+    assert result["ok"] is True
+
+
+def test_search_history_reports_missing_database_and_empty_query(tmp_path: Path) -> None:
+    db_path = tmp_path / "history.sqlite3"
+
+    missing = history.search_history(db_path, "release")
+    empty = history.search_history(db_path, "   ")
+
+    assert missing["ok"] is False
+    assert "no history database" in missing["error"]
+    assert empty == {"ok": False, "error": "search query is empty"}
+
+
+def test_import_transcription_log_is_batched_and_idempotent(tmp_path: Path) -> None:
+    config = _history_config(tmp_path, log_rotate_bytes=150)
+    for text in ("first dictated note", "second dictated note", "third dictated note"):
+        write_transcription_record(config, text)
+    with config["transcription_log_path"].open("a", encoding="utf-8") as handle:
+        handle.write("not json\n")
+        handle.write(json.dumps({"timestamp": 1, "text": "bad"}) + "\n")
+
+    with patch("koe.history._IMPORT_BATCH_SIZE", 2):
+        first = history.import_transcription_log(
+            config["history_db_path"], config["transcription_log_path"]
+        )
+    again = history.import_transcription_log(
+        config["history_db_path"], config["transcription_log_path"]
+    )
+    search = history.search_history(config["history_db_path"], "dictated")
+
+    assert first == {"ok": True, "value": IMPORTED_COUNT}
+    assert again == {"ok": True, "value": 0}
+    assert search["ok"] is True
+    assert len(search["value"]) == IMPORTED_COUNT
+
+
+def test_import_holds_off_log_rotation_until_it_finishes(tmp_path: Path) -> None:
+    config = _history_config(tmp_path)
+    write_transcription_record(config, "read under the rotation lock")
+    lock_path = tmp_path / ".transcriptions.jsonl.lock"
+    rotation_blocked: list[bool] = []
+
+    def _lines_while_probing_rotation(log_path: Path, /) -> Iterator[bytes]:
+        with lock_path.open("rb") as lock_handle:
+            try:
+                fcntl.flock(lock_handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                rotation_blocked.append(True)
+        yield from iter_log_lines(log_path)
+
+    with patch("koe.history.iter_log_lines", side_effect=_lines_while_probing_rotation):
+        result = history.import_transcription_log(
+            config["history_db_path"], config["transcription_log_path"]
+        )
+
+    assert result == {"ok": True, "value": 1}
+    assert rotation_blocked == [True]
+
+
+def test_import_skips_transcripts_already_recorded_live(tmp_path: Path) -> None:
+    config = _history_config(tmp_path)
+    logged_at = write_transcription_record(config, "recorded while dictating")
+    history.record_transcription_history(
+        config,
+        "recorded while dictating",
+        timestamp=logged_at,
+        window_title="Editor",
+        audio_seconds=1.5,
+    )
+
+    result = history.import_transcription_log(
+        config["history_db_path"], config["transcription_log_path"]
+    )
+
+    assert result == {"ok": True, "value": 0}
+
+
+def test_run_history_search_prints_ranked_lines(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    config = _history_config(tmp_path)
+    history.record_transcription_history(
+        config,
+        "email the landlord",
+        timestamp="2026-10-13T09:00:00+00:00",
+        window_title="Mail",
+        audio_seconds=1.0,
+    )
+
+    exit_code = history.run_history_search(config, "landlord")
+
+    assert exit_code == 0
+    assert capsys.readouterr().out == "2026-10-13T09:00:00+00:00  [Mail]  email the [landlord]\n"
@@ -1,11 +1,22 @@
 from __future__ import annotations
 
+import os
+import subprocess
+import sys
+import time
 from pathlib import Path
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, cast
 from unittest.mock import patch
 
 from koe import hotkey
 from koe.config import DEFAULT_CONFIG, KoeConfig
 
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+CONCURRENT_STARTERS = 16
+
 
 def _config_with_lock(lock_path: Path) -> KoeConfig:
     return {**DEFAULT_CONFIG, "lock_file_path": lock_path}
@@ -61,13 +72,113 @@ def test_release_instance_lock_is_idempotent_and_non_raising(tmp_path: Path) ->
     hotkey.release_instance_lock(lock_handle)
 
 
-def test_acquire_instance_lock_breaks_stale_lock(tmp_path: Path) -> None:
+def test_acquire_instance_lock_takes_over_file_left_by_dead_owner(tmp_path: Path) -> None:
     config = _config_with_lock(tmp_path / "koe.lock")
     config["lock_file_path"].write_text("999999", encoding="utf-8")
 
-    with patch("koe.hotkey._is_process_alive", return_value=False):
-        result = hotkey.acquire_instance_lock(config)
+    result = hotkey.acquire_instance_lock(config)
 
     assert result["ok"] is True
+    assert config["lock_file_path"].read_text(encoding="utf-8") == str(os.getpid())
     hotkey.release_instance_lock(result["value"])
-    assert config["lock_file_path"].exists() is False
+    assert config["lock_file_path"].read_text(encoding="utf-8") == ""
+
+
+def test_acquire_instance_lock_reports_holder_pid_and_frees_on_release(tmp_path: Path) -> None:
+    config = _config_with_lock(tmp_path / "koe.lock")
+    first = hotkey.acquire_instance_lock(config)
+    assert first["ok"] is True
+
+    contended = hotkey.acquire_instance_lock(config)
+    hotkey.release_instance_lock(first["value"])
+    after_release = hotkey.acquire_instance_lock(config)
+
+    assert contended["ok"] is False
+    assert contended["error"]["conflicting_pid"] == os.getpid()
+    assert after_release["ok"] is True
+    hotkey.release_instance_lock(after_release["value"])
+
+
+_STARTER = """
+import sys
+import time
+from pathlib import Path
+
+from koe.config import DEFAULT_CONFIG
+from koe.hotkey import acquire_instance_lock
+
+go_file = Path(sys.argv[2])
+while not go_file.exists():
+    time.sleep(0.001)
+result = acquire_instance_lock({**DEFAULT_CONFIG, "lock_file_path": Path(sys.argv[1])})
+print("won" if result["ok"] else "lost", flush=True)
+if result["ok"]:
+    time.sleep(2)
+"""
+
+
+def test_exactly_one_of_many_concurrent_starters_wins(tmp_path: Path) -> None:
+    lock_file = tmp_path / "koe.lock"
+    go_file = tmp_path / "go"
+    starters = [
+        subprocess.Popen(
+            [sys.executable, "-c", _STARTER, str(lock_file), str(go_file)],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _starter in range(CONCURRENT_STARTERS)
+    ]
+    # Let every interpreter reach the spin-wait before releasing them together.
+    time.sleep(1)
+    go_file.touch()
+
+    outcomes = [starter.communicate(timeout=30)[0].strip() for starter in starters]
+
+    assert outcomes.count("won") == 1
+    assert outcomes.count("lost") == CONCURRENT_STARTERS - 1
+
+
+class _FakeGlobalHotKeys:
+    def __init__(self, hotkeys: dict[str, Callable[[], object]]) -> None:
+        self.hotkeys = hotkeys
+        self.started = False
+
+    def start(self) -> None:
+        self.started = True
+
+    def stop(self) -> None:
+        self.started = False
+
+
+def test_start_hotkey_listener_registers_combo_in_pynput_syntax() -> None:
+    presses: list[str] = []
+    keyboard = SimpleNamespace(GlobalHotKeys=_FakeGlobalHotKeys)
+
+    with patch("koe.hotkey.importlib.import_module", return_value=keyboard) as import_module:
+        result = hotkey.start_hotkey_listener("<super>+<shift>+v", lambda: presses.append("v"))
+
+    assert result["ok"] is True
+    listener = cast("_FakeGlobalHotKeys", result["value"])
+    assert import_module.call_args.args == ("pynput.keyboard",)
+    assert listener.started
+    assert list(listener.hotkeys) == ["<cmd>+<shift>+v"]
+    listener.hotkeys["<cmd>+<shift>+v"]()
+    assert presses == ["v"]
+
+
+def test_start_hotkey_listener_reports_missing_display_and_bad_combo() -> None:
+    def _reject(_hotkeys: object) -> None:
+        raise ValueError("<super>+")
+
+    with patch("koe.hotkey.importlib.import_module", side_effect=ImportError("no display")):
+        no_display = hotkey.start_hotkey_listener("<super>+v", lambda: None)
+    with patch(
+        "koe.hotkey.importlib.import_module",
+        return_value=SimpleNamespace(GlobalHotKeys=_reject),
+    ):
+        bad_combo = hotkey.start_hotkey_listener("<super>+", lambda: None)
+
+    assert no_display["ok"] is False
+    assert "no display" in no_display["error"]
+    assert bad_combo["ok"] is False
+    assert "invalid hotkey_combo" in bad_combo["error"]
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import time
+from threading import Event, Thread
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pytest
+
+from koe import hyprland
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+WINDOW_ADDRESS = 0x5A1B2C3D
+TRACKER_TIMEOUT_SECONDS = 5
+
+
+@pytest.fixture
+def socket_dir(tmp_path: Path) -> Iterator[Path]:
+    socket_dir = tmp_path / "hypr" / "sig"
+    socket_dir.mkdir(parents=True)
+    with (
+        patch.dict(
+            os.environ,
+            {"XDG_RUNTIME_DIR": str(tmp_path), "HYPRLAND_INSTANCE_SIGNATURE": "sig"},
+        ),
+        patch.dict("koe.hyprland._tracked", clear=True),
+    ):
+        yield socket_dir
+
+
+def _serve_requests(path: Path, replies: dict[str, str], requests: list[str]) -> Event:
+    """Answer each connection like Hyprland's request socket, until the event is set."""
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(path))
+    listener.listen()
+    listener.settimeout(0.05)
+    done = Event()
+
+    def _serve() -> None:
+        with listener:
+            while not done.is_set():
+                try:
+                    connection, _address = listener.accept()
+                except TimeoutError:
+                    continue
+                with connection:
+                    request = connection.recv(4096).decode()
+                    requests.append(request)
+                    connection.sendall(replies.get(request, "unknown request").encode())
+
+    Thread(target=_serve, daemon=True).start()
+    return done
+
+
+def test_query_active_window_reads_json_over_the_request_socket(socket_dir: Path) -> None:
+    requests: list[str] = []
+    payload = json.dumps({"address": f"0x{WINDOW_ADDRESS:x}", "title": "Terminal"})
+    done = _serve_requests(socket_dir / ".socket.sock", {"j/activewindow": payload}, requests)
+    try:
+        result = hyprland.query_active_window()
+    finally:
+        done.set()
+
+    assert result == {"ok": True, "value": {"window_id": WINDOW_ADDRESS, "title": "Terminal"}}
+    assert requests == ["j/activewindow"]
+
+
+def test_query_active_window_reports_no_focus_for_empty_reply(socket_dir: Path) -> None:
+    done = _serve_requests(socket_dir / ".socket.sock", {"j/activewindow": "{}"}, [])
+    try:
+        result = hyprland.query_active_window()
+    finally:
+        done.set()
+
+    assert result == {"ok": False, "error": {"category": "focus", "message": "no focused window"}}
+
+
+def test_send_shortcut_dispatches_and_surfaces_errors(socket_dir: Path) -> None:
+    requests: list[str] = []
+    replies = {"dispatch sendshortcut SHIFT, Insert,": "ok"}
+    done = _serve_requests(socket_dir / ".socket.sock", replies, requests)
+    try:
+        sent = hyprland.send_shortcut("SHIFT, Insert,")
+        refused = hyprland.send_shortcut("SHIFT, Bogus,")
+    finally:
+        done.set()
+
+    assert sent == {"ok": True, "value": None}
+    assert refused == {"ok": False, "error": "unknown request"}
+    assert requests == [
+        "dispatch sendshortcut SHIFT, Insert,",
+        "dispatch sendshortcut SHIFT, Bogus,",
+    ]
+
+
+def test_ipc_is_unavailable_outside_hyprland(tmp_path: Path) -> None:
+    with patch.dict(os.environ, {"XDG_RUNTIME_DIR": str(tmp_path)}, clear=True):
+        assert hyprland.hyprland_socket_dir() is None
+        assert hyprland.query_active_window() is None
+        assert hyprland.send_shortcut("SHIFT, Insert,") is None
+        assert hyprland.start_active_window_tracker() is False
+
+
+def test_apply_event_follows_focus_and_title_changes() -> None:
+    active: hyprland.ActiveWindow = {"address": None, "title": ""}
+    for line in (
+        "workspace>>2",
+        "activewindow>>kitty,vim: notes, draft",
+        f"activewindowv2>>{WINDOW_ADDRESS:x}",
+        f"windowtitlev2>>{WINDOW_ADDRESS:x},vim: notes",
+        "windowtitlev2>>deadbeef,other window",
+    ):
+        active = hyprland.apply_event(active, line)
+
+    assert active == {"address": WINDOW_ADDRESS, "title": "vim: notes"}
+    assert hyprland.apply_event(active, "activewindowv2>>")["address"] is None
+
+
+def test_tracker_answers_from_events_until_the_event_socket_closes(socket_dir: Path) -> None:
+    requests: list[str] = []
+    done = _serve_requests(socket_dir / ".socket.sock", {"j/activewindow": "{}"}, requests)
+    events_listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    events_listener.bind(str(socket_dir / ".socket2.sock"))
+    events_listener.listen()
+    try:
+        assert hyprland.start_active_window_tracker() is True
+        events, _address = events_listener.accept()
+        with events:
+            events.sendall(
+                f"activewindow>>kitty,Editor\nactivewindowv2>>{WINDOW_ADDRESS:x}\n".encode()
+            )
+            result = _wait_for_tracked_focus()
+            requests_while_tracking = list(requests)
+        # Once the tracker drops its cache, queries reach the request socket again.
+        deadline = time.monotonic() + TRACKER_TIMEOUT_SECONDS
+        while len(requests) == 1 and time.monotonic() < deadline:
+            hyprland.query_active_window()
+            time.sleep(0.01)
+    finally:
+        done.set()
+        events_listener.close()
+
+    assert result == {"ok": True, "value": {"window_id": WINDOW_ADDRESS, "title": "Editor"}}
+    assert requests_while_tracking == ["j/activewindow"]
+    assert requests == ["j/activewindow", "j/activewindow"]
+
+
+def _wait_for_tracked_focus() -> object:
+    deadline = time.monotonic() + TRACKER_TIMEOUT_SECONDS
+    result = hyprland.query_active_window()
+    while (result is None or result["ok"] is False) and time.monotonic() < deadline:
+        time.sleep(0.01)
+        result = hyprland.query_active_window()
+    return result
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import subprocess
+from pathlib import Path
 from typing import TYPE_CHECKING, cast
 from unittest.mock import patch
 
@@ -10,6 +11,7 @@ from koe import insert as koe_insert
 from koe.config import DEFAULT_CONFIG
 
 if TYPE_CHECKING:
+    from koe.backend import Backend
     from koe.config import KoeConfig
     from koe.types import InsertionError, Result
 
@@ -224,3 +226,46 @@ def test_simulate_paste_maps_xdotool_failure_to_prefixed_error() -> None:
     assert result["error"]["category"] == "insertion"
     assert result["error"]["transcript_text"] == transcript_text
     assert result["error"]["message"].startswith("paste simulation failed:")
+
+
+def test_x11_insertion_prefers_native_backend_and_falls_back_to_tools() -> None:
+    with (
+        patch.dict("os.environ", {"KOE_BACKEND": "x11"}),
+        patch("koe.insert.set_clipboard_text", return_value={"ok": True, "value": None}),
+        patch(
+            "koe.insert.send_paste_chord",
+            return_value={"ok": False, "error": "no keycode for ctrl+v"},
+        ),
+        patch("koe.insert.subprocess.run", return_value=_completed()) as run_mock,
+    ):
+        result = koe_insert.insert_transcript_text("hello", DEFAULT_CONFIG)
+
+    assert result == {"ok": True, "value": None}
+    assert [Path(call.args[0][0]).name for call in run_mock.call_args_list] == ["xdotool"]
+
+
+def test_wayland_insertion_through_xclip_skips_the_x11_clipboard_owner() -> None:
+    backend: Backend = {
+        "session": "wayland",
+        "tools": {"xclip": "/usr/bin/xclip", "hyprctl": "/usr/bin/hyprctl", "wl-copy": None},
+        "hyprland_socket_dir": None,
+        "focus": "hyprctl",
+        "paste": "hyprctl",
+        "clipboard": "xclip",
+    }
+
+    with (
+        patch("koe.insert.session_backend", return_value=backend),
+        patch("koe.insert.set_clipboard_text") as owner_mock,
+        patch("koe.insert.send_paste_chord") as chord_mock,
+        patch("koe.insert.subprocess.run", return_value=_completed()) as run_mock,
+    ):
+        result = koe_insert.insert_transcript_text("hello", DEFAULT_CONFIG)
+
+    assert result == {"ok": True, "value": None}
+    owner_mock.assert_not_called()
+    chord_mock.assert_not_called()
+    assert [call.args[0][0] for call in run_mock.call_args_list] == [
+        "/usr/bin/xclip",
+        "/usr/bin/hyprctl",
+    ]
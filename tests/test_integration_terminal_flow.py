@@ -36,7 +36,7 @@ def test_terminal_flow_integration_composes_pipeline_stages() -> None:
         events.append("release_instance_lock")
 
     with (
-        patch("koe.main.shutil.which", return_value="/usr/bin/fake", create=True),
+        patch("koe.backend.shutil.which", return_value="/usr/bin/fake", create=True),
         patch(
             "koe.main.acquire_instance_lock",
             return_value={"ok": True, "value": lock_handle},
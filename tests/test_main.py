@@ -1,20 +1,34 @@
 from __future__ import annotations
 
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import Future
 from contextlib import suppress
 from datetime import datetime
 from pathlib import Path
+from queue import Queue
+from threading import Event, Thread
 from typing import TYPE_CHECKING, cast
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 
 import koe.main as koe_main
 from koe.config import DEFAULT_CONFIG
+from koe.control import recording_command_handler, start_control_server, stop_control_server
 from koe.main import main, outcome_to_exit_code, run_pipeline
+from koe.stages import set_stage_timing, stage_durations_ms
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     from koe.config import KoeConfig
-    from koe.types import ExitCode, InstanceLockHandle, PipelineOutcome
+    from koe.control import ControlHandler
+    from koe.main import QueuedSession, ResidentCapture, SessionJob
+    from koe.types import ExitCode, InstanceLockHandle, PipelineOutcome, UsageMetrics
 
 
 def test_main_maps_unexpected_exception_to_exit_2() -> None:
@@ -89,6 +103,20 @@ def test_main_exception_path_logs_error_unexpected_and_exits_2() -> None:
     exit_mock.assert_called_once_with(2)
 
 
+def test_main_hands_the_press_to_a_running_zygote() -> None:
+    with (
+        patch("koe.main.request_zygote_session", return_value=1),
+        patch("koe.main.run_pipeline") as pipeline_mock,
+        patch("koe.main.write_usage_log_record", create=True) as write_log_mock,
+        pytest.raises(SystemExit) as exit_info,
+    ):
+        main()
+
+    assert exit_info.value.code == 1
+    pipeline_mock.assert_not_called()
+    write_log_mock.assert_not_called()
+
+
 def test_main_passes_iso_invoked_at_and_non_negative_duration_ms() -> None:
     with (
         patch("koe.main.run_pipeline", return_value="success", create=True),
@@ -227,7 +255,7 @@ def test_run_pipeline_never_calls_write_usage_log_record() -> None:
                 "xclip": "/usr/bin/xclip",
                 "notify-send": "/usr/bin/notify-send",
             },
-            {"whisper_device": "cpu"},
+            {"whisper_device": "rocm"},
         ),
     ],
 )
@@ -244,7 +272,7 @@ def test_dependency_preflight_maps_required_startup_failures(
 
     with (
         patch(
-            "koe.main.shutil.which",
+            "koe.backend.shutil.which",
             side_effect=_which,
             create=True,
         ),
@@ -270,7 +298,7 @@ def test_dependency_preflight_requires_soundfile_package() -> None:
     config = cast("KoeConfig", {**DEFAULT_CONFIG})
 
     with (
-        patch("koe.main.shutil.which", return_value="/usr/bin/tool", create=True),
+        patch("koe.backend.shutil.which", return_value="/usr/bin/tool", create=True),
         patch("koe.main.importlib.util.find_spec", return_value=None, create=True),
         patch("koe.main.os.access", return_value=True, create=True),
     ):
@@ -284,7 +312,7 @@ def test_dependency_preflight_requires_writable_runtime_paths() -> None:
     config = cast("KoeConfig", {**DEFAULT_CONFIG})
 
     with (
-        patch("koe.main.shutil.which", return_value="/usr/bin/tool", create=True),
+        patch("koe.backend.shutil.which", return_value="/usr/bin/tool", create=True),
         patch("koe.main.importlib.util.find_spec", return_value=object(), create=True),
         patch("koe.main.os.access", side_effect=[False, True], create=True),
     ):
@@ -312,7 +340,9 @@ def test_outcome_to_exit_code_is_total(outcome: PipelineOutcome, expected: ExitC
     assert outcome_to_exit_code(outcome) == expected
 
 
-def test_run_pipeline_short_circuits_on_preflight_dependency_error() -> None:
+def test_run_pipeline_discards_capture_on_preflight_dependency_error() -> None:
+    lock_handle = DEFAULT_CONFIG["lock_file_path"]
+    artifact_path = Path("/tmp/captured.wav")
     dependency_error = {
         "category": "dependency",
         "message": "missing tool",
@@ -325,17 +355,30 @@ def test_run_pipeline_short_circuits_on_preflight_dependency_error() -> None:
             return_value={"ok": False, "error": dependency_error},
             create=True,
         ),
-        patch("koe.main.acquire_instance_lock", create=True) as lock_mock,
+        patch(
+            "koe.main.acquire_instance_lock",
+            return_value={"ok": True, "value": lock_handle},
+            create=True,
+        ),
         patch("koe.main.check_x11_context", create=True) as x11_mock,
         patch("koe.main.check_focused_window", create=True) as focus_mock,
+        patch(
+            "koe.main.capture_audio",
+            return_value={"kind": "captured", "artifact_path": artifact_path},
+        ),
+        patch("koe.main.transcribe_audio") as transcribe_mock,
+        patch("koe.main.remove_audio_artifact") as cleanup_mock,
+        patch("koe.main.release_instance_lock") as release_mock,
         patch("koe.main.send_notification", create=True) as notify_mock,
     ):
         assert run_pipeline(DEFAULT_CONFIG) == "error_dependency"
 
     notify_mock.assert_called_once_with("error_dependency", dependency_error)
-    lock_mock.assert_not_called()
     x11_mock.assert_not_called()
     focus_mock.assert_not_called()
+    transcribe_mock.assert_not_called()
+    cleanup_mock.assert_called_once_with(artifact_path)
+    release_mock.assert_called_once_with(lock_handle)
 
 
 def test_run_pipeline_short_circuits_on_lock_contention() -> None:
@@ -394,17 +437,58 @@ def test_run_pipeline_maps_focus_failure_to_no_focus_and_releases_lock() -> None
     release_mock.assert_called_once_with(lock_handle)
 
 
-def test_run_pipeline_enforces_pre_record_stage_ordering() -> None:
+def test_run_pipeline_stops_and_discards_the_capture_when_focus_fails() -> None:
+    lock_handle = DEFAULT_CONFIG["lock_file_path"]
+    artifact_path = Path("/tmp/captured.wav")
+    focus_error = {"category": "focus", "message": "no focused window"}
+
+    def _capture(_config: KoeConfig, **kwargs: object) -> object:
+        cast("Callable[[], None]", kwargs["on_first_frame"])()
+        # Records until the failed check stops it, as a user who never pressed stop.
+        assert cast("Event", kwargs["stop_event"]).wait(timeout=5)
+        return {"kind": "captured", "artifact_path": artifact_path}
+
+    with (
+        patch("koe.main.dependency_preflight", return_value={"ok": True, "value": None}),
+        patch("koe.main.acquire_instance_lock", return_value={"ok": True, "value": lock_handle}),
+        patch("koe.main.check_x11_context", return_value={"ok": True, "value": None}),
+        patch("koe.main.check_focused_window", return_value={"ok": False, "error": focus_error}),
+        patch("koe.main.capture_audio", side_effect=_capture),
+        patch("koe.main.transcribe_audio") as transcribe_mock,
+        patch("koe.main.remove_audio_artifact") as cleanup_mock,
+        patch("koe.main.release_instance_lock"),
+        patch("koe.main.send_notification") as notify_mock,
+        patch.dict("koe.main._usage_metrics", clear=True) as usage_metrics,
+    ):
+        assert run_pipeline(DEFAULT_CONFIG) == "no_focus"
+        metrics = dict(usage_metrics)
+
+    notify_mock.assert_called_once_with("error_focus", focus_error)
+    transcribe_mock.assert_not_called()
+    cleanup_mock.assert_called_once_with(artifact_path)
+    assert koe_main._stop_event.is_set()  # pyright: ignore[reportPrivateUsage]
+    assert metrics["first_audio_frame_ms"] >= 0
+
+
+def test_run_pipeline_opens_the_microphone_before_the_checks_finish() -> None:
     events: list[str] = []
     lock_handle = cast("InstanceLockHandle", DEFAULT_CONFIG["lock_file_path"])
+    capture_started = Event()
 
     def _mark(name: str, result: object) -> object:
         events.append(name)
         return result
 
     def _preflight(_config: KoeConfig) -> object:
+        # Holds the checks until the capture runs; a pipeline that waited would stall here.
+        capture_started.wait(timeout=5)
         return _mark("dependency_preflight", {"ok": True, "value": None})
 
+    def _capture(_config: KoeConfig, **_kwargs: object) -> object:
+        _mark("capture_audio", None)
+        capture_started.set()
+        return {"kind": "empty"}
+
     def _acquire(_config: KoeConfig) -> object:
         return _mark("acquire_instance_lock", {"ok": True, "value": lock_handle})
 
@@ -441,11 +525,7 @@ def test_run_pipeline_enforces_pre_record_stage_ordering() -> None:
             side_effect=_focused_window,
             create=True,
         ),
-        patch(
-            "koe.main.capture_audio",
-            return_value={"kind": "empty"},
-            create=True,
-        ),
+        patch("koe.main.capture_audio", side_effect=_capture),
         patch(
             "koe.main.release_instance_lock",
             side_effect=_release,
@@ -455,11 +535,13 @@ def test_run_pipeline_enforces_pre_record_stage_ordering() -> None:
     ):
         run_pipeline(DEFAULT_CONFIG)
 
-    assert events[:4] == [
-        "dependency_preflight",
+    assert events == [
         "acquire_instance_lock",
+        "capture_audio",
+        "dependency_preflight",
         "check_x11_context",
         "check_focused_window",
+        "release_instance_lock",
     ]
 
 
@@ -744,6 +826,362 @@ def test_run_pipeline_transcription_text_inserts_and_returns_success() -> None:
     cleanup_mock.assert_called_once_with(artifact_path)
 
 
+def test_run_pipeline_prefers_daemon_transcription_over_in_process_model() -> None:
+    lock_handle = DEFAULT_CONFIG["lock_file_path"]
+    artifact_path = Path("/tmp/captured.wav")
+
+    with (
+        patch(
+            "koe.main.dependency_preflight", return_value={"ok": True, "value": None}, create=True
+        ),
+        patch(
+            "koe.main.acquire_instance_lock",
+            return_value={"ok": True, "value": lock_handle},
+            create=True,
+        ),
+        patch("koe.main.check_x11_context", return_value={"ok": True, "value": None}, create=True),
+        patch(
+            "koe.main.check_focused_window",
+            return_value={"ok": True, "value": {"window_id": 1, "title": "Editor"}},
+            create=True,
+        ),
+        patch(
+            "koe.main.capture_audio",
+            return_value={"kind": "captured", "artifact_path": artifact_path},
+            create=True,
+        ),
+        patch("koe.main.is_daemon_running", return_value=True),
+        patch(
+            "koe.main.request_daemon_transcription",
+            return_value={"kind": "text", "text": "from daemon"},
+        ) as daemon_mock,
+        patch("koe.main.transcribe_audio", create=True) as transcribe_mock,
+        patch(
+            "koe.main.insert_transcript_text",
+            return_value={"ok": True, "value": None},
+            create=True,
+        ) as insert_mock,
+        patch("koe.main.remove_audio_artifact", create=True),
+        patch("koe.main.send_notification", create=True),
+    ):
+        assert run_pipeline(DEFAULT_CONFIG) == "success"
+
+    daemon_mock.assert_called_once_with(artifact_path, DEFAULT_CONFIG)
+    transcribe_mock.assert_not_called()
+    insert_mock.assert_called_once_with("from daemon", DEFAULT_CONFIG)
+
+
+def test_run_pipeline_buffered_capture_transcribes_samples_without_artifact_cleanup() -> None:
+    lock_handle = DEFAULT_CONFIG["lock_file_path"]
+    samples = object()
+
+    with (
+        patch(
+            "koe.main.dependency_preflight", return_value={"ok": True, "value": None}, create=True
+        ),
+        patch(
+            "koe.main.acquire_instance_lock",
+            return_value={"ok": True, "value": lock_handle},
+            create=True,
+        ),
+        patch("koe.main.check_x11_context", return_value={"ok": True, "value": None}, create=True),
+        patch(
+            "koe.main.check_focused_window",
+            return_value={"ok": True, "value": {"window_id": 1, "title": "Editor"}},
+            create=True,
+        ),
+        patch(
+            "koe.main.capture_audio",
+            return_value={"kind": "buffered", "samples": samples},
+            create=True,
+        ),
+        patch(
+            "koe.main.transcribe_audio",
+            return_value={"kind": "text", "text": "hello"},
+            create=True,
+        ) as transcribe_mock,
+        patch(
+            "koe.main.insert_transcript_text",
+            return_value={"ok": True, "value": None},
+            create=True,
+        ),
+        patch("koe.main.remove_audio_artifact", create=True) as cleanup_mock,
+        patch("koe.main.send_notification", create=True),
+    ):
+        assert run_pipeline(DEFAULT_CONFIG) == "success"
+
+    transcribe_mock.assert_called_once_with(samples, DEFAULT_CONFIG)
+    cleanup_mock.assert_not_called()
+
+
+def test_run_pipeline_hands_background_model_load_to_transcription_and_records_hidden_ms() -> None:
+    lock_handle = DEFAULT_CONFIG["lock_file_path"]
+    artifact_path = Path("/tmp/captured.wav")
+    started_at = time.monotonic() - 5.0
+    loaded: Future[object] = Future()
+    loaded.set_result({"ok": True, "value": object()})
+    model_load = {
+        "future": loaded,
+        "started_at": started_at,
+        "finished_at": started_at + 2.5,
+        "warm_up_ms": 300,
+    }
+    with (
+        patch(
+            "koe.main.dependency_preflight", return_value={"ok": True, "value": None}, create=True
+        ),
+        patch(
+            "koe.main.acquire_instance_lock",
+            return_value={"ok": True, "value": lock_handle},
+            create=True,
+        ),
+        patch("koe.main.start_model_load", return_value=model_load) as load_mock,
+        patch("koe.main.check_x11_context", return_value={"ok": True, "value": None}, create=True),
+        patch(
+            "koe.main.check_focused_window",
+            return_value={"ok": True, "value": {"window_id": 1, "title": "Editor"}},
+            create=True,
+        ),
+        patch(
+            "koe.main.capture_audio",
+            return_value={"kind": "captured", "artifact_path": artifact_path},
+            create=True,
+        ),
+        patch("koe.main.request_daemon_transcription") as daemon_mock,
+        patch(
+            "koe.main.transcribe_audio",
+            return_value={"kind": "text", "text": "hello"},
+            create=True,
+        ) as transcribe_mock,
+        patch(
+            "koe.main.insert_transcript_text",
+            return_value={"ok": True, "value": None},
+            create=True,
+        ),
+        patch("koe.main.remove_audio_artifact", create=True),
+        patch("koe.main.send_notification", create=True),
+        patch.dict("koe.main._usage_metrics", clear=True) as usage_metrics,
+    ):
+        assert run_pipeline(DEFAULT_CONFIG) == "success"
+        assert usage_metrics == {
+            "model_ready": True,
+            "model_load_hidden_ms": 2500,
+            "model_warm_up_ms": 300,
+        }
+
+    load_mock.assert_called_once_with(DEFAULT_CONFIG)
+    daemon_mock.assert_not_called()
+    transcribe_mock.assert_called_once_with(artifact_path, DEFAULT_CONFIG, model=model_load)
+
+
+def test_main_forwards_pipeline_metrics_to_usage_log() -> None:
+    with (
+        patch.dict("koe.main._usage_metrics", {"model_load_hidden_ms": 42}, clear=True),
+        patch("koe.main.run_pipeline", return_value="success", create=True),
+        patch("koe.main.write_usage_log_record", create=True) as write_log_mock,
+        patch("sys.exit"),
+    ):
+        main()
+        assert write_log_mock.call_args.kwargs["metrics"] == {"model_load_hidden_ms": 42}
+
+
+def test_main_adds_stage_timings_and_real_time_factor_to_usage_log() -> None:
+    with (
+        patch.dict("koe.main._usage_metrics", {"audio_seconds": 4.0}, clear=True),
+        patch("koe.main.run_pipeline", return_value="success"),
+        patch(
+            "koe.main.stage_durations_ms",
+            return_value={"capture": 4100.0, "inference": 600.0, "transcription": 800.0},
+        ),
+        patch("koe.main.write_usage_log_record") as write_log_mock,
+        patch("sys.exit"),
+    ):
+        main()
+
+    assert write_log_mock.call_args.kwargs["metrics"] == {
+        "audio_seconds": 4.0,
+        "stages": {"capture": 4100.0, "inference": 600.0, "transcription": 800.0},
+        "real_time_factor": 0.15,
+    }
+
+
+@pytest.mark.parametrize(
+    "stages",
+    [
+        {"transcription": 800.0},
+        {"inference": 300.0, "daemon_transcription": 500.0, "transcription": 800.0},
+    ],
+)
+def test_main_leaves_out_real_time_factor_without_complete_inference_timing(
+    stages: dict[str, float],
+) -> None:
+    with (
+        patch.dict("koe.main._usage_metrics", {"audio_seconds": 4.0}, clear=True),
+        patch("koe.main.run_pipeline", return_value="success"),
+        patch("koe.main.stage_durations_ms", return_value=stages),
+        patch("koe.main.write_usage_log_record") as write_log_mock,
+        patch("sys.exit"),
+    ):
+        main()
+
+    assert "real_time_factor" not in write_log_mock.call_args.kwargs["metrics"]
+
+
+def test_run_pipeline_times_each_stage_when_enabled() -> None:
+    samples = np.full(16_000, 0.5, dtype=np.float32)
+    lock_handle = DEFAULT_CONFIG["lock_file_path"]
+    set_stage_timing(True)
+    with (
+        patch.dict("koe.main._usage_metrics", clear=True) as usage_metrics,
+        patch("koe.main.dependency_preflight", return_value={"ok": True, "value": None}),
+        patch("koe.main.acquire_instance_lock", return_value={"ok": True, "value": lock_handle}),
+        patch("koe.main.release_instance_lock"),
+        patch("koe.main.check_x11_context", return_value={"ok": True, "value": None}),
+        patch(
+            "koe.main.check_focused_window",
+            return_value={"ok": True, "value": {"window_id": 1, "title": "Editor"}},
+        ),
+        patch("koe.main.send_notification"),
+        patch(
+            "koe.main.capture_audio",
+            return_value={"kind": "buffered", "samples": samples, "audio_seconds": 1.0},
+        ),
+        patch("koe.main.transcribe_audio", return_value={"kind": "text", "text": "hi"}),
+        patch("koe.main.write_transcription_record"),
+        patch("koe.main.insert_transcript_text", return_value={"ok": True, "value": None}),
+    ):
+        try:
+            outcome = run_pipeline(DEFAULT_CONFIG)
+        finally:
+            set_stage_timing(False)
+        assert usage_metrics == {"audio_seconds": 1.0}
+
+    assert outcome == "success"
+    assert set(stage_durations_ms()) == {
+        "preflight",
+        "lock",
+        "focus",
+        "capture",
+        "transcription",
+    }
+
+
+def test_run_pipeline_discards_capture_when_cancelled() -> None:
+    artifact_path = Path("/tmp/cancelled.wav")
+
+    def _capture(_config: KoeConfig, **_kwargs: object) -> object:
+        koe_main._cancel_event.set()  # pyright: ignore[reportPrivateUsage]
+        return {"kind": "captured", "artifact_path": artifact_path}
+
+    with (
+        patch("koe.main.dependency_preflight", return_value={"ok": True, "value": None}),
+        patch(
+            "koe.main.acquire_instance_lock",
+            return_value={"ok": True, "value": DEFAULT_CONFIG["lock_file_path"]},
+        ),
+        patch("koe.main.release_instance_lock") as release_mock,
+        patch("koe.main.check_x11_context", return_value={"ok": True, "value": None}),
+        patch(
+            "koe.main.check_focused_window",
+            return_value={"ok": True, "value": {"window_id": 1, "title": "Editor"}},
+        ),
+        patch("koe.main.send_notification"),
+        patch("koe.main.capture_audio", side_effect=_capture),
+        patch("koe.main.transcribe_audio") as transcribe_mock,
+        patch("koe.main.remove_audio_artifact") as remove_mock,
+        patch("koe.main.stop_control_server") as stop_server_mock,
+    ):
+        outcome = run_pipeline(DEFAULT_CONFIG)
+
+    assert outcome == "cancelled"
+    assert outcome_to_exit_code(outcome) == 0
+    transcribe_mock.assert_not_called()
+    remove_mock.assert_called_once_with(artifact_path)
+    stop_server_mock.assert_called_once()
+    release_mock.assert_called_once()
+
+
+def test_run_pipeline_records_history_with_log_timestamp_and_window_title() -> None:
+    samples = np.full(16_000, 0.5, dtype=np.float32)
+    config = cast("KoeConfig", {**DEFAULT_CONFIG, "transcription_history": True})
+    with (
+        patch.dict("koe.main._usage_metrics", clear=True),
+        patch("koe.main.dependency_preflight", return_value={"ok": True, "value": None}),
+        patch(
+            "koe.main.acquire_instance_lock",
+            return_value={"ok": True, "value": config["lock_file_path"]},
+        ),
+        patch("koe.main.release_instance_lock"),
+        patch("koe.main.check_x11_context", return_value={"ok": True, "value": None}),
+        patch(
+            "koe.main.check_focused_window",
+            return_value={"ok": True, "value": {"window_id": 1, "title": "Editor"}},
+        ),
+        patch("koe.main.send_notification"),
+        patch(
+            "koe.main.capture_audio",
+            return_value={"kind": "buffered", "samples": samples, "audio_seconds": 1.0},
+        ),
+        patch("koe.main.transcribe_audio", return_value={"kind": "text", "text": "hi"}),
+        patch("koe.main.write_transcription_record", return_value="2026-10-17T09:00:00+00:00"),
+        patch("koe.main.record_transcription_history") as history_mock,
+        patch("koe.main.insert_transcript_text", return_value={"ok": True, "value": None}),
+    ):
+        outcome = run_pipeline(config)
+
+    assert outcome == "success"
+    history_mock.assert_called_once_with(
+        config,
+        "hi",
+        timestamp="2026-10-17T09:00:00+00:00",
+        window_title="Editor",
+        audio_seconds=1.0,
+    )
+
+
+def test_run_pipeline_still_pastes_when_the_history_database_is_unwritable(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    samples = np.full(16_000, 0.5, dtype=np.float32)
+    config = cast(
+        "KoeConfig",
+        {
+            **DEFAULT_CONFIG,
+            "transcription_history": True,
+            "history_db_path": tmp_path / "missing" / "history.sqlite3",
+        },
+    )
+    with (
+        patch.dict("koe.main._usage_metrics", clear=True),
+        patch("koe.main.dependency_preflight", return_value={"ok": True, "value": None}),
+        patch(
+            "koe.main.acquire_instance_lock",
+            return_value={"ok": True, "value": config["lock_file_path"]},
+        ),
+        patch("koe.main.release_instance_lock"),
+        patch("koe.main.check_x11_context", return_value={"ok": True, "value": None}),
+        patch(
+            "koe.main.check_focused_window",
+            return_value={"ok": True, "value": {"window_id": 1, "title": "Editor"}},
+        ),
+        patch("koe.main.send_notification"),
+        patch(
+            "koe.main.capture_audio",
+            return_value={"kind": "buffered", "samples": samples, "audio_seconds": 1.0},
+        ),
+        patch("koe.main.transcribe_audio", return_value={"kind": "text", "text": "hi"}),
+        patch("koe.main.write_transcription_record", return_value="2026-10-17T09:00:00+00:00"),
+        patch(
+            "koe.main.insert_transcript_text", return_value={"ok": True, "value": None}
+        ) as insert_mock,
+    ):
+        outcome = run_pipeline(config)
+
+    assert outcome == "success"
+    insert_mock.assert_called_once_with("hi", config)
+    assert "transcription history write failed" in capsys.readouterr().err
+
+
 @pytest.mark.parametrize(
     ("transcription_result", "expected_outcome"),
     [
@@ -1165,3 +1603,377 @@ def test_run_pipeline_processing_precedes_transcription_and_insertion_follows_te
 
     assert events.index("notify:processing") < events.index("transcribe")
     assert events.index("transcribe") < events.index("insert")
+
+
+_STOP_PATH_PROBE = """
+import sys
+from pathlib import Path
+
+from koe.config import DEFAULT_CONFIG
+from koe.main import run_pipeline
+
+outcome = run_pipeline({**DEFAULT_CONFIG, "control_socket_path": Path(sys.argv[1])})
+heavy = [name for name in sys.argv[2:] if name in sys.modules]
+print(outcome, *heavy)
+"""
+
+
+def test_stop_invocation_never_imports_inference_stack(tmp_path: Path) -> None:
+    socket_path = tmp_path / "koe-control.sock"
+    stop_event = Event()
+    server_result = start_control_server(
+        socket_path, handler=recording_command_handler(stop_event, Event())
+    )
+    assert server_result["ok"] is True
+
+    try:
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                _STOP_PATH_PROBE,
+                str(socket_path),
+                "faster_whisper",
+                "ctranslate2",
+                "numpy",
+                "sounddevice",
+            ],
+            check=False,
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+    finally:
+        stop_control_server(server_result["value"])
+
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.split() == ["signaled_stop"]
+    assert stop_event.is_set()
+
+
+def test_run_pipeline_streams_windows_during_capture_and_transcribes_only_tail() -> None:
+    lock_handle = DEFAULT_CONFIG["lock_file_path"]
+    samples = np.arange(6, dtype=np.float32)
+    transcribed: list[list[float]] = []
+
+    def _capture(_config: KoeConfig, **kwargs: object) -> object:
+        on_window = cast("Callable[[object], None]", kwargs["on_window"])
+        on_window(samples[:4])
+        return {"kind": "buffered", "samples": samples}
+
+    def _transcribe(audio: object, _config: KoeConfig) -> object:
+        window = cast("np.ndarray[tuple[int], np.dtype[np.float32]]", audio)
+        transcribed.append(window.tolist())
+        return {"kind": "text", "text": f"part{len(transcribed)}"}
+
+    with (
+        patch(
+            "koe.main.dependency_preflight", return_value={"ok": True, "value": None}, create=True
+        ),
+        patch(
+            "koe.main.acquire_instance_lock",
+            return_value={"ok": True, "value": lock_handle},
+            create=True,
+        ),
+        patch("koe.main.check_x11_context", return_value={"ok": True, "value": None}, create=True),
+        patch(
+            "koe.main.check_focused_window",
+            return_value={"ok": True, "value": {"window_id": 1, "title": "Editor"}},
+            create=True,
+        ),
+        patch("koe.main.capture_audio", side_effect=_capture, create=True),
+        patch("koe.main.transcribe_audio", side_effect=_transcribe, create=True),
+        patch(
+            "koe.main.insert_transcript_text",
+            return_value={"ok": True, "value": None},
+            create=True,
+        ) as insert_mock,
+        patch("koe.main.send_notification", create=True),
+    ):
+        assert run_pipeline(DEFAULT_CONFIG) == "success"
+
+    assert transcribed == [[0.0, 1.0, 2.0, 3.0], [4.0, 5.0]]
+    insert_mock.assert_called_once_with("part1 part2", DEFAULT_CONFIG)
+
+
+def test_run_pipeline_records_trimmed_silence_in_usage_metrics() -> None:
+    lock_handle = DEFAULT_CONFIG["lock_file_path"]
+    samples = np.zeros(4, dtype=np.float32)
+
+    with (
+        patch(
+            "koe.main.dependency_preflight", return_value={"ok": True, "value": None}, create=True
+        ),
+        patch(
+            "koe.main.acquire_instance_lock",
+            return_value={"ok": True, "value": lock_handle},
+            create=True,
+        ),
+        patch("koe.main.check_x11_context", return_value={"ok": True, "value": None}, create=True),
+        patch(
+            "koe.main.check_focused_window",
+            return_value={"ok": True, "value": {"window_id": 1, "title": "Editor"}},
+            create=True,
+        ),
+        patch(
+            "koe.main.capture_audio",
+            return_value={"kind": "buffered", "samples": samples, "trimmed_seconds": 1.25},
+            create=True,
+        ),
+        patch("koe.main.transcribe_audio", return_value={"kind": "empty"}, create=True),
+        patch("koe.main.send_notification", create=True),
+        patch.dict("koe.main._usage_metrics", clear=True) as usage_metrics,
+    ):
+        assert run_pipeline(DEFAULT_CONFIG) == "no_speech"
+        assert usage_metrics == {"trimmed_seconds": 1.25}
+
+
+def test_run_pipeline_spilled_capture_transcribes_in_windows_and_removes_artifact() -> None:
+    lock_handle = DEFAULT_CONFIG["lock_file_path"]
+    artifact_path = Path("/tmp/spilled.wav")
+
+    with (
+        patch(
+            "koe.main.dependency_preflight", return_value={"ok": True, "value": None}, create=True
+        ),
+        patch(
+            "koe.main.acquire_instance_lock",
+            return_value={"ok": True, "value": lock_handle},
+            create=True,
+        ),
+        patch("koe.main.check_x11_context", return_value={"ok": True, "value": None}, create=True),
+        patch(
+            "koe.main.check_focused_window",
+            return_value={"ok": True, "value": {"window_id": 1, "title": "Editor"}},
+            create=True,
+        ),
+        patch(
+            "koe.main.capture_audio",
+            return_value={"kind": "spilled", "artifact_path": artifact_path},
+            create=True,
+        ),
+        patch("koe.main.request_daemon_transcription", return_value=None) as daemon_mock,
+        patch(
+            "koe.main.transcribe_audio",
+            return_value={"kind": "text", "text": "meeting notes"},
+            create=True,
+        ) as transcribe_mock,
+        patch(
+            "koe.main.insert_transcript_text",
+            return_value={"ok": True, "value": None},
+            create=True,
+        ),
+        patch("koe.main.remove_audio_artifact", create=True) as cleanup_mock,
+        patch("koe.main.send_notification", create=True),
+    ):
+        assert run_pipeline(DEFAULT_CONFIG) == "success"
+
+    daemon_mock.assert_called_once_with(artifact_path, DEFAULT_CONFIG, windowed=True)
+    transcribe_mock.assert_called_once_with(artifact_path, DEFAULT_CONFIG, windowed=True)
+    cleanup_mock.assert_called_once_with(artifact_path)
+
+
+def _resident_handler() -> tuple[
+    ControlHandler, list[ResidentCapture], Queue[Future[QueuedSession | None] | None], Thread
+]:
+    captures: list[ResidentCapture] = []
+    jobs: Queue[Future[QueuedSession | None] | None] = Queue()
+    worker = Thread(target=koe_main.process_session_jobs, args=(DEFAULT_CONFIG, jobs))
+    worker.start()
+    handler = koe_main.resident_command_handler(DEFAULT_CONFIG, None, captures, jobs)
+    return handler, captures, jobs, worker
+
+
+def test_resident_handler_records_next_session_while_previous_one_transcribes() -> None:
+    handler, captures, jobs, worker = _resident_handler()
+    release_first = Event()
+    processed: list[str] = []
+    presses = iter(["first", "second"])
+
+    def _capture(_config: KoeConfig, metrics: UsageMetrics, **kwargs: Event) -> SessionJob:
+        title = next(presses)
+        kwargs["stop_event"].wait(timeout=5)
+        return cast("SessionJob", {"window_title": title, "metrics": metrics})
+
+    def _process(_config: KoeConfig, job: SessionJob) -> PipelineOutcome:
+        if job["window_title"] == "first":
+            release_first.wait(timeout=5)
+        processed.append(job["window_title"])
+        return "success"
+
+    with (
+        patch("koe.main.capture_session", side_effect=_capture),
+        patch("koe.main.process_session", side_effect=_process),
+        patch("koe.main.write_usage_log_record") as write_log_mock,
+    ):
+        states = [handler("toggle")["state"], handler("status")["state"]]
+        handler("toggle")
+        captures[-1]["thread"].join(timeout=5)
+        states.append(handler("toggle")["state"])
+        states.append(handler("toggle")["state"])
+        release_first.set()
+        captures[-1]["thread"].join(timeout=5)
+        jobs.put(None)
+        worker.join(timeout=5)
+
+    assert states == ["idle", "recording", "processing", "recording"]
+    assert processed == ["first", "second"]
+    assert write_log_mock.call_count == 2  # noqa: PLR2004
+    assert handler("status")["state"] == "idle"
+
+
+def test_resident_toggle_starts_a_new_capture_while_the_stopped_one_finishes() -> None:
+    handler, captures, jobs, worker = _resident_handler()
+    finish_first = Event()
+    started: list[Thread] = []
+
+    def _capture(_config: KoeConfig, metrics: UsageMetrics, **kwargs: Event) -> SessionJob:
+        started.append(captures[-1]["thread"])
+        kwargs["stop_event"].wait(timeout=5)
+        if len(started) == 1:
+            # Trimming, spill drain and archiving still run after the stop.
+            finish_first.wait(timeout=5)
+        return cast("SessionJob", {"window_title": "t", "metrics": metrics})
+
+    with (
+        patch("koe.main.capture_session", side_effect=_capture),
+        patch("koe.main.process_session", return_value="success"),
+        patch("koe.main.write_usage_log_record"),
+    ):
+        handler("toggle")
+        first = captures[-1]
+        handler("toggle")
+        finishing_state = handler("status")["state"]
+        handler("toggle")
+        second = captures[-1]
+        second_state = handler("status")["state"]
+        finish_first.set()
+        handler("toggle")
+        for capture in (first, second):
+            capture["thread"].join(timeout=5)
+        jobs.put(None)
+        worker.join(timeout=5)
+
+    assert finishing_state == "processing"
+    assert second is not first
+    assert second_state == "recording"
+    assert started == [first["thread"], second["thread"]]
+
+
+def test_resident_inserts_in_press_order_when_a_later_capture_finishes_first() -> None:
+    handler, captures, jobs, worker = _resident_handler()
+    finish_first = Event()
+    processed: list[str] = []
+    presses = iter(["first", "second"])
+
+    def _capture(_config: KoeConfig, metrics: UsageMetrics, **kwargs: Event) -> SessionJob:
+        title = next(presses)
+        kwargs["stop_event"].wait(timeout=5)
+        if title == "first":
+            finish_first.wait(timeout=5)
+        return cast("SessionJob", {"window_title": title, "metrics": metrics})
+
+    def _process(_config: KoeConfig, job: SessionJob) -> PipelineOutcome:
+        processed.append(job["window_title"])
+        return "success"
+
+    with (
+        patch("koe.main.capture_session", side_effect=_capture),
+        patch("koe.main.process_session", side_effect=_process),
+        patch("koe.main.write_usage_log_record"),
+    ):
+        handler("toggle")
+        first = captures[-1]
+        handler("toggle")
+        handler("toggle")
+        second = captures[-1]
+        handler("toggle")
+        second["thread"].join(timeout=5)
+        # The second capture is queued while the first still finishes.
+        processed_before_first = list(processed)
+        running = [capture["thread"] for capture in captures]
+        finish_first.set()
+        first["thread"].join(timeout=5)
+        jobs.put(None)
+        worker.join(timeout=5)
+
+    assert processed_before_first == []
+    assert running == [first["thread"], second["thread"]]
+    assert processed == ["first", "second"]
+
+
+def test_resident_capture_without_audio_is_logged_without_queueing() -> None:
+    handler, captures, jobs, worker = _resident_handler()
+
+    with (
+        patch("koe.main.capture_session", return_value="no_focus"),
+        patch("koe.main.process_session") as process_mock,
+        patch("koe.main.write_usage_log_record") as write_log_mock,
+    ):
+        handler("toggle")
+        captures[-1]["thread"].join(timeout=5)
+        jobs.put(None)
+        worker.join(timeout=5)
+
+    process_mock.assert_not_called()
+    assert write_log_mock.call_args.args[1] == "no_focus"
+
+
+@pytest.mark.parametrize("wayland", [False, True])
+def test_run_resident_grabs_hotkey_only_on_x11_and_cleans_up(wayland: bool) -> None:
+    listener = MagicMock()
+
+    with (
+        patch("koe.main.ensure_data_dir"),
+        patch("koe.main.dependency_preflight", return_value={"ok": True, "value": None}),
+        patch(
+            "koe.main.acquire_instance_lock",
+            return_value={"ok": True, "value": DEFAULT_CONFIG["lock_file_path"]},
+        ),
+        patch("koe.main.release_instance_lock") as release_mock,
+        patch.dict(os.environ, {"KOE_BACKEND": "wayland" if wayland else "x11"}),
+        patch(
+            "koe.main.start_hotkey_listener", return_value={"ok": True, "value": listener}
+        ) as listen_mock,
+        patch("koe.main.start_clipboard_owner") as clipboard_owner_mock,
+        patch("koe.main.start_active_window_tracker") as tracker_mock,
+        patch("koe.main.signal.signal"),
+        patch("koe.main.Event"),
+        patch("koe.main.stop_control_server") as stop_server_mock,
+    ):
+        exit_code = koe_main.run_resident(DEFAULT_CONFIG)
+
+    assert exit_code == 0
+    assert listen_mock.called is not wayland
+    assert listener.stop.called is not wayland
+    assert clipboard_owner_mock.called is not wayland
+    assert tracker_mock.called is wayland
+    stop_server_mock.assert_called_once()
+    release_mock.assert_called_once()
+
+
+def test_run_resident_refuses_while_another_instance_holds_the_lock(
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    with (
+        patch("koe.main.ensure_data_dir"),
+        patch("koe.main.dependency_preflight", return_value={"ok": True, "value": None}),
+        patch(
+            "koe.main.acquire_instance_lock",
+            return_value={
+                "ok": False,
+                "error": {
+                    "category": "already_running",
+                    "message": "another koe instance is active",
+                    "lock_file": "/tmp/koe.lock",
+                    "conflicting_pid": 1,
+                },
+            },
+        ),
+        patch("koe.main.start_control_server") as start_server_mock,
+    ):
+        exit_code = koe_main.run_resident(DEFAULT_CONFIG)
+
+    assert exit_code == 1
+    assert "another koe instance is active" in capsys.readouterr().err
+    start_server_mock.assert_not_called()
@@ -1,15 +1,39 @@
 from __future__ import annotations
 
+import os
+import socket
+from threading import Thread
 from typing import TYPE_CHECKING, cast
 from unittest.mock import patch
 
 import pytest
 
-from koe import notify
+from koe import dbus, notify
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
     from koe.types import KoeError, NotificationKind
 
+FIRST_NOTIFICATION_ID = 41
+
+
+@pytest.fixture(autouse=True)
+def _no_session_bus(tmp_path: Path) -> Iterator[None]:
+    """Start each test without a bus connection and without reaching the host's bus."""
+    with (
+        patch.dict(
+            os.environ, {"DBUS_SESSION_BUS_ADDRESS": f"unix:path={tmp_path / 'absent-bus'}"}
+        ),
+        patch.dict("koe.notify._session", clear=True),
+    ):
+        yield
+        assert notify.flush_notifications() is True
+        connection = notify._session.get("connection")  # pyright: ignore[reportPrivateUsage]
+        if connection is not None:
+            dbus.close_connection(connection)
+
 
 @pytest.mark.parametrize(
     ("kind", "title", "message"),
@@ -29,6 +53,7 @@ def test_send_notification_lifecycle_payload_matrix_is_exact(
 ) -> None:
     with patch("subprocess.run") as run_mock:
         notify.send_notification(kind)
+        notify.flush_notifications()
 
     run_mock.assert_called_once_with(
         ["notify-send", title, message],
@@ -108,6 +133,7 @@ def test_send_notification_error_kinds_preserve_error_message(
 ) -> None:
     with patch("subprocess.run") as run_mock:
         notify.send_notification(kind, error)
+        notify.flush_notifications()
 
     notify_send_args = run_mock.call_args.args[0]
     if kind == "error_insertion":
@@ -133,6 +159,7 @@ def test_send_notification_error_title_matrix_is_exact(kind: NotificationKind, t
 
     with patch("subprocess.run") as run_mock:
         notify.send_notification(kind, error)
+        notify.flush_notifications()
 
     notify_send_args = run_mock.call_args.args[0]
     assert notify_send_args[1] == title
@@ -155,6 +182,7 @@ def test_send_notification_error_fallback_matrix_when_error_is_none(
 ) -> None:
     with patch("subprocess.run") as run_mock:
         notify.send_notification(kind)
+        notify.flush_notifications()
 
     notify_send_args = run_mock.call_args.args[0]
     assert notify_send_args[2] == fallback_message
@@ -223,5 +251,127 @@ def test_send_notification_swallows_backend_failures(
 ) -> None:
     with patch("subprocess.run", side_effect=RuntimeError("backend down")):
         result = notify.send_notification(kind, error)
+        delivered = notify.flush_notifications()
 
     assert result is None
+    assert delivered is True
+
+
+def _serve_fake_bus(path: Path, notify_calls: list[list[object]], *, has_server: bool) -> None:
+    """Accept one client like a session bus that also hosts the notification server."""
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(path))
+    listener.listen()
+
+    def _serve() -> None:
+        with listener:
+            connection, _address = listener.accept()
+        with connection:
+            assert _receive_line(connection).startswith(b"\0AUTH EXTERNAL ")
+            connection.sendall(b"OK 0123456789abcdef0123456789abcdef\r\n")
+            assert _receive_line(connection) == b"BEGIN\r\n"
+            serials = iter(range(1, 1000))
+            try:
+                while True:
+                    call = dbus.receive_message(connection)
+                    connection.sendall(
+                        _reply_to(call, next(serials), notify_calls, has_server=has_server)
+                    )
+            except ConnectionError:
+                return
+
+    Thread(target=_serve, daemon=True).start()
+
+
+def _receive_line(connection: socket.socket) -> bytes:
+    line = b""
+    while not line.endswith(b"\r\n"):
+        line += connection.recv(1)
+    return line
+
+
+def _reply_to(
+    call: dbus.Message, serial: int, notify_calls: list[list[object]], *, has_server: bool
+) -> bytes:
+    reply_fields: dict[int, tuple[str, object]] = {dbus.FIELD_REPLY_SERIAL: ("u", call["serial"])}
+    match call["fields"].get(dbus.FIELD_MEMBER):
+        case "Hello":
+            # Buses announce the granted name before replying; clients must skip it.
+            name_acquired = dbus.encode_message(
+                dbus.SIGNAL,
+                serial + 500,
+                {
+                    dbus.FIELD_PATH: ("o", "/org/freedesktop/DBus"),
+                    dbus.FIELD_INTERFACE: ("s", "org.freedesktop.DBus"),
+                    dbus.FIELD_MEMBER: ("s", "NameAcquired"),
+                },
+                signature="s",
+                body=[":1.7"],
+            )
+            reply = dbus.encode_message(
+                dbus.METHOD_RETURN, serial, reply_fields, signature="s", body=[":1.7"]
+            )
+            return name_acquired + reply
+        case "Notify" if has_server:
+            notify_calls.append(call["body"])
+            replaces_id = cast("int", call["body"][1])
+            notification_id = replaces_id or FIRST_NOTIFICATION_ID
+            return dbus.encode_message(
+                dbus.METHOD_RETURN, serial, reply_fields, signature="u", body=[notification_id]
+            )
+        case _:
+            error_name = ("s", "org.freedesktop.DBus.Error.ServiceUnknown")
+            return dbus.encode_message(
+                dbus.ERROR,
+                serial,
+                {**reply_fields, dbus.FIELD_ERROR_NAME: error_name},
+                signature="s",
+                body=["The name is not activatable"],
+            )
+
+
+def test_notifications_update_one_notification_over_the_session_bus(tmp_path: Path) -> None:
+    notify_calls: list[list[object]] = []
+    _serve_fake_bus(tmp_path / "bus", notify_calls, has_server=True)
+
+    with (
+        patch.dict(os.environ, {"DBUS_SESSION_BUS_ADDRESS": f"unix:path={tmp_path / 'bus'}"}),
+        patch("subprocess.run") as run_mock,
+    ):
+        for kind in ("recording_started", "processing", "completed"):
+            notify.send_notification(cast("NotificationKind", kind))
+        delivered = notify.flush_notifications()
+
+    assert delivered is True
+    run_mock.assert_not_called()
+    assert [call[1] for call in notify_calls] == [
+        0,
+        FIRST_NOTIFICATION_ID,
+        FIRST_NOTIFICATION_ID,
+    ]
+    assert notify_calls[0] == ["Koe", 0, "", "Koe", "Recording…", [], {}, -1]
+    assert [call[4] for call in notify_calls] == [
+        "Recording…",
+        "Processing…",
+        "Transcription complete",
+    ]
+
+
+def test_notifications_fall_back_to_notify_send_without_a_notification_server(
+    tmp_path: Path,
+) -> None:
+    _serve_fake_bus(tmp_path / "bus", [], has_server=False)
+
+    with (
+        patch.dict(os.environ, {"DBUS_SESSION_BUS_ADDRESS": f"unix:path={tmp_path / 'bus'}"}),
+        patch("subprocess.run") as run_mock,
+    ):
+        notify.send_notification("completed")
+        notify.flush_notifications()
+
+    run_mock.assert_called_once_with(
+        ["notify-send", "Koe", "Transcription complete"],
+        check=False,
+        capture_output=True,
+        text=True,
+    )
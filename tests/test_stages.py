@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from threading import Thread
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pytest
+
+from koe import stages
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from koe.types import StageName
+
+
+@pytest.fixture
+def _timing_enabled() -> Iterator[None]:
+    stages.set_stage_timing(True)
+    try:
+        yield
+    finally:
+        stages.set_stage_timing(False)
+
+
+def test_timed_stage_is_shared_no_op_when_disabled() -> None:
+    stages.set_stage_timing(False)
+
+    first = stages.timed_stage("capture")
+    with first:
+        pass
+
+    assert stages.timed_stage("inference") is first
+    assert stages.stage_durations_ms() == {}
+
+
+@pytest.mark.usefixtures("_timing_enabled")
+def test_timed_stage_accumulates_repeated_stages() -> None:
+    with patch("koe.stages.time.perf_counter", side_effect=[1.0, 1.25, 2.0, 2.5, 3.0, 3.001]):
+        with stages.timed_stage("focus"):
+            pass
+        with stages.timed_stage("focus"):
+            pass
+        with stages.timed_stage("paste"):
+            pass
+
+    assert stages.stage_durations_ms() == {"focus": 750.0, "paste": 1.0}
+
+
+@pytest.mark.usefixtures("_timing_enabled")
+def test_timed_stage_records_when_block_raises() -> None:
+    with (
+        patch("koe.stages.time.perf_counter", side_effect=[0.0, 0.1]),
+        pytest.raises(RuntimeError),
+        stages.timed_stage("inference"),
+    ):
+        raise RuntimeError
+
+    assert stages.stage_durations_ms() == {"inference": 100.0}
+
+
+def test_add_stage_duration_counts_only_while_timing_is_enabled() -> None:
+    stages.set_stage_timing(False)
+    stages.add_stage_duration("daemon_transcription", 5.0)
+    disabled = stages.stage_durations_ms()
+    stages.set_stage_timing(True)
+    try:
+        stages.add_stage_duration("daemon_transcription", 5.0)
+        stages.add_stage_duration("daemon_transcription", 2.5)
+        enabled = stages.stage_durations_ms()
+    finally:
+        stages.set_stage_timing(False)
+
+    assert disabled == {}
+    assert enabled == {"daemon_transcription": 7.5}
+
+
+@pytest.mark.usefixtures("_timing_enabled")
+def test_stage_timing_scope_keeps_overlapping_sessions_apart() -> None:
+    session: dict[StageName, float] = {}
+
+    def _other_session() -> None:
+        with stages.timed_stage("capture"):
+            pass
+
+    with stages.stage_timing_scope(session):
+        with stages.timed_stage("transcription"):
+            worker = Thread(target=_other_session)
+            worker.start()
+            worker.join()
+        scoped = stages.stage_durations_ms()
+
+    assert list(session) == ["transcription"]
+    assert list(scoped) == ["transcription"]
+    assert list(stages.stage_durations_ms()) == ["capture"]
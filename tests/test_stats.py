@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from typing import TYPE_CHECKING, cast
+from unittest.mock import patch
+
+import pytest
+
+from koe import stats
+from koe.config import DEFAULT_CONFIG, KoeConfig
+from koe.usage_log import read_log_manifest, write_usage_log_record
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+RUN_COUNT = 200
+P50_MS = 100
+P99_MS = 198
+ROTATED_RUN_COUNT = 12
+
+
+def _stats_config(tmp_path: Path) -> KoeConfig:
+    return cast(
+        "KoeConfig",
+        {
+            **DEFAULT_CONFIG,
+            "usage_log_path": tmp_path / "usage.jsonl",
+            "transcription_log_path": tmp_path / "transcriptions.jsonl",
+            "stats_checkpoint_path": tmp_path / "stats-checkpoint.json",
+            "stats_window_days": (1, 7),
+        },
+    )
+
+
+def _append(path: Path, *records: object) -> None:
+    with path.open("a", encoding="utf-8") as handle:
+        handle.writelines(f"{json.dumps(record)}\n" for record in records)
+
+
+def _usage(day: str, duration_ms: int, outcome: str = "success") -> dict[str, object]:
+    return {
+        "run_id": "r",
+        "invoked_at": f"{day}T09:00:00+00:00",
+        "outcome": outcome,
+        "duration_ms": duration_ms,
+    }
+
+
+def test_sketch_quantiles_stay_within_relative_error() -> None:
+    sketch: stats.Sketch = {}
+    for value in range(1, RUN_COUNT + 1):
+        stats.sketch_add(sketch, value)
+
+    p50 = stats.sketch_quantile(sketch, 0.5)
+    p99 = stats.sketch_quantile(sketch, 0.99)
+
+    assert p50 == pytest.approx(P50_MS, rel=0.02)
+    assert p99 == pytest.approx(P99_MS, rel=0.02)
+    assert stats.sketch_quantile({}, 0.5) is None
+
+
+def test_sketch_keeps_zero_values_in_their_own_bucket() -> None:
+    sketch: stats.Sketch = {}
+    stats.sketch_add(sketch, 0.0)
+    stats.sketch_add(sketch, 0.0)
+    stats.sketch_add(sketch, 50.0)
+
+    assert stats.sketch_quantile(sketch, 0.5) == 0.0
+    assert stats.sketch_quantile(sketch, 1.0) == pytest.approx(50.0, rel=0.01)
+
+
+def test_update_stats_checkpoint_parses_only_new_complete_lines(tmp_path: Path) -> None:
+    config = _stats_config(tmp_path)
+    usage_log = config["usage_log_path"]
+    _append(usage_log, _usage("2026-10-16", 100), _usage("2026-10-17", 300, "no_speech"))
+    checkpoint = stats.load_stats_checkpoint(config["stats_checkpoint_path"])
+
+    stats.update_stats_checkpoint(checkpoint, config)
+    _append(usage_log, _usage("2026-10-17", 500))
+    with usage_log.open("a", encoding="utf-8") as handle:
+        handle.write('{"partial": ')
+    stats.update_stats_checkpoint(checkpoint, config)
+
+    assert checkpoint["days"]["2026-10-16"]["outcomes"] == {"success": 1}
+    assert checkpoint["days"]["2026-10-17"]["outcomes"] == {"no_speech": 1, "success": 1}
+    assert checkpoint["usage_log"]["offset"] == usage_log.stat().st_size - len('{"partial": ')
+
+
+def test_update_stats_checkpoint_restarts_a_replaced_log_from_its_start(tmp_path: Path) -> None:
+    config = _stats_config(tmp_path)
+    usage_log = config["usage_log_path"]
+    _append(usage_log, _usage("2026-10-16", 100), _usage("2026-10-16", 200))
+    checkpoint = stats.load_stats_checkpoint(config["stats_checkpoint_path"])
+    stats.update_stats_checkpoint(checkpoint, config)
+
+    usage_log.rename(tmp_path / "usage.jsonl.1")
+    _append(usage_log, _usage("2026-10-17", 300))
+    stats.update_stats_checkpoint(checkpoint, config)
+
+    assert checkpoint["days"]["2026-10-16"]["outcomes"] == {"success": 2}
+    assert checkpoint["days"]["2026-10-17"]["outcomes"] == {"success": 1}
+
+
+def test_run_stats_reports_windows_and_resumes_from_checkpoint(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    config = _stats_config(tmp_path)
+    _append(
+        config["usage_log_path"],
+        {
+            **_usage("2026-10-17", 800),
+            "first_audio_frame_ms": 42.0,
+            "stages": {"capture": 600.0, "transcription": 150.0},
+        },
+        _usage("2026-10-01", 900, "no_speech"),
+    )
+    _append(
+        config["transcription_log_path"],
+        {"timestamp": "2026-10-17T09:00:01+00:00", "text": "hello there", "word_count": 2},
+    )
+
+    with patch("koe.stats.datetime") as datetime_mock:
+        datetime_mock.now.return_value.date.return_value = date(2026, 10, 17)
+        datetime_mock.fromisoformat = datetime.fromisoformat
+        assert stats.run_stats(config) == 0
+        first_report = capsys.readouterr().out
+        with patch("koe.stats._fold_usage_record") as fold_mock:
+            assert stats.run_stats(config) == 0
+        second_report = capsys.readouterr().out
+
+    assert "window=1d runs=1 success=1" in first_report
+    assert "window=all runs=2 no_speech=1 success=1" in first_report
+    assert "  stage capture p50=" in first_report
+    assert "  first_audio_frame_ms p50=42 p90=42 p99=42" in first_report
+    assert "  transcriptions=1 words=2" in first_report
+    assert second_report == first_report
+    fold_mock.assert_not_called()
+
+
+def test_update_stats_checkpoint_follows_rotation_into_segments(tmp_path: Path) -> None:
+    config = cast("KoeConfig", {**_stats_config(tmp_path), "log_rotate_bytes": 400})
+    for duration_ms in range(3):
+        write_usage_log_record(
+            config, "success", invoked_at="2026-10-16T09:00:00+00:00", duration_ms=duration_ms
+        )
+    checkpoint = stats.load_stats_checkpoint(config["stats_checkpoint_path"])
+    stats.update_stats_checkpoint(checkpoint, config)
+
+    for duration_ms in range(3, ROTATED_RUN_COUNT):
+        write_usage_log_record(
+            config, "success", invoked_at="2026-10-17T09:00:00+00:00", duration_ms=duration_ms
+        )
+    stats.update_stats_checkpoint(checkpoint, config)
+    fresh = stats.load_stats_checkpoint(tmp_path / "missing.json")
+    stats.update_stats_checkpoint(fresh, config)
+
+    assert read_log_manifest(config["usage_log_path"])
+    assert checkpoint["days"]["2026-10-16"]["outcomes"] == {"success": 3}
+    assert checkpoint["days"]["2026-10-17"]["outcomes"] == {"success": ROTATED_RUN_COUNT - 3}
+    assert fresh["days"] == checkpoint["days"]
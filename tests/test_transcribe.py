@@ -1,14 +1,19 @@
 from __future__ import annotations
 
+import time
+from concurrent.futures import Future
 from pathlib import Path
 from typing import cast
 from unittest.mock import Mock, patch
 
+import numpy as np
 import pytest
+import soundfile
 
 import koe.transcribe as transcribe_module
 from koe.config import DEFAULT_CONFIG, KoeConfig
-from koe.types import AudioArtifactPath
+from koe.stages import set_stage_timing, stage_durations_ms, stage_timing_scope
+from koe.types import AudioArtifactPath, StageName, TranscriptionResult
 
 
 class _Segment:
@@ -122,7 +127,9 @@ def test_transcribe_audio_cuda_unavailable_returns_typed_error() -> None:
         side_effect=RuntimeError("CUDA driver library not found"),
         create=True,
     ):
-        result = transcribe_module.transcribe_audio(_artifact_path(), DEFAULT_CONFIG)
+        result = transcribe_module.transcribe_audio(
+            _artifact_path(), _config(whisper_device="cuda")
+        )
 
     assert result["kind"] == "error"
     assert result["error"]["category"] == "transcription"
@@ -137,7 +144,9 @@ def test_transcribe_audio_model_load_failure_returns_typed_error() -> None:
         side_effect=RuntimeError("model cache corrupted"),
         create=True,
     ):
-        result = transcribe_module.transcribe_audio(_artifact_path(), DEFAULT_CONFIG)
+        result = transcribe_module.transcribe_audio(
+            _artifact_path(), _config(whisper_device="cuda")
+        )
 
     assert result["kind"] == "error"
     assert result["error"]["category"] == "transcription"
@@ -227,3 +236,454 @@ def test_transcribe_audio_contract_result_shape_is_transcription_result() -> Non
 
     assert isinstance(result, dict)
     assert result["kind"] in {"text", "empty", "error"}
+
+
+def test_transcribe_audio_uses_preloaded_model_without_constructing() -> None:
+    fake_model = _FakeModel([_Segment("warm")])
+    constructor_mock = Mock()
+
+    with patch("koe.transcribe.WhisperModel", constructor_mock, create=True):
+        result = transcribe_module.transcribe_audio(
+            _artifact_path(),
+            DEFAULT_CONFIG,
+            model=cast("transcribe_module.TranscriptionModel", fake_model),
+        )
+
+    assert result == {"kind": "text", "text": "warm"}
+    constructor_mock.assert_not_called()
+
+
+def test_transcribe_audio_awaits_background_model_load() -> None:
+    fake_model = _FakeModel([_Segment("overlapped")])
+    constructor_mock = Mock(return_value=fake_model)
+
+    with patch("koe.transcribe.WhisperModel", constructor_mock, create=True):
+        model_load = transcribe_module.start_model_load(DEFAULT_CONFIG)
+        result = transcribe_module.transcribe_audio(
+            _artifact_path(), DEFAULT_CONFIG, model=model_load
+        )
+
+    assert result == {"kind": "text", "text": "overlapped"}
+    assert constructor_mock.call_count == 1
+    assert model_load["finished_at"] is not None
+    assert model_load["finished_at"] >= model_load["started_at"]
+
+
+def test_transcribe_audio_surfaces_background_model_load_failure() -> None:
+    with patch(
+        "koe.transcribe.WhisperModel",
+        side_effect=RuntimeError("CUDA driver library not found"),
+        create=True,
+    ):
+        model_load = transcribe_module.start_model_load(DEFAULT_CONFIG)
+        result = transcribe_module.transcribe_audio(
+            _artifact_path(), DEFAULT_CONFIG, model=model_load
+        )
+
+    assert result["kind"] == "error"
+    assert result["error"]["cuda_available"] is False
+
+
+@pytest.mark.parametrize(
+    ("finished_at", "demanded_at", "expected_ms"),
+    [
+        (12.0, 15.0, 2000),
+        (15.0, 12.0, 2000),
+        (None, 11.5, 1500),
+        (10.0, 9.0, 0),
+    ],
+)
+def test_hidden_load_ms_counts_load_overlapping_capture(
+    finished_at: float | None, demanded_at: float, expected_ms: int
+) -> None:
+    model_load: transcribe_module.ModelLoad = {
+        "future": Future(),
+        "started_at": 10.0,
+        "finished_at": finished_at,
+    }
+
+    assert transcribe_module.hidden_load_ms(model_load, demanded_at) == expected_ms
+
+
+def test_claim_load_metrics_reports_a_shared_load_only_once() -> None:
+    model_load: transcribe_module.ModelLoad = {
+        "future": Future(),
+        "started_at": 10.0,
+        "finished_at": 12.0,
+        "warm_up_ms": 300,
+    }
+
+    first = transcribe_module.claim_load_metrics(model_load, 15.0)
+    second = transcribe_module.claim_load_metrics(model_load, 20.0)
+
+    assert first == {"model_load_hidden_ms": 2000, "model_warm_up_ms": 300}
+    assert second == {}
+
+
+def test_transcribe_audio_passes_in_memory_samples_straight_to_model() -> None:
+    samples = np.zeros(16_000, dtype=np.float32)
+    model_inputs: list[object] = []
+
+    class _RecordingModel:
+        def transcribe(self, audio: object, /) -> tuple[list[_Segment], object]:
+            model_inputs.append(audio)
+            return ([_Segment("buffered")], object())
+
+    with patch("koe.transcribe.WhisperModel", return_value=_RecordingModel(), create=True):
+        result = transcribe_module.transcribe_audio(samples, DEFAULT_CONFIG)
+
+    assert result == {"kind": "text", "text": "buffered"}
+    assert model_inputs == [samples]
+
+
+class _BurstModel:
+    """Names each non-silent burst by its length, like words separated by pauses."""
+
+    def transcribe(self, audio: object, /) -> tuple[list[_Segment], object]:
+        samples = cast("np.ndarray[tuple[int], np.dtype[np.float32]]", audio)
+        voiced = np.concatenate([[0], (samples != 0.0).astype(np.int8), [0]])
+        edges = np.flatnonzero(np.diff(voiced))
+        words = [
+            _Segment(f" burst{round((end - start) / 1600)} ")
+            for start, end in zip(edges[::2], edges[1::2], strict=True)
+        ]
+        return (words, object())
+
+
+def _speech_fixture() -> np.ndarray[tuple[int], np.dtype[np.float32]]:
+    def _burst(seconds: float) -> np.ndarray[tuple[int], np.dtype[np.float32]]:
+        return np.full(int(seconds * 16_000), 0.5, dtype=np.float32)
+
+    def _pause(seconds: float) -> np.ndarray[tuple[int], np.dtype[np.float32]]:
+        return np.zeros(int(seconds * 16_000), dtype=np.float32)
+
+    return np.concatenate([_burst(0.5), _pause(0.8), _burst(1.0), _pause(0.8), _burst(0.3)])
+
+
+def test_streaming_transcription_stitches_to_single_pass_result() -> None:
+    samples = _speech_fixture()
+    model = _BurstModel()
+    config = _config()
+    single_pass = transcribe_module.transcribe_audio(samples, config, model=model)
+
+    stream = transcribe_module.start_streaming_transcription(
+        lambda window: transcribe_module.transcribe_audio(window, config, model=model)
+    )
+    # Cut mid-pause, where koe.vad.find_silence_cut places window boundaries.
+    transcribe_module.submit_audio_window(stream, samples[:14_400])
+    transcribe_module.submit_audio_window(stream, samples[14_400:43_200])
+    streamed = transcribe_module.finish_streaming_transcription(stream, samples)
+
+    assert single_pass == {"kind": "text", "text": "burst5 burst10 burst3"}
+    assert streamed == single_pass
+    assert stream["submitted_frames"] == samples.size
+
+
+def test_streamed_window_inference_is_timed_into_the_starting_session() -> None:
+    samples = _speech_fixture()
+    model = _BurstModel()
+    config = _config()
+    session: dict[StageName, float] = {}
+
+    set_stage_timing(True)
+    try:
+        with stage_timing_scope(session):
+            stream = transcribe_module.start_streaming_transcription(
+                lambda window: transcribe_module.transcribe_audio(window, config, model=model)
+            )
+        transcribe_module.submit_audio_window(stream, samples[:14_400])
+        transcribe_module.finish_streaming_transcription(stream, samples)
+        unscoped = stage_durations_ms()
+    finally:
+        set_stage_timing(False)
+
+    assert set(session) == {"inference"}
+    assert unscoped == {}
+
+
+def test_streaming_transcription_surfaces_first_window_error() -> None:
+    samples = _speech_fixture()
+    error_result = {
+        "kind": "error",
+        "error": {"category": "transcription", "message": "boom", "cuda_available": True},
+    }
+    window_results = iter([{"kind": "text", "text": "burst5"}, error_result])
+    stream = transcribe_module.start_streaming_transcription(
+        lambda _window: cast("TranscriptionResult", next(window_results))
+    )
+
+    transcribe_module.submit_audio_window(stream, samples[:14_400])
+    result = transcribe_module.finish_streaming_transcription(stream, samples)
+
+    assert result == error_result
+    transcribe_module.close_streaming_transcription(stream)
+
+
+def test_load_whisper_model_auto_falls_back_to_int8_cpu_when_cuda_load_fails() -> None:
+    fake_model = _FakeModel([_Segment("cpu")])
+    constructor_mock = Mock(side_effect=[RuntimeError("CUDA driver not found"), fake_model])
+
+    with (
+        patch("koe.transcribe.WhisperModel", constructor_mock, create=True),
+        patch("koe.transcribe.os.sched_getaffinity", return_value=set(range(8))),
+    ):
+        result = transcribe_module.load_whisper_model(_config(whisper_device="auto"))
+
+    assert result == {"ok": True, "value": fake_model}
+    devices = [call.kwargs["device"] for call in constructor_mock.call_args_list]
+    assert devices == ["cuda", "cpu"]
+    cpu_kwargs = constructor_mock.call_args_list[1].kwargs
+    assert cpu_kwargs["compute_type"] == DEFAULT_CONFIG["whisper_cpu_compute_type"]
+    assert cpu_kwargs["cpu_threads"] == 8 // DEFAULT_CONFIG["whisper_cpu_workers"]
+    assert cpu_kwargs["num_workers"] == DEFAULT_CONFIG["whisper_cpu_workers"]
+
+
+def test_load_whisper_model_cpu_device_never_attempts_cuda() -> None:
+    constructor_mock = Mock(return_value=_FakeModel([]))
+
+    with patch("koe.transcribe.WhisperModel", constructor_mock, create=True):
+        result = transcribe_module.load_whisper_model(_config(whisper_device="cpu"))
+
+    assert result["ok"] is True
+    constructor_mock.assert_called_once()
+    assert constructor_mock.call_args.kwargs["device"] == "cpu"
+
+
+def test_load_whisper_model_cuda_device_does_not_fall_back() -> None:
+    constructor_mock = Mock(side_effect=RuntimeError("CUDA driver not found"))
+
+    with patch("koe.transcribe.WhisperModel", constructor_mock, create=True):
+        result = transcribe_module.load_whisper_model(_config(whisper_device="cuda"))
+
+    assert result["ok"] is False
+    assert result["error"]["cuda_available"] is False
+    constructor_mock.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    ("cores", "num_workers", "expected_threads"),
+    [(8, 1, 8), (8, 2, 4), (3, 2, 1), (1, 4, 1)],
+)
+def test_cpu_thread_count_splits_available_cores_across_workers(
+    cores: int, num_workers: int, expected_threads: int
+) -> None:
+    with patch("koe.transcribe.os.sched_getaffinity", return_value=set(range(cores))):
+        assert transcribe_module.cpu_thread_count(num_workers) == expected_threads
+
+
+def test_transcribe_file_in_windows_matches_single_pass_over_long_recording(
+    tmp_path: Path,
+) -> None:
+    phrase = np.concatenate(
+        [np.full(32_000, 0.5, dtype=np.float32), np.zeros(16_000, dtype=np.float32)]
+    )
+    samples = np.tile(phrase, 30)
+    artifact = AudioArtifactPath(tmp_path / "spilled.wav")
+    soundfile.write(artifact, samples, 16_000, subtype="FLOAT")
+    model = _BurstModel()
+    window_sizes: list[int] = []
+    real_transcribe_with_model = transcribe_module.transcribe_with_model
+
+    def _recording_transcribe(
+        window_model: transcribe_module.TranscriptionModel, window: object
+    ) -> TranscriptionResult:
+        window_sizes.append(cast("np.ndarray[tuple[int], np.dtype[np.float32]]", window).size)
+        return real_transcribe_with_model(window_model, cast("AudioArtifactPath", window))
+
+    with patch("koe.transcribe.transcribe_with_model", side_effect=_recording_transcribe):
+        windowed = transcribe_module.transcribe_file_in_windows(model, artifact)
+
+    assert windowed == transcribe_module.transcribe_with_model(model, samples)
+    assert len(window_sizes) > 1
+    assert max(window_sizes) <= 30 * 16_000
+
+
+def test_transcribe_audio_windowed_reads_artifact_through_windows() -> None:
+    fake_model = _FakeModel([_Segment("long")])
+    with (
+        patch("koe.transcribe.WhisperModel", return_value=fake_model, create=True),
+        patch(
+            "koe.transcribe.transcribe_file_in_windows",
+            return_value={"kind": "text", "text": "long"},
+        ) as windows_mock,
+    ):
+        result = transcribe_module.transcribe_audio(_artifact_path(), _config(), windowed=True)
+
+    assert result == {"kind": "text", "text": "long"}
+    windows_mock.assert_called_once_with(fake_model, _artifact_path())
+
+
+def test_transcribe_file_in_windows_maps_unreadable_artifact_to_error(tmp_path: Path) -> None:
+    result = transcribe_module.transcribe_file_in_windows(
+        _BurstModel(), AudioArtifactPath(tmp_path / "missing.wav")
+    )
+
+    assert result["kind"] == "error"
+    assert result["error"]["message"].startswith("audio read failed:")
+
+
+def test_start_model_load_warms_model_before_reporting_ready() -> None:
+    warm_up_inputs: list[object] = []
+
+    class _WarmableModel:
+        def transcribe(self, audio: object, /) -> tuple[list[_Segment], object]:
+            warm_up_inputs.append(audio)
+            return ([], object())
+
+    with patch("koe.transcribe.WhisperModel", return_value=_WarmableModel(), create=True):
+        model_load = transcribe_module.start_model_load(_config())
+        model_load["future"].result(timeout=5)
+
+    assert transcribe_module.model_ready(model_load)
+    assert "warm_up_ms" in model_load
+    assert len(warm_up_inputs) == 1
+    silence = cast("np.ndarray[tuple[int], np.dtype[np.float32]]", warm_up_inputs[0])
+    assert silence.size == DEFAULT_CONFIG["sample_rate"]
+    assert not silence.any()
+
+
+@pytest.mark.parametrize("device", ["cuda", "cpu"])
+def test_warm_up_failure_reports_the_device_the_model_loaded_on(device: str) -> None:
+    model = Mock()
+    model.model.device = device
+    model.transcribe.side_effect = RuntimeError("out of memory")
+
+    result = transcribe_module.warm_up_model(model)
+
+    assert result["ok"] is False
+    assert result["error"]["cuda_available"] is (device == "cuda")
+
+
+def test_start_model_load_skips_warm_up_when_disabled() -> None:
+    fake_model = _FakeModel([])
+    config = cast("KoeConfig", {**DEFAULT_CONFIG, "whisper_warm_up": False})
+
+    with patch("koe.transcribe.WhisperModel", return_value=fake_model, create=True):
+        model_load = transcribe_module.start_model_load(config)
+        model_load["future"].result(timeout=5)
+
+    assert transcribe_module.model_ready(model_load)
+    assert "warm_up_ms" not in model_load
+
+
+def test_start_model_load_reports_warm_up_failure_as_not_ready() -> None:
+    failing_model = _FakeModel([], error=RuntimeError("cuBLAS failed to initialise"))
+
+    with patch("koe.transcribe.WhisperModel", return_value=failing_model, create=True):
+        model_load = transcribe_module.start_model_load(_config())
+        model_result = model_load["future"].result(timeout=5)
+
+    assert not transcribe_module.model_ready(model_load)
+    assert model_result["ok"] is False
+    assert model_result["error"]["message"].startswith("warm-up failed:")
+
+
+def test_model_ready_is_false_while_load_is_pending() -> None:
+    model_load: transcribe_module.ModelLoad = {
+        "future": Future(),
+        "started_at": 0.0,
+        "finished_at": None,
+    }
+
+    assert not transcribe_module.model_ready(model_load)
+
+
+FILLER_PACKAGES = 20
+FILLER_FILES_PER_PACKAGE = 150
+
+
+def _fake_nvidia_site(site_dir: Path, /, *, cublas_version: str) -> list[Path]:
+    """A site-packages dir whose nvidia tree is mostly filler, like the real wheels."""
+    (site_dir / f"nvidia_cublas_cu12-{cublas_version}.dist-info").mkdir(parents=True)
+    for package in range(FILLER_PACKAGES):
+        include_dir = site_dir / "nvidia" / f"package{package}" / "include"
+        include_dir.mkdir(parents=True)
+        for index in range(FILLER_FILES_PER_PACKAGE):
+            (include_dir / f"header{index}.h").touch()
+    libraries = [
+        site_dir / "nvidia" / "cublas" / "lib" / "libcublas.so.12",
+        site_dir / "nvidia" / "cublas" / "lib" / "libcublasLt.so.12",
+        site_dir / "nvidia" / "cudnn" / "lib" / "libcudnn.so.9",
+    ]
+    for library in libraries:
+        library.parent.mkdir(parents=True, exist_ok=True)
+        library.touch()
+    return libraries
+
+
+def _timed_preload(manifest_path: Path, /) -> tuple[float, list[str]]:
+    transcribe_module._preload_cuda_libraries.cache_clear()  # pyright: ignore[reportPrivateUsage]
+    with patch("koe.transcribe.ctypes.CDLL") as cdll_mock:
+        started_at = time.perf_counter()
+        transcribe_module._preload_cuda_libraries(manifest_path)  # pyright: ignore[reportPrivateUsage]
+        elapsed = time.perf_counter() - started_at
+    transcribe_module._preload_cuda_libraries.cache_clear()  # pyright: ignore[reportPrivateUsage]
+    return (elapsed, [call.args[0] for call in cdll_mock.call_args_list])
+
+
+def test_preload_cuda_libraries_reads_the_manifest_instead_of_walking_the_tree(
+    tmp_path: Path,
+) -> None:
+    site_dir = tmp_path / "site-packages"
+    libraries = _fake_nvidia_site(site_dir, cublas_version="12.4.5.8")
+    manifest_path = tmp_path / "data" / "cuda-libraries.json"
+
+    with (
+        patch("koe.transcribe.site.getsitepackages", return_value=[str(site_dir)]),
+        patch("koe.transcribe.site.getusersitepackages", return_value=str(site_dir)),
+    ):
+        scan_seconds, scanned = _timed_preload(manifest_path)
+        with patch.object(Path, "rglob", side_effect=AssertionError("walked the nvidia tree")):
+            manifest_seconds, cached = _timed_preload(manifest_path)
+
+    assert scanned == cached == [str(library) for library in libraries]
+    assert manifest_seconds < scan_seconds
+
+
+def test_preload_cuda_libraries_rescans_after_an_upgrade_or_a_missing_library(
+    tmp_path: Path,
+) -> None:
+    site_dir = tmp_path / "site-packages"
+    libraries = _fake_nvidia_site(site_dir, cublas_version="12.4.5.8")
+    manifest_path = tmp_path / "cuda-libraries.json"
+
+    with (
+        patch("koe.transcribe.site.getsitepackages", return_value=[str(site_dir)]),
+        patch("koe.transcribe.site.getusersitepackages", return_value=str(site_dir)),
+    ):
+        _timed_preload(manifest_path)
+        libraries[2].unlink()
+        _seconds, after_removal = _timed_preload(manifest_path)
+        (site_dir / "nvidia_cublas_cu12-12.4.5.8.dist-info").rename(
+            site_dir / "nvidia_cublas_cu12-12.6.4.1.dist-info"
+        )
+        moved = libraries[0].with_name("libcublas.so.12.6")
+        libraries[0].rename(moved)
+        moved.with_name("libcublas.so.12").symlink_to(moved)
+        _seconds, after_upgrade = _timed_preload(manifest_path)
+
+    assert after_removal == [str(library) for library in libraries[:2]]
+    assert after_upgrade == [str(library) for library in libraries[:2]]
+    assert "12.6.4.1" in manifest_path.read_text(encoding="utf-8")
+
+
+def test_whisper_model_preloads_cuda_libraries_only_for_cuda(tmp_path: Path) -> None:
+    faster_whisper = Mock()
+    manifest_path = tmp_path / "cuda-libraries.json"
+
+    # Patched second: patch itself resolves its targets through importlib.
+    with (
+        patch("koe.transcribe._preload_cuda_libraries") as preload_mock,
+        patch("koe.transcribe.importlib.import_module", return_value=faster_whisper),
+    ):
+        transcribe_module.WhisperModel("base.en", device="cpu", compute_type="int8")
+        preload_mock.assert_not_called()
+        transcribe_module.WhisperModel(
+            "base.en",
+            device="cuda",
+            compute_type="float16",
+            cuda_library_manifest=manifest_path,
+        )
+
+    preload_mock.assert_called_once_with(manifest_path)
+    assert "cuda_library_manifest" not in faster_whisper.WhisperModel.call_args.kwargs
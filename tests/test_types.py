@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from pathlib import Path
 
+import numpy as np
 import pytest
 from typeguard import TypeCheckError, check_type
 
@@ -200,6 +201,18 @@ def test_audio_capture_requires_artifact_path() -> None:
         check_type({"kind": "captured"}, koe_types.AudioCapture)
 
 
+def test_audio_buffer_requires_samples() -> None:
+    check_type(
+        {"kind": "buffered", "samples": np.zeros(2, dtype=np.float32)}, koe_types.AudioBuffer
+    )
+    check_type(
+        {"kind": "buffered", "samples": np.zeros(2, dtype=np.float32), "trimmed_seconds": 0.5},
+        koe_types.AudioBuffer,
+    )
+    with pytest.raises(TypeCheckError):
+        check_type({"kind": "buffered"}, koe_types.AudioBuffer)
+
+
 def test_audio_empty_requires_explicit_empty_kind() -> None:
     check_type({"kind": "empty"}, koe_types.AudioEmpty)
     with pytest.raises(TypeCheckError):
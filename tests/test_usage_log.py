@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import gzip
 import json
 import uuid
+from datetime import UTC, datetime
+from threading import Thread
 from typing import TYPE_CHECKING, cast
 from unittest.mock import patch
 
@@ -10,7 +13,12 @@ from typeguard import check_type
 
 from koe.config import DEFAULT_CONFIG
 from koe.types import UsageLogRecord
-from koe.usage_log import write_usage_log_record
+from koe.usage_log import (
+    iter_log_lines,
+    log_segments,
+    read_log_manifest,
+    write_usage_log_record,
+)
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -21,6 +29,10 @@ if TYPE_CHECKING:
 EXPECTED_FIRST_DURATION_MS = 123
 EXPECTED_RECORD_COUNT = 3
 UUID4_VERSION = 4
+EXPECTED_HIDDEN_LOAD_MS = 850
+ROTATION_RECORD_COUNT = 40
+EXPECTED_SEGMENT_COUNT = 2
+OWNER_ONLY_MODE = 0o600
 
 
 def _config_with_usage_log(usage_log_path: Path) -> KoeConfig:
@@ -134,3 +146,100 @@ def test_write_usage_log_record_is_non_raising_on_write_failure_emits_stderr(
 
     captured = capsys.readouterr()
     assert "usage log" in captured.err.lower()
+
+
+def test_write_usage_log_record_merges_pipeline_metrics(tmp_path: Path) -> None:
+    usage_log_path = tmp_path / "koe-usage.jsonl"
+    config = _config_with_usage_log(usage_log_path)
+
+    write_usage_log_record(
+        config,
+        "success",
+        invoked_at="2026-02-20T09:00:00+00:00",
+        duration_ms=1,
+        metrics={"model_load_hidden_ms": 850},
+    )
+
+    records = _read_jsonl(usage_log_path)
+    assert records[0].get("model_load_hidden_ms") == EXPECTED_HIDDEN_LOAD_MS
+
+
+def _rotating_config(tmp_path: Path, **overrides: object) -> KoeConfig:
+    return cast(
+        "KoeConfig",
+        {
+            **DEFAULT_CONFIG,
+            "usage_log_path": tmp_path / "usage.jsonl",
+            "log_rotate_bytes": 1_000,
+            **overrides,
+        },
+    )
+
+
+def _log_day(config: KoeConfig, day: int, count: int) -> None:
+    for second in range(count):
+        write_usage_log_record(
+            config,
+            "success",
+            invoked_at=f"2026-02-{day:02d}T09:00:{second:02d}+00:00",
+            duration_ms=second,
+        )
+
+
+def test_write_usage_log_record_rotates_into_private_gzip_segments(tmp_path: Path) -> None:
+    config = _rotating_config(tmp_path)
+
+    _log_day(config, 20, ROTATION_RECORD_COUNT)
+
+    segments = read_log_manifest(config["usage_log_path"])
+    assert len(segments) >= EXPECTED_SEGMENT_COUNT
+    for segment in segments:
+        segment_path = tmp_path / segment["name"]
+        assert segment_path.suffix == ".gz"
+        assert segment_path.stat().st_mode & 0o777 == OWNER_ONLY_MODE
+    assert not list(tmp_path.glob("usage-*.jsonl"))
+    lines = list(iter_log_lines(config["usage_log_path"]))
+    assert [json.loads(line)["duration_ms"] for line in lines] == list(range(ROTATION_RECORD_COUNT))
+    assert segments[0]["first"] == "2026-02-20T09:00:00+00:00"
+
+
+def test_log_segments_select_by_date_range(tmp_path: Path) -> None:
+    config = _rotating_config(tmp_path, log_rotate_bytes=1)
+    _log_day(config, 18, 1)
+    _log_day(config, 19, 1)
+    _log_day(config, 20, 1)
+
+    selected = log_segments(
+        config["usage_log_path"],
+        since=datetime(2026, 2, 19, tzinfo=UTC),
+        until=datetime(2026, 2, 19, 23, 59, tzinfo=UTC),
+    )
+
+    assert len(selected) == 1
+    assert json.loads(gzip.decompress(selected[0].read_bytes()))["invoked_at"].startswith(
+        "2026-02-19"
+    )
+
+
+def test_write_usage_log_record_rotates_by_age_when_enabled(tmp_path: Path) -> None:
+    config = _rotating_config(tmp_path, log_rotate_bytes=1_000_000, log_rotate_days=1)
+
+    _log_day(config, 20, 1)
+
+    assert len(read_log_manifest(config["usage_log_path"])) == 1
+    assert not config["usage_log_path"].exists()
+
+
+def test_concurrent_appends_survive_rotation(tmp_path: Path) -> None:
+    config = _rotating_config(tmp_path)
+    writers = [
+        Thread(target=_log_day, args=(config, day, ROTATION_RECORD_COUNT)) for day in (1, 2, 3, 4)
+    ]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    lines = list(iter_log_lines(config["usage_log_path"]))
+    assert len(lines) == 4 * ROTATION_RECORD_COUNT
+    assert len({json.loads(line)["invoked_at"] for line in lines}) == 4 * ROTATION_RECORD_COUNT
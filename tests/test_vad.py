@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import numpy as np
+
+from koe.vad import find_silence_cut, iter_quiet_windows, speech_bounds, to_mono
+
+SAMPLE_RATE = 16_000
+
+
+def _tone(seconds: float) -> np.ndarray[tuple[int], np.dtype[np.float32]]:
+    timeline = np.arange(int(seconds * SAMPLE_RATE), dtype=np.float32) / SAMPLE_RATE
+    return (0.5 * np.sin(2 * np.pi * 220 * timeline)).astype(np.float32)
+
+
+def _silence(seconds: float) -> np.ndarray[tuple[int], np.dtype[np.float32]]:
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def test_to_mono_averages_channels_and_flattens_single_channel() -> None:
+    stereo = np.array([[0.2, 0.4], [1.0, 0.0]], dtype=np.float32)
+    single = np.array([[0.1], [0.2]], dtype=np.float32)
+
+    np.testing.assert_allclose(to_mono(stereo), [0.3, 0.5])
+    assert to_mono(single).shape == (2,)
+
+
+def test_find_silence_cut_lands_in_middle_of_last_gap_past_minimum() -> None:
+    samples = np.concatenate([_tone(0.5), _silence(0.4), _tone(1.0), _silence(0.4), _tone(0.5)])
+
+    cut = find_silence_cut(
+        samples,
+        sample_rate=SAMPLE_RATE,
+        min_frames=SAMPLE_RATE,
+        silence_seconds=0.2,
+        threshold=0.01,
+    )
+
+    assert cut is not None
+    assert int(1.9 * SAMPLE_RATE) <= cut <= int(2.3 * SAMPLE_RATE)
+    assert np.all(samples[cut - 800 : cut + 800] == 0.0)
+
+
+def test_find_silence_cut_returns_none_without_long_enough_gap() -> None:
+    samples = np.concatenate([_tone(1.0), _silence(0.1), _tone(1.0)])
+
+    cut = find_silence_cut(
+        samples, sample_rate=SAMPLE_RATE, min_frames=0, silence_seconds=0.3, threshold=0.01
+    )
+
+    assert cut is None
+
+
+def test_speech_bounds_pads_voiced_region_and_clamps_to_buffer() -> None:
+    samples = np.concatenate([_silence(1.0), _tone(0.5), _silence(1.0)])
+
+    bounds = speech_bounds(samples, sample_rate=SAMPLE_RATE, threshold=0.01, padding_seconds=0.2)
+
+    assert bounds == (int(0.8 * SAMPLE_RATE), int(1.7 * SAMPLE_RATE))
+
+
+def test_speech_bounds_returns_none_for_silence_and_keeps_sub_frame_speech() -> None:
+    assert (
+        speech_bounds(_silence(2.0), sample_rate=SAMPLE_RATE, threshold=0.01, padding_seconds=0.2)
+        is None
+    )
+    short = np.array([0.1, 0.2, 0.3], dtype=np.float32)
+    assert speech_bounds(short, sample_rate=SAMPLE_RATE, threshold=0.01, padding_seconds=0.2) == (
+        0,
+        3,
+    )
+
+
+class _ArrayReader:
+    def __init__(self, samples: np.ndarray[tuple[int], np.dtype[np.float32]]) -> None:
+        self._samples = samples
+        self._position = 0
+
+    def read(self, frames: int, dtype: str) -> np.ndarray[tuple[int], np.dtype[np.float32]]:
+        assert dtype == "float32"
+        block = self._samples[self._position : self._position + frames]
+        self._position += block.size
+        return block
+
+
+def test_iter_quiet_windows_covers_input_in_bounded_windows_cut_at_pauses() -> None:
+    phrase = np.concatenate([_tone(2.0), _silence(0.5)])
+    samples = np.tile(phrase, 12)
+    window_frames = 5 * SAMPLE_RATE
+
+    windows = list(
+        iter_quiet_windows(
+            _ArrayReader(samples), sample_rate=SAMPLE_RATE, window_frames=window_frames
+        )
+    )
+
+    assert all(window.size <= window_frames for window in windows)
+    np.testing.assert_array_equal(np.concatenate(windows), samples)
+    for window in windows[1:]:
+        assert np.all(window[:320] == 0.0)
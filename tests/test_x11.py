@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from koe import x11
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+ACTIVE_WINDOW_ID = 0x3A00007
+KEY_PRESS, KEY_RELEASE = 2, 3
+KEYMAP_BYTES = 32
+SELECTION_REQUEST, SELECTION_CLEAR = 30, 29
+WINDOW_ATOM, STRING_ATOM, ATOM_ATOM, WM_NAME_ATOM = 33, 31, 4, 39
+
+
+class _FakeXError(Exception):
+    pass
+
+
+def _atom(name: str) -> str:
+    return f"atom:{name}"
+
+
+def _selection_notify(**fields: object) -> dict[str, object]:
+    return fields
+
+
+def _fake_xlib(display: MagicMock, key_events: list[tuple[int, int]] | None = None) -> MagicMock:
+    def _fake_input(_display: object, event_type: int, keycode: int) -> None:
+        if key_events is not None:
+            key_events.append((event_type, keycode))
+
+    xlib = MagicMock()
+    modules = {
+        "display": SimpleNamespace(Display=MagicMock(return_value=display)),
+        "X": SimpleNamespace(
+            KeyPress=KEY_PRESS,
+            KeyRelease=KEY_RELEASE,
+            CurrentTime=0,
+            NONE=0,
+            AnyPropertyType=0,
+            CopyFromParent=0,
+            SelectionRequest=SELECTION_REQUEST,
+            SelectionClear=SELECTION_CLEAR,
+        ),
+        "XK": SimpleNamespace(string_to_keysym={"Control_L": 65507, "v": 118}.get),
+        "Xatom": SimpleNamespace(
+            WINDOW=WINDOW_ATOM, STRING=STRING_ATOM, ATOM=ATOM_ATOM, WM_NAME=WM_NAME_ATOM
+        ),
+        "event": SimpleNamespace(SelectionNotify=_selection_notify),
+        "xtest": SimpleNamespace(fake_input=_fake_input),
+        "errors": (OSError, _FakeXError),
+    }
+    xlib.__getitem__.side_effect = modules.__getitem__
+    return xlib
+
+
+def _display() -> MagicMock:
+    display = MagicMock()
+    display.intern_atom.side_effect = _atom
+    display.keysym_to_keycode.side_effect = {65507: 37, 118: 55}.get
+    display.query_keymap.return_value = [0] * KEYMAP_BYTES
+    # Shift, Lock, Control, Mod1 (Alt) and Mod4 (Super), as on a US layout.
+    display.get_modifier_mapping.return_value = [[50], [66], [37], [64], [], [], [133], []]
+    return display
+
+
+@pytest.fixture(autouse=True)
+def _fresh_connection() -> Iterator[None]:
+    with (
+        patch.dict("koe.x11._connection", clear=True),
+        patch.dict("koe.x11._clipboard", clear=True),
+    ):
+        yield
+
+
+def test_query_focused_window_reads_active_window_over_one_connection() -> None:
+    display = _display()
+    root = display.screen.return_value.root
+    root.get_full_property.return_value = SimpleNamespace(value=[ACTIVE_WINDOW_ID])
+    window = display.create_resource_object.return_value
+    window.get_full_property.return_value = SimpleNamespace(value="naïve notes".encode())
+    xlib = _fake_xlib(display)
+
+    with patch("koe.x11._load_xlib", return_value=xlib):
+        first = x11.query_focused_window()
+        second = x11.query_focused_window()
+
+    assert first == {"ok": True, "value": {"window_id": ACTIVE_WINDOW_ID, "title": "naïve notes"}}
+    assert second == first
+    assert xlib["display"].Display.call_count == 1
+    root.get_full_property.assert_called_with("atom:_NET_ACTIVE_WINDOW", WINDOW_ATOM)
+    display.create_resource_object.assert_called_with("window", ACTIVE_WINDOW_ID)
+
+
+def test_query_focused_window_reports_no_focus_from_input_focus() -> None:
+    display = _display()
+    display.screen.return_value.root.get_full_property.return_value = None
+    display.get_input_focus.return_value = SimpleNamespace(focus=1)
+
+    with patch("koe.x11._load_xlib", return_value=_fake_xlib(display)):
+        result = x11.query_focused_window()
+
+    assert result == {"ok": False, "error": {"category": "focus", "message": "no focused window"}}
+
+
+def test_query_focused_window_falls_back_and_reconnects_after_x_errors() -> None:
+    display = _display()
+    display.screen.side_effect = _FakeXError("connection closed")
+    xlib = _fake_xlib(display)
+
+    with patch("koe.x11._load_xlib", return_value=xlib):
+        first = x11.query_focused_window()
+        second = x11.query_focused_window()
+    with patch("koe.x11._load_xlib", return_value=None):
+        without_xlib = x11.query_focused_window()
+
+    assert first is None
+    assert second is None
+    assert without_xlib is None
+    assert xlib["display"].Display.call_count == 2  # noqa: PLR2004
+    # Each failed connection is closed before the next one opens.
+    assert display.close.call_count == 2  # noqa: PLR2004
+
+
+def test_send_paste_chord_closes_the_connection_after_an_xtest_error() -> None:
+    display = _display()
+    display.sync.side_effect = _FakeXError("connection closed")
+    display.close.side_effect = _FakeXError("already closed")
+    xlib = _fake_xlib(display)
+
+    with patch("koe.x11._load_xlib", return_value=xlib):
+        result = x11.send_paste_chord("ctrl+v")
+
+    assert result == {"ok": False, "error": "XTest failed: connection closed"}
+    display.close.assert_called_once()
+    assert "display" not in x11._connection  # pyright: ignore[reportPrivateUsage]
+
+
+def test_send_paste_chord_presses_in_order_and_releases_in_reverse() -> None:
+    display = _display()
+    key_events: list[tuple[int, int]] = []
+
+    with patch("koe.x11._load_xlib", return_value=_fake_xlib(display, key_events)):
+        result = x11.send_paste_chord("ctrl+v")
+
+    assert result == {"ok": True, "value": None}
+    assert key_events == [
+        (KEY_PRESS, 37),
+        (KEY_PRESS, 55),
+        (KEY_RELEASE, 55),
+        (KEY_RELEASE, 37),
+    ]
+    display.sync.assert_called_once()
+
+
+def test_send_paste_chord_releases_held_modifiers_around_the_chord() -> None:
+    display = _display()
+    keymap = [0] * KEYMAP_BYTES
+    # Super (133) is still held from the hotkey; Caps Lock (66) is latched.
+    for keycode in (133, 66):
+        keymap[keycode // 8] |= 1 << (keycode % 8)
+    display.query_keymap.return_value = keymap
+    key_events: list[tuple[int, int]] = []
+
+    with patch("koe.x11._load_xlib", return_value=_fake_xlib(display, key_events)):
+        result = x11.send_paste_chord("ctrl+v")
+
+    assert result == {"ok": True, "value": None}
+    assert key_events == [
+        (KEY_RELEASE, 133),
+        (KEY_PRESS, 37),
+        (KEY_PRESS, 55),
+        (KEY_RELEASE, 55),
+        (KEY_RELEASE, 37),
+        (KEY_PRESS, 133),
+    ]
+
+
+def test_send_paste_chord_yields_to_xdotool_without_xtest() -> None:
+    display = _display()
+    display.has_extension.return_value = False
+
+    with patch("koe.x11._load_xlib", return_value=_fake_xlib(display)):
+        result = x11.send_paste_chord("ctrl+v")
+
+    assert result is None
+
+
+def test_set_clipboard_text_needs_a_running_owner() -> None:
+    with patch("koe.x11._load_xlib", return_value=_fake_xlib(_display())):
+        result = x11.set_clipboard_text("hello")
+
+    assert result is None
+
+
+def test_clipboard_owner_serves_utf8_text_to_requestors() -> None:
+    display = _display()
+    owner_window = display.screen.return_value.root.create_window.return_value
+    display.get_selection_owner.return_value = owner_window
+    xlib = _fake_xlib(display)
+    requestor = MagicMock()
+    request = SimpleNamespace(
+        type=SELECTION_REQUEST,
+        property="atom:PASTE",
+        target="atom:UTF8_STRING",
+        requestor=requestor,
+        selection="atom:CLIPBOARD",
+        time=7,
+    )
+    display.next_event.side_effect = [request, _FakeXError("closed")]
+
+    with (
+        patch("koe.x11._load_xlib", return_value=xlib),
+        patch("koe.x11.Thread") as thread_mock,
+    ):
+        assert x11.start_clipboard_owner() is True
+        result = x11.set_clipboard_text("ça marche")
+        serve_target = thread_mock.call_args.kwargs["target"]
+        serve_target(*thread_mock.call_args.kwargs["args"])
+
+    assert result == {"ok": True, "value": None}
+    owner_window.set_selection_owner.assert_called_once_with("atom:CLIPBOARD", 0)
+    requestor.change_property.assert_called_once_with(
+        "atom:PASTE", "atom:UTF8_STRING", 8, "ça marche".encode()
+    )
+    assert requestor.send_event.call_args.args[0]["property"] == "atom:PASTE"
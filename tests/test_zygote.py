@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import TYPE_CHECKING, cast
+
+from koe.config import DEFAULT_CONFIG
+from koe.zygote import is_zygote_running, request_zygote_session
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from koe.config import KoeConfig
+
+ZYGOTE_READY_TIMEOUT_SECONDS = 60
+PRESSES = 2
+
+_ZYGOTE_SCRIPT = """
+import os
+import sys
+import types
+from pathlib import Path
+from koe.config import DEFAULT_CONFIG
+from koe.zygote import run_zygote
+
+# Stands in for sounddevice: counts PortAudio (re)initialisations.
+sounddevice = types.ModuleType("sounddevice")
+sounddevice.initialized = 1
+sounddevice._terminate = lambda: None
+def _initialize():
+    sounddevice.initialized += 1
+sounddevice._initialize = _initialize
+sys.modules["sounddevice"] = sounddevice
+
+def _session():
+    print(os.getpid(), sounddevice.initialized, flush=True)
+    return 1
+
+config = {**DEFAULT_CONFIG, "zygote_socket_path": Path(sys.argv[1])}
+raise SystemExit(run_zygote(config, _session))
+"""
+
+
+def _config(tmp_path: Path) -> KoeConfig:
+    return cast("KoeConfig", {**DEFAULT_CONFIG, "zygote_socket_path": tmp_path / "z.sock"})
+
+
+def test_request_zygote_session_returns_none_without_a_zygote(tmp_path: Path) -> None:
+    config = _config(tmp_path)
+
+    assert is_zygote_running(config) is False
+    assert request_zygote_session(config) is None
+
+
+def test_zygote_forks_a_child_per_press_and_reparks(tmp_path: Path) -> None:
+    config = _config(tmp_path)
+    zygote = subprocess.Popen(
+        [sys.executable, "-c", _ZYGOTE_SCRIPT, str(config["zygote_socket_path"])],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        deadline = time.monotonic() + ZYGOTE_READY_TIMEOUT_SECONDS
+        while not is_zygote_running(config) and time.monotonic() < deadline:
+            assert zygote.poll() is None
+            time.sleep(0.05)
+
+        exit_codes = [request_zygote_session(config) for _press in range(PRESSES)]
+        assert zygote.stdout is not None
+        children = [zygote.stdout.readline().split() for _press in range(PRESSES)]
+    finally:
+        os.kill(zygote.pid, signal.SIGTERM)
+        zygote_exit_code = zygote.wait(timeout=ZYGOTE_READY_TIMEOUT_SECONDS)
+
+    child_pids = [int(pid) for pid, _initialized in children]
+    assert exit_codes == [1] * PRESSES
+    # Every child re-initialised the PortAudio it inherited, once.
+    assert [initialized for _pid, initialized in children] == ["2"] * PRESSES
+    assert len(set(child_pids)) == PRESSES
+    assert zygote.pid not in child_pids
+    assert zygote_exit_code == 0
+    assert not config["zygote_socket_path"].exists()